@@ -1,54 +1,65 @@
 # Required installations:
-# pip install pandas tabula-py openpyxl pillow tqdm pdf2image PyMuPDF PyPDF2 camelot-py opencv-python pytesseract pyocr reportlab
+# pip install pandas tabula-py openpyxl pillow tqdm pdf2image PyMuPDF camelot-py opencv-python pytesseract pyocr reportlab jpype1 pyarrow
+#
+# Only what the main window needs is imported at launch. The extraction stack
+# (pandas, tabula, camelot, OpenCV, tesseract...) is imported the first time a
+# feature uses it; benchmark_startup.py checks this stays within budget.
 
 # Add these imports at the top
 import uuid
 import hashlib
 import datetime
-import winreg
+try:
+    import winreg
+except ImportError:  # not on Windows
+    winreg = None
 import socket
 
+# pip name -> module name of every runtime dependency
+REQUIRED_PACKAGES = {
+    'pandas': 'pandas', 'tabula-py': 'tabula', 'openpyxl': 'openpyxl', 'pillow': 'PIL',
+    'tqdm': 'tqdm', 'pdf2image': 'pdf2image', 'PyMuPDF': 'fitz',
+    'camelot-py': 'camelot', 'opencv-python': 'cv2', 'pytesseract': 'pytesseract',
+    'pyocr': 'pyocr', 'reportlab': 'reportlab', 'jpype1': 'jpype', 'pyarrow': 'pyarrow',
+}
+
+
+def missing_packages():
+    """pip names of required packages that are not installed (found without importing them)"""
+    import importlib.util
+
+    return [package for package, module in REQUIRED_PACKAGES.items()
+            if importlib.util.find_spec(module) is None]
+
+
 def install_missing_packages():
+    """pip install whatever missing_packages() reports (python PdfToExcel.py --install-deps)"""
     import subprocess
     import sys
-    
-    required_packages = [
-        'pandas', 'tabula-py', 'openpyxl', 'pillow', 'tqdm',
-        'pdf2image', 'PyMuPDF', 'PyPDF2', 'camelot-py', 'opencv-python',
-        'pytesseract', 'pyocr', 'reportlab'
-    ]
-    
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_').split('[')[0])
-        except ImportError:
-            print(f"Installing {package}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
 
-# Try to install missing packages
-install_missing_packages()
+    for package in missing_packages():
+        print(f"Installing {package}...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+
 
 # Import statements
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-from tabula.io import read_pdf
-import pandas as pd
 import os
 import sys
 from datetime import datetime
 from PIL import Image, ImageTk, ImageDraw, ImageEnhance
-from tqdm import tqdm
 import threading
+import multiprocessing
 import fitz  # PyMuPDF
-import camelot
-from pdf2image import convert_from_path
-from PyPDF2 import PdfReader, PdfMerger, PdfWriter
-import cv2
 import numpy as np
 import json
-import pytesseract
-from reportlab.pdfgen import canvas
-from reportlab.lib.colors import red, blue, yellow
+import pdf_edits
+import pdf_pages
+from annotation_store import AnnotationStore, UndoLog, bounding_box, simplify_stroke
+from conversion_profile import ConversionProfile
+from page_raster import (ANALYSIS_DPI, MIN_DPI, OCR_DPI, TILE_SIZE, PagePrefetcher,
+                         PageRasterCache)
 
 # Add these functions before the PDFToExcelConverter class
 def get_hardware_id():
@@ -82,15 +93,37 @@ class PDFToExcelConverter(tk.Tk):
         self.pdf_path = None
         self.password = None
         self.zoom_level = 1.0
-        self.annotations = []
-        self.undo_stack = []
+        self.annotations = AnnotationStore()
+        self.history = UndoLog(self.annotations)
+        self.stroke = None
+        self.overlay_photos = []
         self.current_tool = None
+        self.result_cache = None
+        self.checkpoint = None
+        self.cancel_event = None
+        self.preview_generation = 0
         
         self.create_menu()
         self.create_toolbar()
         self.create_main_interface()
         self.bind_events()
+        # Once the window is up, not before
+        self.after_idle(self.check_dependencies)
         
+    def check_dependencies(self):
+        """Warn about missing packages, looked up on a background thread"""
+        if getattr(sys, 'frozen', False):
+            return  # everything is bundled into the exe
+
+        def check():
+            missing = missing_packages()
+            if missing:
+                self.after(0, lambda: messagebox.showwarning(
+                    "Missing Packages",
+                    "Some features will not work until these packages are installed:\n\n"
+                    f"pip install {' '.join(missing)}"))
+        threading.Thread(target=check, daemon=True).start()
+
     def check_license(self):
         """Verify license and hardware ID"""
         config_file = 'license.json'
@@ -144,6 +177,7 @@ class PDFToExcelConverter(tk.Tk):
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Open PDF", command=self.open_pdf)
         file_menu.add_command(label="Save PDF", command=self.save_pdf)
+        file_menu.add_command(label="Save PDF As...", command=self.save_pdf_as)
         file_menu.add_command(label="Export as Image", command=self.export_as_image)
         file_menu.add_separator()
         file_menu.add_command(label="Merge PDFs", command=self.merge_pdfs)
@@ -152,6 +186,9 @@ class PDFToExcelConverter(tk.Tk):
         
         # Edit menu
         edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
+        edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
+        edit_menu.add_separator()
         edit_menu.add_command(label="Add Text", command=lambda: self.set_tool("text"))
         edit_menu.add_command(label="Add Image", command=self.add_image)
         edit_menu.add_command(label="Delete Page", command=self.delete_current_page)
@@ -164,6 +201,7 @@ class PDFToExcelConverter(tk.Tk):
         tools_menu.add_command(label="Underline", command=lambda: self.set_tool("underline"))
         tools_menu.add_command(label="Draw", command=lambda: self.set_tool("draw"))
         tools_menu.add_command(label="Sticky Note", command=lambda: self.set_tool("note"))
+        tools_menu.add_command(label="Erase Annotation", command=lambda: self.set_tool("erase"))
         menubar.add_cascade(label="Tools", menu=tools_menu)
         
         self.config(menu=menubar)
@@ -198,9 +236,20 @@ class PDFToExcelConverter(tk.Tk):
         preview_frame = ttk.Frame(self.main_container)
         self.main_container.add(preview_frame, weight=2)
         
-        # PDF Preview
-        self.preview_canvas = tk.Canvas(preview_frame, bg='gray')
-        self.preview_canvas.pack(fill=tk.BOTH, expand=True)
+        # PDF Preview (scrollable once zoomed in past the fit size)
+        canvas_frame = ttk.Frame(preview_frame)
+        canvas_frame.pack(fill=tk.BOTH, expand=True)
+        canvas_frame.rowconfigure(0, weight=1)
+        canvas_frame.columnconfigure(0, weight=1)
+        self.preview_canvas = tk.Canvas(canvas_frame, bg='gray')
+        self.preview_canvas.grid(row=0, column=0, sticky="nsew")
+        y_scroll = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.scroll_preview_y)
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.scroll_preview_x)
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        self.preview_canvas.config(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        self.preview_tiles = {}
+        self.preview_tile_view = None
         
         # Navigation
         nav_frame = ttk.Frame(preview_frame)
@@ -222,7 +271,7 @@ class PDFToExcelConverter(tk.Tk):
         # Engine selection
         ttk.Label(options_frame, text="Extraction Engine:").pack()
         self.engine_var = tk.StringVar(value="auto")
-        engines = ["Auto", "Tabula", "Camelot", "OCR"]
+        engines = ["Auto", "Tabula", "Camelot", "PyMuPDF", "OCR"]
         ttk.OptionMenu(options_frame, self.engine_var, *engines).pack()
         
         # Table detection options
@@ -232,6 +281,10 @@ class PDFToExcelConverter(tk.Tk):
                        variable=self.lattice_var).pack()
         ttk.Checkbutton(options_frame, text="Detect Borderless Tables", 
                        variable=self.stream_var).pack()
+        # Find ruled tables first and parse only those regions (table_grid)
+        self.detect_areas_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Parse Only Detected Table Areas",
+                       variable=self.detect_areas_var).pack()
         
         # Page selection
         pages_frame = ttk.LabelFrame(options_frame, text="Page Selection")
@@ -246,6 +299,19 @@ class PDFToExcelConverter(tk.Tk):
         self.page_range = ttk.Entry(pages_frame)
         self.page_range.pack()
 
+        # Parallel extraction
+        ttk.Label(options_frame, text="Worker Processes:").pack()
+        # parallel_extract.default_workers(), without importing the engines at launch
+        self.workers_var = tk.IntVar(value=max(1, os.cpu_count() or 1))
+        ttk.Spinbox(options_frame, from_=1, to=64, width=5,
+                    textvariable=self.workers_var).pack()
+
+        # OCR resolution for scanned pages
+        ttk.Label(options_frame, text="OCR DPI:").pack()
+        self.ocr_dpi_var = tk.IntVar(value=OCR_DPI)
+        ttk.Spinbox(options_frame, from_=100, to=600, increment=50, width=5,
+                    textvariable=self.ocr_dpi_var).pack()
+
         # Output Options
         output_frame = ttk.LabelFrame(control_frame, text="Output Options")
         output_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -255,43 +321,63 @@ class PDFToExcelConverter(tk.Tk):
                        variable=self.format_var, value="xlsx").pack()
         ttk.Radiobutton(output_frame, text="CSV", 
                        variable=self.format_var, value="csv").pack()
+        ttk.Radiobutton(output_frame, text="Parquet",
+                       variable=self.format_var, value="parquet").pack()
+        ttk.Radiobutton(output_frame, text="Feather (Arrow IPC)",
+                       variable=self.format_var, value="feather").pack()
+        ttk.Radiobutton(output_frame, text="JSON Lines",
+                       variable=self.format_var, value="jsonl").pack()
+        self.stitch_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(output_frame, text="Merge Tables Across Pages",
+                       variable=self.stitch_var).pack()
+        self.normalize_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(output_frame, text="Convert Numbers and Dates",
+                       variable=self.normalize_var).pack()
         
         # Conversion button
         self.convert_btn = ttk.Button(control_frame, text="Convert", 
                                       command=self.start_conversion)
-        self.convert_btn.pack(pady=10)
+        self.convert_btn.pack(pady=(10, 0))
+        self.cancel_btn = ttk.Button(control_frame, text="Cancel", state='disabled',
+                                     command=self.cancel_conversion)
+        self.cancel_btn.pack(pady=(5, 10))
         
         # Status and progress
         self.status_label = ttk.Label(control_frame, text="Ready")
         self.status_label.pack()
         self.progress = ttk.Progressbar(control_frame, mode='determinate')
         self.progress.pack(fill=tk.X, padx=5)
+        self.profile_btn = ttk.Button(control_frame, text="Show Profile", state='disabled',
+                                      command=self.show_profile)
+        self.profile_btn.pack(pady=5)
+        self.last_profile = None
 
     def detect_tables(self):
+        """Outline the ruled tables and their cells found on the current page"""
         if not self.pdf_path:
             return
-            
+
         try:
-            # Use OpenCV to detect table structures
-            image = convert_from_path(self.pdf_path, first_page=self.current_page,
-                                    last_page=self.current_page)[0]
-            img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Table detection logic
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-            lines = cv2.HoughLinesP(edges, 1, np.pi/180, 100, minLineLength=100, maxLineGap=10)
-            
-            # Draw detected tables on preview
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
-                cv2.line(img_cv, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            
-            # Update preview with detected tables
-            self.update_preview(Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)))
-            
+            from table_grid import detect_grids
+
+            image = self.page_rasters.get(self.current_page, ANALYSIS_DPI)
+            grids = detect_grids(np.asarray(image.convert('L')), ANALYSIS_DPI)
         except Exception as e:
             messagebox.showerror("Error", f"Table detection failed: {str(e)}")
+            return
+
+        # Grids are in points on the page as displayed, so only the view scale applies
+        canvas = self.preview_canvas
+        canvas.delete("detection")
+        left, top, scale = self.preview_view()
+        for grid in grids:
+            for x0, y0, x1, y1 in grid['cells'] * scale + [left, top, left, top]:
+                canvas.create_rectangle(x0, y0, x1, y1, outline="#00a000", tags="detection")
+            x0, y0, x1, y1 = grid['bbox'] * scale + [left, top, left, top]
+            canvas.create_rectangle(x0, y0, x1, y1, outline="#00c000", width=3, tags="detection")
+        self.status_label.config(
+            text=f"Page {self.current_page}: {len(grids)} ruled table(s) found" if grids
+            else f"Page {self.current_page}: no ruled tables found")
 
     def open_pdf(self):
         """Open and load a PDF file"""
@@ -299,48 +385,64 @@ class PDFToExcelConverter(tk.Tk):
             filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
         )
         if file_path:
-            try:
-                self.pdf_path = file_path
-                self.pdf_document = fitz.open(file_path)
-                self.total_pages = len(self.pdf_document)
-                self.current_page = 1
+            self.current_page = 1
+            self.load_pdf(file_path)
+
+    def load_pdf(self, file_path):
+        """Make file_path the open document (preview, rasters and prefetcher), staying on the current page"""
+        try:
+            self.pdf_path = file_path
+            self.pdf_document = fitz.open(file_path)
+            if hasattr(self, 'prefetcher'):
+                self.prefetcher.stop()
+            self.page_rasters = PageRasterCache(self.pdf_document)
+            self.prefetcher = PagePrefetcher(self.page_rasters)
+            self.total_pages = len(self.pdf_document)
+            self.current_page = min(self.current_page, self.total_pages) or 1
+            self.update_preview()
+            self.status_label.config(text=f"Loaded PDF: {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open PDF: {str(e)}")
+
+    def save_pdf(self, output_path=None):
+        """Save edits and annotations; into the open file as an incremental update by default"""
+        if not self.pdf_path or not hasattr(self, 'pdf_document'):
+            messagebox.showwarning("Warning", "Please open a PDF first!")
+            return
+        
+        annotations = list(self.annotations)
+        document, rasters = self.pdf_document, self.page_rasters
+
+        def save(on_progress):
+            with rasters.locked():
+                return pdf_edits.save_document(document, annotations, output_path)
+
+        def saved(incremental):
+            # Now part of the document: no longer overlays, and no longer undoable
+            self.annotations.clear()
+            self.history.clear()
+            if not incremental:
+                # Written out whole: continue editing the new file
+                self.load_pdf(output_path or self.pdf_path)
+            else:
+                for page in {a['page'] for a in annotations}:
+                    self.page_rasters.invalidate(page)
                 self.update_preview()
-                self.status_label.config(text=f"Loaded PDF: {os.path.basename(file_path)}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to open PDF: {str(e)}")
+            self.status_label.config(text=f"Saved {os.path.basename(output_path or self.pdf_path)}")
+
+        self.run_page_task("Saving PDF", save, saved)
 
-    def save_pdf(self):
-        """Save PDF with annotations"""
+    def save_pdf_as(self):
+        """Save edits and annotations to a new file (a full rewrite)"""
         if not self.pdf_path:
             messagebox.showwarning("Warning", "Please open a PDF first!")
             return
-        
-        try:
-            output_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf")]
-            )
-            if output_path:
-                # Create new PDF with annotations
-                writer = PdfWriter()
-                reader = PdfReader(self.pdf_path)
-                
-                for i in range(len(reader.pages)):
-                    page = reader.pages[i]
-                    # Add annotations for this page
-                    page_annotations = [a for a in self.annotations if a['page'] == i + 1]
-                    for annot in page_annotations:
-                        if annot['type'] == 'text':
-                            page.insert_text(annot['coords'], annot['text'])
-                        elif annot['type'] == 'highlight':
-                            page.add_highlight_annot(annot['coords'])
-                    writer.add_page(page)
-                
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                messagebox.showinfo("Success", "PDF saved successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save PDF: {str(e)}")
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")]
+        )
+        if output_path:
+            self.save_pdf(output_path)
 
     def export_as_image(self):
         """Export current page as image"""
@@ -354,8 +456,7 @@ class PDFToExcelConverter(tk.Tk):
                 filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg")]
             )
             if output_path:
-                image = convert_from_path(self.pdf_path, first_page=self.current_page,
-                                        last_page=self.current_page)[0]
+                image = self.page_rasters.get(self.current_page, ANALYSIS_DPI)
                 image.save(output_path)
                 messagebox.showinfo("Success", "Image exported successfully!")
         except Exception as e:
@@ -370,14 +471,22 @@ class PDFToExcelConverter(tk.Tk):
         file_path = filedialog.askopenfilename(
             filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp *.gif")]
         )
-        if file_path:
-            self.annotations.append({
+        if file_path and hasattr(self, 'pdf_document'):
+            with Image.open(file_path) as image:
+                width, height = image.size
+            # IMAGE_WIDTH points wide, 100 points from the top left of the page as shown
+            left, top, scale = self.preview_view()
+            x0, y0 = left + 100 * scale, top + 100 * scale
+            x1 = x0 + pdf_edits.IMAGE_WIDTH * scale
+            y1 = y0 + pdf_edits.IMAGE_WIDTH * height / width * scale
+            rect = bounding_box([self.canvas_to_page(x0, y0), self.canvas_to_page(x1, y1)])
+            self.add_annotation_item({
                 'type': 'image',
                 'path': file_path,
-                'coords': (100, 100),  # Default position
+                'rect': rect,
+                'bbox': rect,
                 'page': self.current_page
             })
-            self.update_preview()
 
     def delete_current_page(self):
         """Delete current page from PDF"""
@@ -387,7 +496,12 @@ class PDFToExcelConverter(tk.Tk):
         
         if messagebox.askyesno("Confirm", "Delete current page?"):
             try:
-                self.pdf_document.delete_page(self.current_page - 1)
+                with self.page_rasters.locked():
+                    self.pdf_document.delete_page(self.current_page - 1)
+                self.page_rasters.clear()
+                # Page edits cannot be undone, so neither can annotations made before them
+                self.annotations.delete_page(self.current_page)
+                self.history.clear()  # later pages shifted down by one
                 self.total_pages = len(self.pdf_document)
                 if self.current_page > self.total_pages:
                     self.current_page = self.total_pages
@@ -402,8 +516,10 @@ class PDFToExcelConverter(tk.Tk):
             return
         
         try:
-            page = self.pdf_document[self.current_page - 1]
-            page.set_rotation((page.rotation + 90) % 360)
+            with self.page_rasters.locked():
+                page = self.pdf_document[self.current_page - 1]
+                page.set_rotation((page.rotation + 90) % 360)
+            self.page_rasters.invalidate(self.current_page)
             self.update_preview()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to rotate page: {str(e)}")
@@ -432,29 +548,107 @@ class PDFToExcelConverter(tk.Tk):
             messagebox.showerror("Error", "Invalid page number!")
 
     def draw_annotation(self, event):
-        """Handle drawing annotations"""
+        """Extend the stroke being drawn as a canvas line; the page is not re-rendered"""
         if self.current_tool == "draw":
-            self.annotations.append({
-                'type': 'draw',
-                'coords': (event.x, event.y),
-                'page': self.current_page
-            })
-            self.update_preview()
+            canvas = self.preview_canvas
+            x, y = canvas.canvasx(event.x), canvas.canvasy(event.y)
+            if self.stroke is None:
+                item = canvas.create_line(x, y, x, y, fill="blue", width=2, tags="annotation")
+                self.stroke = {'item': item, 'coords': [x, y]}
+            else:
+                self.stroke['coords'] += [x, y]
+                canvas.coords(self.stroke['item'], *self.stroke['coords'])
 
     def finish_annotation(self, event):
         """Finish current annotation"""
+        if self.stroke is not None:
+            coords = self.stroke['coords']
+            self.preview_canvas.delete(self.stroke['item'])
+            self.stroke = None
+            points = simplify_stroke([self.canvas_to_page(x, y)
+                                      for x, y in zip(coords[::2], coords[1::2])])
+            if len(points) > 1:
+                self.add_annotation_item({
+                    'type': 'draw',
+                    'points': points,
+                    'bbox': bounding_box(points, margin=1.0),
+                    'page': self.current_page
+                })
         if self.current_tool:
-            self.undo_stack.append(self.annotations[:])
             self.current_tool = None
             self.preview_canvas.config(cursor="arrow")
 
+    def add_annotation_item(self, annotation):
+        """Record a new annotation as an undoable command and draw it"""
+        self.history.add(annotation)
+        self.draw_overlay(annotation)
+
+    def undo(self, event=None):
+        """Undo the last annotation added or erased"""
+        self.show_annotation_change(self.history.undo())
+
+    def redo(self, event=None):
+        """Redo the last undone annotation change"""
+        self.show_annotation_change(self.history.redo())
+
+    def show_annotation_change(self, annotation):
+        if annotation is None or not hasattr(self, 'pdf_document'):
+            return
+        if annotation['page'] != self.current_page:
+            self.current_page = annotation['page']
+            self.update_preview()
+            self.page_label.config(text=f"Page: {self.current_page}")
+        else:
+            self.draw_annotation_overlays()
+
+    def draw_annotation_overlays(self):
+        """Draw the current page's annotations as canvas items over the page image"""
+        self.preview_canvas.delete("annotation")
+        self.overlay_photos = []
+        if hasattr(self, 'pdf_document'):
+            for annotation in self.annotations.on_page(self.current_page):
+                self.draw_overlay(annotation)
+
+    def draw_overlay(self, annotation):
+        """Draw one annotation as vector canvas items (images as a scaled copy)"""
+        canvas = self.preview_canvas
+        tags = ("annotation", f"annotation-{annotation['id']}")
+        scale = self.preview_view()[2]
+        kind = annotation['type']
+        if kind == 'highlight':
+            canvas.create_rectangle(*self.page_rect_to_canvas(annotation['coords']),
+                                    fill="yellow", stipple="gray50", outline="", tags=tags)
+        elif kind == 'draw':
+            coords = [c for point in annotation['points'] for c in self.page_to_canvas(*point)]
+            canvas.create_line(*coords, fill="blue", width=2, tags=tags)
+        elif kind == 'text':
+            canvas.create_text(*self.page_to_canvas(*annotation['coords']), anchor="sw",
+                               text=annotation['text'], tags=tags,
+                               font=("Helvetica", -max(1, int(pdf_edits.TEXT_SIZE * scale))))
+        elif kind == 'note':
+            x, y = self.page_to_canvas(*annotation['coords'])
+            canvas.create_rectangle(x, y, x + 16, y + 16, fill="#ffeb3b", outline="#c9a800",
+                                    tags=tags)
+        elif kind == 'image':
+            x0, y0, x1, y1 = self.page_rect_to_canvas(annotation['rect'])
+            with Image.open(annotation['path']) as image:
+                photo = ImageTk.PhotoImage(image.convert("RGB").resize(
+                    (max(1, int(x1 - x0)), max(1, int(y1 - y0)))))
+            self.overlay_photos.append(photo)
+            canvas.create_image(x0, y0, image=photo, anchor="nw", tags=tags)
+
     def save_settings(self):
         """Save current settings to a config file"""
         settings = {
             'engine': self.engine_var.get(),
             'lattice': self.lattice_var.get(),
             'stream': self.stream_var.get(),
-            'format': self.format_var.get()
+            'detect_areas': self.detect_areas_var.get(),
+            'format': self.format_var.get(),
+            'normalize': self.normalize_var.get(),
+            'stitch': self.stitch_var.get(),
+            'workers': self.workers_var.get(),
+            'ocr_dpi': self.ocr_dpi_var.get()
         }
         try:
             with open('pdf_converter_settings.json', 'w') as f:
@@ -469,13 +663,11 @@ class PDFToExcelConverter(tk.Tk):
             messagebox.showwarning("Warning", "Please open a PDF first!")
             return
         try:
-            image = convert_from_path(self.pdf_path, first_page=self.current_page,
-                                    last_page=self.current_page)[0]
-            # Apply preprocessing
-            img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            denoised = cv2.fastNlMeansDenoising(gray)
-            thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+            from ocr_engine import preprocess
+
+            image = self.page_rasters.get(self.current_page, ANALYSIS_DPI)
+            # Apply the same preprocessing the OCR engine uses
+            thresh = preprocess(image)
             # Update preview
             self.update_preview(Image.fromarray(thresh))
         except Exception as e:
@@ -497,26 +689,185 @@ class PDFToExcelConverter(tk.Tk):
 
     def update_preview(self, image=None):
         """Update the preview panel with current page"""
-        if image is None and hasattr(self, 'pdf_document'):
-            page = self.pdf_document[self.current_page - 1]
-            pix = page.get_pixmap()
-            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        
-        if image:
-            # Resize image to fit canvas
-            canvas_width = self.preview_canvas.winfo_width()
-            canvas_height = self.preview_canvas.winfo_height()
-            if canvas_width > 1 and canvas_height > 1:  # Canvas has been rendered
-                ratio = min(canvas_width/image.width, canvas_height/image.height)
-                new_size = (int(image.width*ratio), int(image.height*ratio))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-                
-                self.photo = ImageTk.PhotoImage(image)
-                self.preview_canvas.delete("all")
-                self.preview_canvas.create_image(
-                    canvas_width//2, canvas_height//2,
-                    image=self.photo, anchor="center"
-                )
+        self.preview_generation += 1
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:  # Canvas has not been rendered yet
+            return
+        
+        if image is not None:
+            self.show_preview_image(image)
+            return
+        if not hasattr(self, 'pdf_document'):
+            return
+        
+        page_number = self.current_page
+        fit_dpi = self.page_rasters.fit_dpi(page_number, canvas_width, canvas_height)
+        dpi = max(MIN_DPI, int(fit_dpi * self.zoom_level))
+        if self.zoom_level > 1:
+            # Larger than the canvas: render only the visible tiles
+            self.show_tiled_preview(page_number, dpi)
+            return
+        
+        size = self.page_rasters.page_size(page_number, dpi)
+        image = self.page_rasters.peek(page_number, dpi)
+        if image is None:
+            # Show a cheap draft now and swap in the sharp render when it is ready
+            image = self.page_rasters.get(page_number, max(MIN_DPI, dpi // 4))
+            generation = self.preview_generation
+            self.prefetcher.request(
+                page_number, dpi,
+                callback=lambda sharp: self.after(0, self.show_sharp_preview,
+                                                  generation, sharp))
+        self.prefetcher.prefetch_around(page_number, self.total_pages, dpi)
+        self.show_preview_image(image, size)
+
+    def show_sharp_preview(self, generation, image):
+        """Replace the draft preview, unless the user has moved on since it was requested"""
+        if generation == self.preview_generation:
+            self.show_preview_image(image, image.size)
+
+    def show_preview_image(self, image, size=None):
+        """Draw an image centred on the preview canvas, scaled to size (default: fit)"""
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+        if size is None:
+            ratio = min(canvas_width/image.width, canvas_height/image.height)
+            size = (int(image.width*ratio), int(image.height*ratio))
+        # Renders made at the target DPI already have the right size
+        if abs(size[0] - image.width) > 1 or abs(size[1] - image.height) > 1:
+            resample = (Image.Resampling.BILINEAR if size[0] > image.width
+                        else Image.Resampling.LANCZOS)
+            image = image.resize(size, resample)
+        
+        self.preview_tiles = {}
+        self.preview_tile_view = None
+        # Where the page sits on the canvas, for canvas_to_page
+        self.preview_image_box = ((canvas_width - image.width) / 2,
+                                  (canvas_height - image.height) / 2, image.width, image.height)
+        self.photo = ImageTk.PhotoImage(image)
+        self.preview_canvas.delete("all")
+        self.preview_canvas.config(scrollregion=(0, 0, canvas_width, canvas_height))
+        self.preview_canvas.xview_moveto(0)
+        self.preview_canvas.yview_moveto(0)
+        self.preview_canvas.create_image(
+            canvas_width//2, canvas_height//2,
+            image=self.photo, anchor="center"
+        )
+        self.draw_annotation_overlays()
+
+    def show_tiled_preview(self, page_number, dpi):
+        """Lay out a zoomed-in page as a scrollable grid of tiles"""
+        canvas = self.preview_canvas
+        canvas_width = canvas.winfo_width()
+        canvas_height = canvas.winfo_height()
+        # Keep the same part of the page in the middle when zooming
+        if self.preview_tile_view and self.preview_tile_view[0] == page_number:
+            x_center = sum(canvas.xview()) / 2
+            y_center = sum(canvas.yview()) / 2
+        else:
+            x_center = y_center = 0.5 if self.preview_tile_view is None else 0.0
+        
+        width, height = self.page_rasters.page_size(page_number, dpi)
+        # Centre the page when it is still narrower or shorter than the canvas
+        left = min(0, (width - canvas_width) // 2)
+        top = min(0, (height - canvas_height) // 2)
+        canvas.delete("all")
+        self.photo = None
+        self.preview_tiles = {}
+        self.preview_tile_view = (page_number, dpi, width, height)
+        canvas.config(scrollregion=(left, top, left + max(width, canvas_width),
+                                    top + max(height, canvas_height)))
+        x_span = canvas.xview()[1] - canvas.xview()[0]
+        y_span = canvas.yview()[1] - canvas.yview()[0]
+        canvas.xview_moveto(max(0.0, x_center - x_span / 2))
+        canvas.yview_moveto(max(0.0, y_center - y_span / 2))
+        self.render_visible_tiles()
+        self.draw_annotation_overlays()
+
+    def render_visible_tiles(self, event=None):
+        """Draw the tiles that intersect the view and drop the ones that left it"""
+        if not self.preview_tile_view:
+            return
+        page_number, dpi, width, height = self.preview_tile_view
+        canvas = self.preview_canvas
+        x0, y0 = canvas.canvasx(0), canvas.canvasy(0)
+        x1 = canvas.canvasx(canvas.winfo_width())
+        y1 = canvas.canvasy(canvas.winfo_height())
+        columns = range(max(0, int(x0 // TILE_SIZE)),
+                        min(-(-width // TILE_SIZE), int(x1 // TILE_SIZE) + 1))
+        rows = range(max(0, int(y0 // TILE_SIZE)),
+                     min(-(-height // TILE_SIZE), int(y1 // TILE_SIZE) + 1))
+        visible = {(column, row) for column in columns for row in rows}
+        
+        for key in [k for k in self.preview_tiles if k not in visible]:
+            canvas.delete(self.preview_tiles.pop(key)[0])
+        for column, row in sorted(visible - set(self.preview_tiles)):
+            tile = self.page_rasters.get_tile(page_number, dpi, column, row)
+            photo = ImageTk.PhotoImage(tile)
+            item = canvas.create_image(column * TILE_SIZE, row * TILE_SIZE,
+                                       image=photo, anchor="nw")
+            self.preview_tiles[(column, row)] = (item, photo)
+        canvas.tag_raise("annotation")
+
+    def preview_view(self):
+        """(left, top, pixels per point) of the page as drawn on the preview canvas"""
+        if self.preview_tile_view:
+            return 0, 0, self.preview_tile_view[1] / 72.0
+        left, top, width, height = self.preview_image_box
+        return left, top, width / self.pdf_document[self.current_page - 1].rect.width
+
+    def canvas_to_page(self, x, y):
+        """Turn canvas coordinates into PDF points on the unrotated page"""
+        left, top, scale = self.preview_view()
+        page = self.pdf_document[self.current_page - 1]
+        return tuple(fitz.Point((x - left) / scale, (y - top) / scale) * page.derotation_matrix)
+
+    def page_to_canvas(self, x, y):
+        """Turn PDF points on the unrotated page into canvas coordinates"""
+        left, top, scale = self.preview_view()
+        point = fitz.Point(x, y) * self.pdf_document[self.current_page - 1].rotation_matrix
+        return left + point.x * scale, top + point.y * scale
+
+    def page_rect_to_canvas(self, rect):
+        return bounding_box([self.page_to_canvas(rect[0], rect[1]),
+                             self.page_to_canvas(rect[2], rect[3])])
+
+    def scroll_preview_x(self, *args):
+        """Horizontal scrollbar callback"""
+        self.preview_canvas.xview(*args)
+        self.render_visible_tiles()
+
+    def scroll_preview_y(self, *args):
+        """Vertical scrollbar callback"""
+        self.preview_canvas.yview(*args)
+        self.render_visible_tiles()
+
+    def scroll_preview_wheel(self, event):
+        """Scroll a zoomed-in page with the mouse wheel (Shift for sideways)"""
+        if not self.preview_tile_view:
+            return
+        if event.num == 4 or event.delta > 0:
+            step = -1
+        else:
+            step = 1
+        if event.state & 0x0001:  # Shift held
+            self.preview_canvas.xview_scroll(step, "units")
+        else:
+            self.preview_canvas.yview_scroll(step, "units")
+        self.render_visible_tiles()
+
+    def start_pan(self, event):
+        """Start dragging a zoomed-in page (when no annotation tool is active)"""
+        if self.preview_tile_view and (self.current_tool is None or event.num == 2):
+            self.preview_canvas.scan_mark(event.x, event.y)
+
+    def pan_preview(self, event):
+        """Drag a zoomed-in page around"""
+        if self.preview_tile_view and (self.current_tool is None or event.num == 2
+                                       or event.state & 0x0200):
+            self.preview_canvas.scan_dragto(event.x, event.y, gain=1)
+            self.render_visible_tiles()
 
     def start_conversion(self):
         """Start the conversion process"""
@@ -535,116 +886,296 @@ class PDFToExcelConverter(tk.Tk):
 
             # Start conversion in a separate thread
             self.convert_btn.config(state='disabled')
-            self.progress.start()
+            self.cancel_btn.config(state='normal')
+            self.progress.config(value=0, maximum=1)
+            cancel = self.cancel_event = threading.Event()
+            
+            def show_progress(done, total, shard):
+                # Called from the worker thread; hand the update to the Tk thread
+                def update():
+                    self.progress.config(value=done, maximum=total)
+                    if not cancel.is_set():
+                        self.status_label.config(
+                            text=f"Extracted pages {shard[1][0]}-{shard[1][-1]} ({done}/{total})")
+                self.after(0, update)
             
+            profile = ConversionProfile()
+
             def conversion_thread():
                 try:
-                    # Extract tables based on selected engine
-                    if self.engine_var.get() == "Camelot":
-                        tables = camelot.read_pdf(self.pdf_path, pages=pages)
-                    else:
-                        tables = read_pdf(self.pdf_path, pages=pages,
-                                        lattice=self.lattice_var.get(),
-                                        stream=self.stream_var.get())
-                    
-                    if tables:
-                        # Save to selected format
-                        output_path = os.path.splitext(self.pdf_path)[0]
-                        if self.format_var.get() == "xlsx":
-                            output_path += "_converted.xlsx"
-                            with pd.ExcelWriter(output_path) as writer:
-                                for i, table in enumerate(tables):
-                                    table.df.to_excel(writer, sheet_name=f'Table_{i+1}', index=False)
-                        else:
-                            output_path += "_converted.csv"
-                            pd.concat([table.df for table in tables]).to_csv(output_path, index=False)
-                        
-                        messagebox.showinfo("Success", f"Saved to {output_path}")
+                    # Imported here so the first conversion loads the engines off the Tk thread
+                    from parallel_extract import convert_batch
+
+                    summary = convert_batch([self.pdf_path],
+                                            engine=self.engine_var.get(),
+                                            pages=pages,
+                                            lattice=self.lattice_var.get(),
+                                            stream=self.stream_var.get(),
+                                            detect_areas=self.detect_areas_var.get(),
+                                            fmt=self.format_var.get(),
+                                            normalize=self.normalize_var.get(),
+                                            stitch=self.stitch_var.get(),
+                                            password=self.password,
+                                            workers=self.workers_var.get(),
+                                            on_progress=show_progress,
+                                            cache=self.get_result_cache(),
+                                            checkpoint=self.get_checkpoint(),
+                                            cancel=cancel,
+                                            ocr_dpi=self.ocr_dpi_var.get(),
+                                            profile=profile)
+                    self.last_profile = (self.pdf_path, profile)
+                    self.after(0, lambda: self.profile_btn.config(state='normal'))
+                    if summary['cancelled']:
+                        self.after(0, lambda: self.status_label.config(text="Cancelled"))
+                        messagebox.showinfo("Cancelled",
+                                            "Conversion cancelled. The pages already extracted "
+                                            "are kept: converting again with the same options "
+                                            "resumes from there.")
+                    elif summary['failed']:
+                        raise RuntimeError(summary['failed'][0][1])
+                    elif summary['converted']:
+                        messagebox.showinfo("Success", f"Saved to {summary['converted'][0][1]}")
                     else:
                         messagebox.showinfo("Info", "No tables found in the selected pages.")
                 
                 except Exception as e:
                     messagebox.showerror("Error", f"Conversion failed: {str(e)}")
                 finally:
-                    self.progress.stop()
-                    self.convert_btn.config(state='normal')
+                    self.cancel_event = None
+                    self.after(0, lambda: (self.convert_btn.config(state='normal'),
+                                           self.cancel_btn.config(state='disabled')))
             
             threading.Thread(target=conversion_thread, daemon=True).start()
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to start conversion: {str(e)}")
 
+    def cancel_conversion(self):
+        """Stop the running conversion once the page shards being extracted are done"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_btn.config(state='disabled')
+            self.status_label.config(text="Cancelling after the pages being extracted...")
+
+    def show_profile(self):
+        """Show where the last conversion spent its time, per stage and per page"""
+        if not self.last_profile:
+            return
+        pdf_path, profile = self.last_profile
+        report = profile.report(pdf_path)
+
+        window = tk.Toplevel(self)
+        window.title(f"Conversion Profile - {os.path.basename(pdf_path)}")
+        window.geometry("640x520")
+
+        stages_frame = ttk.LabelFrame(window, text="Stages")
+        stages_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        columns = ("calls", "wall", "cpu", "peak")
+        stages = ttk.Treeview(stages_frame, columns=columns, height=8)
+        stages.heading("#0", text="Stage")
+        for column, title in zip(columns, ("Calls", "Wall (s)", "CPU (s)", "Peak RSS (MB)")):
+            stages.heading(column, text=title)
+            stages.column(column, width=90, anchor="e")
+        for name, totals in sorted(report['stages'].items(), key=lambda item: -item[1]['wall']):
+            stages.insert("", tk.END, text=name,
+                          values=(totals['calls'], f"{totals['wall']:.3f}", f"{totals['cpu']:.3f}",
+                                  totals['peak_rss_mb'] if totals['peak_rss_mb'] is not None else "-"))
+        stages.pack(fill=tk.BOTH, expand=True)
+
+        pages_frame = ttk.LabelFrame(window, text="Pages (slowest first)")
+        pages_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        columns = ("wall", "cpu", "slowest")
+        pages = ttk.Treeview(pages_frame, columns=columns, height=10)
+        pages.heading("#0", text="Page")
+        for column, title in zip(columns, ("Wall (s)", "CPU (s)", "Slowest Stage")):
+            pages.heading(column, text=title)
+            pages.column(column, width=120, anchor="e")
+        scrollbar = ttk.Scrollbar(pages_frame, orient=tk.VERTICAL, command=pages.yview)
+        pages.config(yscrollcommand=scrollbar.set)
+        for page, totals in sorted(report['pages'].items(), key=lambda item: -item[1]['wall']):
+            slowest = max(totals['stages'], key=totals['stages'].get)
+            pages.insert("", tk.END, text=page,
+                         values=(f"{totals['wall']:.3f}", f"{totals['cpu']:.3f}", slowest))
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        pages.pack(fill=tk.BOTH, expand=True)
+
+        # Jump to a page by double-clicking it
+        def go_to_selected(event):
+            selection = pages.selection()
+            if selection and hasattr(self, 'pdf_document'):
+                page = int(pages.item(selection[0], 'text'))
+                if 1 <= page <= self.total_pages:
+                    self.current_page = page
+                    self.update_preview()
+                    self.page_label.config(text=f"Page: {self.current_page}")
+        pages.bind("<Double-1>", go_to_selected)
+
+    def get_result_cache(self):
+        """Return the extraction result cache, or None if it cannot be created"""
+        if self.result_cache is None:
+            from result_cache import ResultCache
+
+            try:
+                self.result_cache = ResultCache()
+            except OSError:
+                return None
+        return self.result_cache
+
+    def get_checkpoint(self):
+        """Return the store of pages kept for resuming conversions, or None if it cannot be created"""
+        if self.checkpoint is None:
+            from result_cache import Checkpoint
+
+            try:
+                self.checkpoint = Checkpoint()
+            except OSError:
+                return None
+        return self.checkpoint
+
     def set_tool(self, tool_name):
         """Set current annotation tool"""
         self.current_tool = tool_name
         self.preview_canvas.config(cursor="crosshair" if tool_name else "arrow")
 
     def add_annotation(self, event):
-        """Handle annotation creation based on current tool"""
+        """Handle annotation creation (or erasing) based on current tool"""
         if not self.current_tool or not hasattr(self, 'pdf_document'):
             return
             
-        x, y = event.x, event.y
-        if self.current_tool == "highlight":
-            self.annotations.append({
+        canvas = self.preview_canvas
+        x, y = canvas.canvasx(event.x), canvas.canvasy(event.y)
+        scale = self.preview_view()[2]
+        annotation = None
+        if self.current_tool == "erase":
+            hit = self.annotations.at(self.current_page, *self.canvas_to_page(x, y),
+                                      tolerance=4 / scale)
+            if hit:
+                self.history.remove(hit['id'])
+                canvas.delete(f"annotation-{hit['id']}")
+        elif self.current_tool == "highlight":
+            rect = bounding_box([self.canvas_to_page(x, y), self.canvas_to_page(x + 100, y + 20)])
+            annotation = {
                 'type': 'highlight',
-                'coords': (x, y, x+100, y+20),
+                'coords': rect,
+                'bbox': rect,
                 'page': self.current_page
-            })
-        elif self.current_tool == "text":
-            text = simpledialog.askstring("Add Text", "Enter text:")
+            }
+        elif self.current_tool in ("text", "note"):
+            title = "Add Text" if self.current_tool == "text" else "Sticky Note"
+            text = simpledialog.askstring(title, "Enter text:")
             if text:
-                self.annotations.append({
-                    'type': 'text',
+                if self.current_tool == "text":
+                    size = pdf_edits.TEXT_SIZE * scale
+                    corners = [(x, y - size), (x + 0.6 * size * len(text), y + size / 4)]
+                else:
+                    corners = [(x, y), (x + 16, y + 16)]
+                annotation = {
+                    'type': self.current_tool,
                     'text': text,
-                    'coords': (x, y),
+                    'coords': self.canvas_to_page(x, y),
+                    'bbox': bounding_box([self.canvas_to_page(*c) for c in corners]),
                     'page': self.current_page
-                })
-        self.update_preview()
+                }
+        if annotation:
+            self.add_annotation_item(annotation)
+
+    def run_page_task(self, label, work, on_done):
+        """Run work(on_progress) on a worker thread, then on_done(result) on the Tk thread
+
+        Progress goes to the progress bar and status label; errors are shown
+        in a message box.
+        """
+        self.progress.config(value=0, maximum=1)
+        self.status_label.config(text=f"{label}...")
+
+        def show_progress(done, total):
+            def update():
+                self.progress.config(value=done, maximum=total)
+                self.status_label.config(text=f"{label}: {done}/{total}")
+            self.after(0, update)
+
+        def task():
+            try:
+                result = work(show_progress)
+            except Exception as e:
+                message = f"{label} failed: {e}"
+                self.after(0, lambda: (self.status_label.config(text="Ready"),
+                                       messagebox.showerror("Error", message)))
+                return
+            self.after(0, lambda: (self.status_label.config(text="Ready"), on_done(result)))
+
+        threading.Thread(target=task, daemon=True).start()
 
     def merge_pdfs(self):
-        """Merge multiple PDFs"""
+        """Merge multiple PDFs, in the order selected, on a worker thread"""
         files = filedialog.askopenfilenames(
             filetypes=[("PDF files", "*.pdf")]
         )
-        if files:
+        if not files:
+            return
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")]
+        )
+        if output_path:
+            self.run_page_task(
+                "Merging PDFs",
+                lambda on_progress: pdf_pages.merge_pdfs(files, output_path,
+                                                         on_progress=on_progress),
+                lambda path: messagebox.showinfo(
+                    "Success", f"Merged {len(files)} PDFs into {os.path.basename(path)}"))
+
+    def ask_split_options(self):
+        """Ask how to split; returns (mode, value) for pdf_pages.split_pdf, or None"""
+        dialog = tk.Toplevel(self)
+        dialog.title("Split PDF")
+        dialog.resizable(False, False)
+        mode_var = tk.StringVar(value="pages")
+        value_var = tk.StringVar(value="1")
+        for text, mode in (("Pages per file", "pages"), ("Bookmark level", "bookmarks"),
+                           ("Max file size (MB)", "size")):
+            ttk.Radiobutton(dialog, text=text, variable=mode_var,
+                            value=mode).pack(anchor=tk.W, padx=10)
+        ttk.Entry(dialog, textvariable=value_var, width=10).pack(pady=5)
+        result = []
+
+        def accept():
             try:
-                merger = PdfMerger()
-                for pdf in files:
-                    merger.append(pdf)
-                    
-                output_path = filedialog.asksaveasfilename(
-                    defaultextension=".pdf",
-                    filetypes=[("PDF files", "*.pdf")]
-                )
-                if output_path:
-                    merger.write(output_path)
-                    merger.close()
-                    messagebox.showinfo("Success", "PDFs merged successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to merge PDFs: {str(e)}")
+                value = float(value_var.get())
+                if value <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", "Enter a positive number", parent=dialog)
+                return
+            mode = mode_var.get()
+            result.append((mode, int(value * 1024 * 1024) if mode == "size" else int(value)))
+            dialog.destroy()
+
+        ttk.Button(dialog, text="Split", command=accept).pack(pady=5)
+        dialog.transient(self)
+        dialog.grab_set()
+        self.wait_window(dialog)
+        return result[0] if result else None
 
     def split_pdf(self):
-        """Split PDF into separate pages"""
+        """Split the PDF by page count, bookmarks or file size on a worker thread"""
         if not self.pdf_path:
             messagebox.showwarning("Warning", "Please open a PDF first!")
             return
-            
-        try:
-            output_dir = filedialog.askdirectory(title="Select output directory")
-            if output_dir:
-                pdf = PdfReader(self.pdf_path)
-                writer = PdfWriter()
-                
-                for i in range(len(pdf.pages)):
-                    writer.add_page(pdf.pages[i])
-                    output_path = os.path.join(output_dir, f'page_{i+1}.pdf')
-                    with open(output_path, 'wb') as output_file:
-                        writer.write(output_file)
-                
-                messagebox.showinfo("Success", f"PDF split into {len(pdf.pages)} pages!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to split PDF: {str(e)}")
+        options = self.ask_split_options()
+        if not options:
+            return
+        output_dir = filedialog.askdirectory(title="Select output directory")
+        if output_dir:
+            mode, value = options
+            pdf_path, password = self.pdf_path, self.password
+            self.run_page_task(
+                "Splitting PDF",
+                lambda on_progress: pdf_pages.split_pdf(pdf_path, output_dir, mode, value,
+                                                        password=password,
+                                                        on_progress=on_progress),
+                lambda paths: messagebox.showinfo("Success",
+                                                  f"PDF split into {len(paths)} files!"))
 
     def perform_ocr(self):
         """Perform OCR on current page"""
@@ -652,8 +1183,10 @@ class PDFToExcelConverter(tk.Tk):
             return
             
         try:
-            image = convert_from_path(self.pdf_path, first_page=self.current_page,
-                                    last_page=self.current_page)[0]
+            import pytesseract
+            from reportlab.pdfgen import canvas
+
+            image = self.page_rasters.get(self.current_page, ANALYSIS_DPI)
             text = pytesseract.image_to_string(image)
             
             # Create searchable PDF
@@ -670,7 +1203,23 @@ class PDFToExcelConverter(tk.Tk):
         self.preview_canvas.bind("<Button-1>", self.add_annotation)
         self.preview_canvas.bind("<B1-Motion>", self.draw_annotation)
         self.preview_canvas.bind("<ButtonRelease-1>", self.finish_annotation)
+        # Panning and scrolling of zoomed-in pages
+        self.preview_canvas.bind("<Button-1>", self.start_pan, add="+")
+        self.preview_canvas.bind("<B1-Motion>", self.pan_preview, add="+")
+        self.preview_canvas.bind("<Button-2>", self.start_pan)
+        self.preview_canvas.bind("<B2-Motion>", self.pan_preview)
+        self.preview_canvas.bind("<MouseWheel>", self.scroll_preview_wheel)
+        self.preview_canvas.bind("<Button-4>", self.scroll_preview_wheel)
+        self.preview_canvas.bind("<Button-5>", self.scroll_preview_wheel)
+        self.preview_canvas.bind("<Configure>", self.render_visible_tiles)
+        self.bind("<Control-z>", self.undo)
+        self.bind("<Control-y>", self.redo)
 
 if __name__ == "__main__":
+    # Needed for the extraction process pool inside the frozen exe
+    multiprocessing.freeze_support()
+    if "--install-deps" in sys.argv[1:]:
+        install_missing_packages()
+        sys.exit(0)
     app = PDFToExcelConverter()
     app.mainloop()
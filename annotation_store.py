@@ -0,0 +1,198 @@
+# Annotation model for the GUI. Annotations are plain dicts (fields listed in
+# pdf_edits) kept per page, with a coarse grid over their bounding boxes so
+# drawing a page's overlays, hit-testing a click and saving only touch the
+# annotations involved. Every change is a command in an UndoLog; undo and
+# redo replay the inverse command instead of restoring copies of the list.
+
+GRID = 64.0                # points per side of a spatial index cell
+SIMPLIFY_TOLERANCE = 0.75  # points; stroke points closer than this to the line are dropped
+UNDO_LIMIT = 500
+
+
+def bounding_box(points, margin=0.0):
+    """(x0, y0, x1, y1) around a list of (x, y) points, grown by margin"""
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return (min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin)
+
+
+def _distance_to_segment(point, start, end):
+    (px, py), (ax, ay), (bx, by) = point, start, end
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+    return ((px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2) ** 0.5
+
+
+def simplify_stroke(points, tolerance=SIMPLIFY_TOLERANCE):
+    """Ramer-Douglas-Peucker: the fewest points that keep the stroke within tolerance"""
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    pending = [(0, len(points) - 1)]
+    while pending:
+        first, last = pending.pop()
+        worst, index = 0.0, None
+        for i in range(first + 1, last):
+            distance = _distance_to_segment(points[i], points[first], points[last])
+            if distance > worst:
+                worst, index = distance, i
+        if index is not None and worst > tolerance:
+            keep[index] = True
+            pending += [(first, index), (index, last)]
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _overlaps(box, rect):
+    return box[0] <= rect[2] and rect[0] <= box[2] and box[1] <= rect[3] and rect[1] <= box[3]
+
+
+class AnnotationStore:
+    """Annotations by page, each indexed in a grid by its 'bbox' (PDF points)
+
+    add() gives each annotation an 'id'. Iterating yields all annotations in
+    page order, then in the order they were added.
+    """
+
+    def __init__(self, grid=GRID):
+        self.grid = grid
+        self._pages = {}   # page -> {id: annotation}
+        self._cells = {}   # page -> {(column, row): {id, ...}}
+        self._page_of = {}
+        self._next_id = 1
+
+    def _cell_keys(self, box):
+        columns = range(int(box[0] // self.grid), int(box[2] // self.grid) + 1)
+        rows = range(int(box[1] // self.grid), int(box[3] // self.grid) + 1)
+        return [(column, row) for column in columns for row in rows]
+
+    def _index(self, annotation):
+        cells = self._cells.setdefault(annotation['page'], {})
+        for key in self._cell_keys(annotation['bbox']):
+            cells.setdefault(key, set()).add(annotation['id'])
+
+    def _unindex(self, annotation):
+        cells = self._cells.get(annotation['page'], {})
+        for key in self._cell_keys(annotation['bbox']):
+            ids = cells.get(key)
+            if ids:
+                ids.discard(annotation['id'])
+                if not ids:
+                    del cells[key]
+
+    def add(self, annotation):
+        """Store an annotation (which must have 'page' and 'bbox'); returns its id"""
+        if 'id' not in annotation:
+            annotation['id'] = self._next_id
+            self._next_id += 1
+        self._pages.setdefault(annotation['page'], {})[annotation['id']] = annotation
+        self._page_of[annotation['id']] = annotation['page']
+        self._index(annotation)
+        return annotation['id']
+
+    def remove(self, annotation_id):
+        """Take an annotation out of the store and return it"""
+        page = self._page_of.pop(annotation_id)
+        annotation = self._pages[page].pop(annotation_id)
+        if not self._pages[page]:
+            del self._pages[page]
+        self._unindex(annotation)
+        return annotation
+
+    def on_page(self, page):
+        return list(self._pages.get(page, {}).values())
+
+    def pages(self):
+        return sorted(self._pages)
+
+    def in_rect(self, page, rect):
+        """Annotations on page whose bounding box overlaps rect, oldest first"""
+        cells = self._cells.get(page, {})
+        ids = set()
+        for key in self._cell_keys(rect):
+            ids |= cells.get(key, set())
+        annotations = self._pages.get(page, {})
+        return [annotations[i] for i in sorted(ids) if _overlaps(annotations[i]['bbox'], rect)]
+
+    def at(self, page, x, y, tolerance=2.0):
+        """The most recently added annotation under a point, or None"""
+        hits = self.in_rect(page, (x - tolerance, y - tolerance, x + tolerance, y + tolerance))
+        return hits[-1] if hits else None
+
+    def delete_page(self, page):
+        """Drop a deleted page's annotations and move later pages' annotations up one page"""
+        removed = [self.remove(i) for i in list(self._pages.get(page, {}))]
+        for later in [p for p in sorted(self._pages) if p > page]:
+            for annotation in [self.remove(i) for i in list(self._pages[later])]:
+                annotation['page'] = later - 1
+                self.add(annotation)
+        return removed
+
+    def clear(self):
+        self._pages.clear()
+        self._cells.clear()
+        self._page_of.clear()
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from self.on_page(page)
+
+    def __len__(self):
+        return len(self._page_of)
+
+
+class UndoLog:
+    """Add and remove annotations through ('add' | 'remove', annotation) commands
+
+    Commands keep a reference to the annotation, never a copy of the store;
+    undo() applies the inverse of the last command and redo() re-applies it.
+    Both return the annotation affected (None when there is nothing to do).
+    """
+
+    def __init__(self, store, limit=UNDO_LIMIT):
+        self.store = store
+        self.limit = limit
+        self._done = []
+        self._undone = []
+
+    def _apply(self, action, annotation):
+        if action == 'add':
+            self.store.add(annotation)
+        else:
+            self.store.remove(annotation['id'])
+
+    def _record(self, action, annotation):
+        self._done.append((action, annotation))
+        del self._done[:-self.limit]
+        self._undone.clear()
+
+    def add(self, annotation):
+        self.store.add(annotation)
+        self._record('add', annotation)
+        return annotation
+
+    def remove(self, annotation_id):
+        annotation = self.store.remove(annotation_id)
+        self._record('remove', annotation)
+        return annotation
+
+    def undo(self):
+        if not self._done:
+            return None
+        action, annotation = self._done.pop()
+        self._apply('remove' if action == 'add' else 'add', annotation)
+        self._undone.append((action, annotation))
+        return annotation
+
+    def redo(self):
+        if not self._undone:
+            return None
+        action, annotation = self._undone.pop()
+        self._apply(action, annotation)
+        self._done.append((action, annotation))
+        return annotation
+
+    def clear(self):
+        self._done.clear()
+        self._undone.clear()
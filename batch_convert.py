@@ -0,0 +1,140 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+
+from extraction_engine import ENGINES, FORMATS, ConversionCancelled, collect_pdfs
+from parallel_extract import DEFAULT_PAGES_PER_SHARD, convert_batch, default_workers
+from ocr_engine import DEFAULT_DPI
+from conversion_profile import ConversionProfile
+from result_cache import (DEFAULT_CACHE_DIR, DEFAULT_CHECKPOINT_DIR, DEFAULT_MAX_BYTES,
+                          Checkpoint, ResultCache)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Extract tables from PDFs without the GUI")
+    parser.add_argument('inputs', nargs='+',
+                        help="PDF files and/or directories containing PDFs")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="Search directories recursively")
+    parser.add_argument('-e', '--engine', default='auto', choices=ENGINES,
+                        type=str.lower, help="Extraction engine (default: auto)")
+    parser.add_argument('--no-lattice', dest='lattice', action='store_false',
+                        help="Do not detect bordered tables")
+    parser.add_argument('--no-stream', dest='stream', action='store_false',
+                        help="Do not detect borderless tables")
+    parser.add_argument('--detect-areas', action='store_true',
+                        help="Locate ruled tables first and parse only those regions")
+    parser.add_argument('-p', '--pages', default='all',
+                        help='Pages to process, e.g. "all", "3" or "1-4,7,10-end"')
+    parser.add_argument('-f', '--format', dest='fmt', default='xlsx', choices=FORMATS,
+                        help="Output format (default: xlsx)")
+    parser.add_argument('-o', '--output-dir',
+                        help="Write outputs here instead of next to each PDF")
+    parser.add_argument('--password', help="Password for encrypted PDFs")
+    parser.add_argument('--no-stitch', dest='stitch', action='store_false',
+                        help="Keep each page's tables separate instead of merging continued tables")
+    parser.add_argument('--raw', dest='normalize', action='store_false',
+                        help="Keep cells as extracted text instead of converting numbers and dates")
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(),
+                        help="Worker processes for pages and documents (default: CPU count)")
+    parser.add_argument('--pages-per-shard', type=int, default=DEFAULT_PAGES_PER_SHARD,
+                        help=f"Pages handed to a worker at a time (default: {DEFAULT_PAGES_PER_SHARD})")
+    parser.add_argument('--ocr-dpi', type=int, default=DEFAULT_DPI,
+                        help=f"Resolution scanned pages are rasterised at (default: {DEFAULT_DPI})")
+    parser.add_argument('--ocr-workers', type=int,
+                        help="Concurrent tesseract processes per worker (default: CPUs / workers)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"Extraction result cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Cache size limit in MB; least recently used pages are evicted")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help="Always re-extract, ignoring and not updating the cache")
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR,
+                        help="Where extracted pages are kept until each document is written, "
+                             f"so an interrupted run resumes (default: {DEFAULT_CHECKPOINT_DIR})")
+    parser.add_argument('--no-checkpoint', dest='use_checkpoint', action='store_false',
+                        help="Do not checkpoint pages; an interrupted run starts over")
+    parser.add_argument('--profile', action='store_true',
+                        help="Time every stage and page; writes <output>_profile.json reports")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="Only report finished documents, not every page shard")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    try:
+        pdf_paths = collect_pdfs(args.inputs, recursive=args.recursive)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not pdf_paths:
+        print("No PDF files found.", file=sys.stderr)
+        return 2
+
+    cache = None
+    if args.use_cache:
+        cache = ResultCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+    checkpoint = Checkpoint(args.checkpoint_dir) if args.use_checkpoint else None
+
+    # The first Ctrl+C (or SIGTERM) lets the running shards finish and be
+    # checkpointed; a second one stops at once
+    cancel = threading.Event()
+
+    def request_cancel(signum, frame):
+        if cancel.is_set():
+            raise KeyboardInterrupt
+        print("Cancelling after the page shards being extracted "
+              "(Ctrl+C again to stop now)...", file=sys.stderr, flush=True)
+        cancel.set()
+
+    signal.signal(signal.SIGINT, request_cancel)
+    signal.signal(signal.SIGTERM, request_cancel)
+
+    total = len(pdf_paths)
+    done = [0]
+
+    def report(pdf_path, output_path, error):
+        done[0] += 1
+        if isinstance(error, ConversionCancelled):
+            status = "cancelled"
+        elif error is not None:
+            status = f"FAILED: {error}"
+        elif output_path:
+            status = f"-> {output_path}"
+        else:
+            status = "no tables found"
+        print(f"[{done[0]}/{total}] {pdf_path} {status}", flush=True)
+
+    def progress(shards_done, shards_total, shard):
+        if not args.quiet:
+            pdf_path, page_numbers = shard
+            print(f"  shard {shards_done}/{shards_total}: {os.path.basename(pdf_path)} "
+                  f"pages {page_numbers[0]}-{page_numbers[-1]}", flush=True)
+
+    summary = convert_batch(pdf_paths, on_result=report, on_progress=progress,
+                            workers=args.workers, pages_per_shard=args.pages_per_shard,
+                            engine=args.engine, pages=args.pages, lattice=args.lattice,
+                            stream=args.stream, fmt=args.fmt, output_dir=args.output_dir,
+                            password=args.password, cache=cache, ocr_dpi=args.ocr_dpi,
+                            ocr_workers=args.ocr_workers, normalize=args.normalize, stitch=args.stitch,
+                            detect_areas=args.detect_areas, checkpoint=checkpoint,
+                            cancel=cancel,
+                            profile=ConversionProfile() if args.profile else None)
+
+    print(f"Converted: {len(summary['converted'])}, "
+          f"no tables: {len(summary['empty'])}, failed: {len(summary['failed'])}, "
+          f"cancelled: {len(summary['cancelled'])}")
+    if summary['cancelled'] and checkpoint:
+        print("Run the same command again to resume from the checkpointed pages.")
+    if summary['failed']:
+        return 1
+    return 130 if summary['cancelled'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
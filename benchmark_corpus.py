@@ -0,0 +1,114 @@
+# Deterministic synthetic PDF corpus for the extraction benchmarks. Every
+# document is generated with reportlab (rotated and scanned variants are
+# derived from it with PyMuPDF), so cell contents are known exactly.
+
+import os
+
+import fitz  # PyMuPDF
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+CORPUS_KINDS = ["bordered", "borderless", "multipage", "rotated", "scanned"]
+DEFAULT_PAGE_COUNTS = [5, 20]
+ROWS_PER_PAGE = 20
+SCAN_DPI = 200
+
+GRID_STYLE = TableStyle([('GRID', (0, 0), (-1, -1), 0.5, colors.black)])
+
+
+def fixture_rows(page, rows=ROWS_PER_PAGE):
+    """Deterministic table contents for one fixture page"""
+    data = [["Date", "Reference", "Description", "Amount"]]
+    for i in range(rows):
+        data.append([f"2024-{page % 12 + 1:02d}-{i + 1:02d}", f"REF{page:03d}{i:03d}",
+                     f"Item {page}-{i}", f"{(page * 37 + i * 113) * 1.25:,.2f}"])
+    return data
+
+
+def make_fixture(path, pages, bordered):
+    """Write a PDF with one table per page; returns {page: rows} ground truth"""
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    story = []
+    truth = {}
+    for page in range(1, pages + 1):
+        rows = fixture_rows(page)
+        truth[page] = rows
+        table = Table(rows)
+        if bordered:
+            table.setStyle(GRID_STYLE)
+        story += [table, PageBreak()]
+    doc.build(story[:-1])
+    return truth
+
+
+def make_multipage_fixture(path, pages):
+    """Write one bordered table that runs over about `pages` pages, header repeated on each
+
+    Returns the ground truth as a single list of rows (header first).
+    """
+    rows = [fixture_rows(1, 0)[0]]
+    for page in range(1, pages + 1):
+        rows += fixture_rows(page, 2 * ROWS_PER_PAGE)[1:]
+    table = Table(rows, repeatRows=1)
+    table.setStyle(GRID_STYLE)
+    SimpleDocTemplate(path, pagesize=letter).build([table])
+    return rows
+
+
+def make_rotated_fixture(path, pages):
+    """Bordered fixture whose pages carry a 90 degree /Rotate, as scanners and printers produce"""
+    source = path + ".src.pdf"
+    truth = make_fixture(source, pages, bordered=True)
+    with fitz.open(source) as doc:
+        for page in doc:
+            page.set_rotation(90)
+        doc.save(path)
+    os.remove(source)
+    return truth
+
+
+def make_scanned_fixture(path, pages, dpi=SCAN_DPI):
+    """Bordered fixture rasterised to one greyscale image per page, with no text layer"""
+    source = path + ".src.pdf"
+    truth = make_fixture(source, pages, bordered=True)
+    with fitz.open(source) as doc, fitz.open() as scanned:
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            scanned.new_page(width=page.rect.width, height=page.rect.height).insert_image(
+                page.rect, pixmap=pix)
+        scanned.save(path, deflate=True)
+    os.remove(source)
+    return truth
+
+
+def make_corpus(directory, page_counts=None, kinds=None):
+    """Generate the corpus into directory; returns a list of document dicts
+
+    Each dict has name, kind, path, pages, the lattice/stream mode a user would
+    pick for it, and truth: {page: rows} for one-table-per-page documents or a
+    single list of rows for the multipage table.
+    """
+    documents = []
+    for kind in kinds or CORPUS_KINDS:
+        for pages in page_counts or DEFAULT_PAGE_COUNTS:
+            name = f"{kind}_{pages}p"
+            path = os.path.join(directory, f"{name}.pdf")
+            if kind == "bordered":
+                truth = make_fixture(path, pages, bordered=True)
+            elif kind == "borderless":
+                truth = make_fixture(path, pages, bordered=False)
+            elif kind == "multipage":
+                truth = make_multipage_fixture(path, pages)
+            elif kind == "rotated":
+                truth = make_rotated_fixture(path, pages)
+            elif kind == "scanned":
+                truth = make_scanned_fixture(path, pages)
+            else:
+                raise ValueError(f"Unknown corpus kind: {kind}")
+            with fitz.open(path) as doc:
+                page_total = len(doc)
+            documents.append({'name': name, 'kind': kind, 'path': path, 'pages': page_total,
+                              'lattice': kind != "borderless", 'stream': kind == "borderless",
+                              'truth': truth})
+    return documents
@@ -0,0 +1,267 @@
+# Throughput, latency, memory and cell-accuracy benchmark of the extraction
+# engines on the synthetic corpus from benchmark_corpus.py. Results can be
+# saved as JSON and compared against an earlier run to catch regressions
+# from new tabula/camelot/PyMuPDF versions or settings.
+#
+#   python benchmark_engines.py                               # every engine and corpus
+#   python benchmark_engines.py -e pymupdf tabula -k bordered multipage -n 5 20
+#   python benchmark_engines.py --save baseline.json
+#   python benchmark_engines.py --compare baseline.json       # exit code 1 on regression
+#
+# Independently of any baseline, a run fails when an engine reads a corpus
+# kind less accurately than EXPECTED_ACCURACY allows.
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+
+from benchmark_corpus import CORPUS_KINDS, DEFAULT_PAGE_COUNTS, make_corpus
+from conversion_profile import MB, memory_usage
+from extraction_engine import ENGINES, extract_page_tables
+from table_stitcher import TableStitcher
+
+BENCH_ENGINES = ENGINES
+TRACKED_PACKAGES = ["tabula-py", "camelot-py", "PyMuPDF", "pandas", "JPype1", "pytesseract"]
+DEFAULT_TOLERANCE = 0.15    # relative slow-down or memory growth reported as a regression
+ACCURACY_TOLERANCE = 0.01   # absolute drop in cell accuracy reported as a regression
+
+# Minimum cell accuracy per (engine, corpus kind). tabula reads pages with a
+# /Rotate transposed and has no rotated entry; Auto sends those pages to
+# PyMuPDF. Scanned pages depend on the local tesseract and are not listed.
+DIGITAL_KINDS = ["bordered", "borderless", "multipage", "rotated"]
+EXPECTED_ACCURACY = {(engine, kind): 0.99 for engine in ("pymupdf", "camelot", "auto")
+                     for kind in DIGITAL_KINDS}
+EXPECTED_ACCURACY.update({("tabula", kind): 0.99 for kind in DIGITAL_KINDS if kind != "rotated"})
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    return re.sub(r'\s+', ' ', str(value)).strip()
+
+
+def frame_to_grid(frame):
+    """Rows of cleaned cell strings, including the header row when it holds data"""
+    grid = [[_clean(v) for v in row] for row in frame.itertuples(index=False)]
+    if not isinstance(frame.columns, pd.RangeIndex):
+        header = [_clean(c) for c in frame.columns]
+        header = ['' if h.startswith('Unnamed:') else h for h in header]
+        grid.insert(0, header)
+    return grid
+
+
+def cell_accuracy(truth_rows, frames):
+    """Share of ground-truth cells found at the same column in a matching row"""
+    total = sum(len(row) for row in truth_rows)
+    best = 0
+    for frame in frames:
+        grid = frame_to_grid(frame)
+        width = max((len(row) for row in grid), default=0)
+        for col_offset in range(max(1, width - len(truth_rows[0]) + 1)):
+            # Exact row matches first; only the rest need the pairwise search
+            shifted = {tuple(row[col_offset:col_offset + len(truth_rows[0])]) for row in grid}
+            matched = 0
+            for truth_row in truth_rows:
+                if tuple(truth_row) in shifted:
+                    matched += len(truth_row)
+                    continue
+                matched += max((sum(1 for c, value in enumerate(truth_row)
+                                    if c + col_offset < len(row)
+                                    and row[c + col_offset] == value)
+                                for row in grid), default=0)
+            best = max(best, matched)
+    return best / total if total else 0.0
+
+
+def _stitched(page_results):
+    """Merge per-page tables with TableStitcher, as conversions do"""
+    stitcher = TableStitcher()
+    tables = []
+    for page, page_tables in page_results:
+        for table, continues in stitcher.feed(page, page_tables):
+            if continues and tables:
+                tables[-1] = pd.concat([tables[-1], table], ignore_index=True)
+            else:
+                tables.append(table)
+    return tables
+
+
+def run_case(engine, document):
+    """Benchmark one engine on one document; runs in a fresh process so memory is its own"""
+    pdf_path = document['path']
+    options = {'engine': engine, 'lattice': document['lattice'], 'stream': document['stream']}
+    baseline_rss = memory_usage()[0]
+    start = time.perf_counter()
+    # One warm-up page so JVM start-up is reported apart from per-page cost
+    extract_page_tables(pdf_path, [1], **options)
+    startup = time.perf_counter() - start
+
+    latencies = []
+    page_results = []
+    for page in range(1, document['pages'] + 1):
+        start = time.perf_counter()
+        page_results += extract_page_tables(pdf_path, [page], **options)
+        latencies.append(time.perf_counter() - start)
+
+    truth = document['truth']
+    if isinstance(truth, dict):
+        accuracy = float(np.mean([cell_accuracy(truth[page], tables)
+                                  for page, tables in page_results]))
+    else:
+        accuracy = cell_accuracy(truth, _stitched(page_results))
+    rss, peak = memory_usage()
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'pages_per_sec': len(latencies) / sum(latencies),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p90_ms': float(np.percentile(latencies_ms, 90)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'startup_s': startup,
+        'peak_rss_mb': round(peak / MB, 1) if peak else None,
+        'baseline_rss_mb': round(baseline_rss / MB, 1) if baseline_rss else None,
+        'accuracy': accuracy,
+    }
+
+
+def _run_case_safely(engine, document):
+    # Not every library exception can be pickled back to the parent
+    try:
+        return run_case(engine, document)
+    except Exception as e:
+        return {'error': str(e).splitlines()[0] if str(e) else type(e).__name__}
+
+
+def run_isolated(engine, document):
+    """run_case in a spawned child process (no JVM or caches carried over between cases)"""
+    with ProcessPoolExecutor(max_workers=1,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_run_case_safely, engine, document).result()
+
+
+def environment():
+    """Versions and machine details stored with every result file"""
+    versions = {}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'packages': versions}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return human-readable regressions of results against a baseline result list"""
+    previous = {(r['engine'], r['corpus']): r for r in baseline if not r.get('error')}
+    regressions = []
+    for result in results:
+        before = previous.get((result['engine'], result['corpus']))
+        if before is None:
+            continue
+        label = f"{result['engine']}/{result['corpus']}"
+        if result.get('error'):
+            regressions.append(f"{label}: now fails ({result['error']})")
+            continue
+        if result['pages_per_sec'] < before['pages_per_sec'] * (1 - tolerance):
+            regressions.append(f"{label}: {before['pages_per_sec']:.1f} -> "
+                               f"{result['pages_per_sec']:.1f} pages/s")
+        if result['p90_ms'] > before['p90_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p90 {before['p90_ms']:.0f} -> {result['p90_ms']:.0f} ms")
+        if result['accuracy'] < before['accuracy'] - ACCURACY_TOLERANCE:
+            regressions.append(f"{label}: accuracy {before['accuracy']:.1%} -> "
+                               f"{result['accuracy']:.1%}")
+        if (result['peak_rss_mb'] and before['peak_rss_mb']
+                and result['peak_rss_mb'] > before['peak_rss_mb'] * (1 + tolerance)):
+            regressions.append(f"{label}: peak RSS {before['peak_rss_mb']:.0f} -> "
+                               f"{result['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def check_expectations(results, expected=None):
+    """Return the results whose cell accuracy is below EXPECTED_ACCURACY, as messages
+
+    Engines that could not run here (an error result) are not counted.
+    """
+    expected = EXPECTED_ACCURACY if expected is None else expected
+    failures = []
+    for result in results:
+        minimum = expected.get((result['engine'], result['kind']))
+        if minimum is None or result.get('error'):
+            continue
+        if result['accuracy'] < minimum:
+            failures.append(f"{result['engine']}/{result['corpus']}: accuracy "
+                            f"{result['accuracy']:.1%} < expected {minimum:.0%}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extraction engines")
+    parser.add_argument('-e', '--engines', nargs='+', default=BENCH_ENGINES,
+                        choices=BENCH_ENGINES)
+    parser.add_argument('-k', '--kinds', nargs='+', default=CORPUS_KINDS, choices=CORPUS_KINDS,
+                        help="Corpus documents to generate (default: all)")
+    parser.add_argument('-n', '--page-counts', nargs='+', type=int, default=DEFAULT_PAGE_COUNTS,
+                        help=f"Pages per corpus document (default: {DEFAULT_PAGE_COUNTS})")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Report regressions against a saved JSON file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slow-down counted as a regression (default: 0.15)")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = make_corpus(tmp, args.page_counts, args.kinds)
+        print(f"{'engine':<9}{'corpus':<16}{'pages/s':>9}{'p50 ms':>9}{'p90 ms':>9}"
+              f"{'p99 ms':>9}{'peak MB':>9}{'cell acc':>10}")
+        for engine in args.engines:
+            for document in corpus:
+                result = {'engine': engine, 'corpus': document['name'],
+                          'kind': document['kind'], 'pages': document['pages']}
+                try:
+                    result.update(run_isolated(engine, document))
+                except Exception as e:
+                    result['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+                results.append(result)
+                if result.get('error'):
+                    print(f"{engine:<9}{document['name']:<16}  unavailable: {result['error']}")
+                    continue
+                print(f"{engine:<9}{document['name']:<16}{result['pages_per_sec']:>9.1f}"
+                      f"{result['p50_ms']:>9.0f}{result['p90_ms']:>9.0f}{result['p99_ms']:>9.0f}"
+                      f"{result['peak_rss_mb'] or 0:>9.0f}{result['accuracy']:>10.1%}",
+                      flush=True)
+
+    failures = check_expectations(results)
+    for failure in failures:
+        print(f"BELOW EXPECTED {failure}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"Saved results to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
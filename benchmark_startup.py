@@ -0,0 +1,136 @@
+# Launch-time benchmark of the GUI: time from starting a fresh interpreter
+# until the main window is on screen, and which modules were imported on the
+# way. Heavy engines must stay out of the launch path; this exits with code 1
+# if one of them is imported at launch or the time-to-first-window budget is
+# exceeded, so it can run in CI next to benchmark_engines.py.
+#
+#   python benchmark_startup.py                  # 5 launches, 2 s budget
+#   python benchmark_startup.py -r 10 --budget 1.5 --top 15
+#   python benchmark_startup.py --no-window      # import only (no display needed)
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_RUNS = 5
+DEFAULT_BUDGET = 2.0   # seconds from interpreter start to the first window
+# Imported on first use, never at launch
+HEAVY_MODULES = ["pandas", "camelot", "tabula", "cv2", "pytesseract", "jpype", "pyarrow",
+                 "openpyxl", "reportlab", "PyPDF2", "pdf2image", "parallel_extract",
+                 "extraction_engine", "result_cache", "ocr_engine"]
+
+# Runs in the fresh interpreter. The licence check is skipped: its dialog waits for input.
+CHILD = """
+import json, sys, time
+result = {}
+try:
+    start = time.time()
+    import PdfToExcel
+    result['import_done'] = time.time()
+    result['import_s'] = result['import_done'] - start
+    if not NO_WINDOW:
+        PdfToExcel.PDFToExcelConverter.check_license = lambda self: None
+        app = PdfToExcel.PDFToExcelConverter()
+        while not app.winfo_ismapped():
+            app.update()
+        app.update()
+        result['window_shown'] = time.time()
+        app.destroy()
+except Exception as e:
+    result['error'] = f"{type(e).__name__}: {e}"
+result['modules'] = sorted(name for name in sys.modules if '.' not in name)
+print(json.dumps(result))
+"""
+
+
+def launch(no_window=False, importtime=False):
+    """Start one fresh interpreter; returns the child's result plus seconds to first window"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD.replace("NO_WINDOW", repr(no_window))]
+    start = time.time()
+    process = subprocess.run(command, capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    lines = process.stdout.strip().splitlines()
+    if process.returncode or not lines:
+        return {'error': (process.stderr.strip().splitlines() or ["no output"])[-1]}
+    result = json.loads(lines[-1])
+    finished = result.get('window_shown', result.get('import_done'))
+    if finished is not None:
+        result['first_window_s' if 'window_shown' in result else 'first_import_s'] = \
+            finished - start
+    if importtime:
+        result['importtime'] = process.stderr
+    return result
+
+
+def slowest_imports(importtime_output, top=10):
+    """Modules imported by the GUI module with the largest cumulative time, from -X importtime"""
+    totals = []
+    for line in importtime_output.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        # Nesting is shown by two spaces per level; level 1 is what PdfToExcel imports itself
+        if match and len(match.group(3)) == 2:
+            totals.append((int(match.group(2)) / 1e6, match.group(4)))
+    return sorted(totals, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GUI start-up time")
+    parser.add_argument('-r', '--runs', type=int, default=DEFAULT_RUNS,
+                        help=f"Fresh launches to time (default: {DEFAULT_RUNS})")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help=f"Median seconds to first window allowed (default: {DEFAULT_BUDGET})")
+    parser.add_argument('--no-window', action='store_true',
+                        help="Only time importing the GUI module (no display needed)")
+    parser.add_argument('--top', type=int, default=10,
+                        help="Show the N slowest imports of the launch path (default: 10)")
+    args = parser.parse_args(argv)
+
+    no_window = args.no_window or (sys.platform.startswith('linux')
+                                   and not os.environ.get('DISPLAY'))
+    if no_window and not args.no_window:
+        print("No display: timing the import only")
+    key = 'first_import_s' if no_window else 'first_window_s'
+
+    # The first launch warms the OS file cache and is not counted
+    launches = [launch(no_window) for _ in range(args.runs + 1)][1:]
+    failed = [r['error'] for r in launches if r.get('error')]
+    if failed:
+        print(f"Launch failed: {failed[0]}")
+        return 1
+    times = [r[key] for r in launches]
+    median = statistics.median(times)
+    import_median = statistics.median(r['import_s'] for r in launches)
+    label = "time to first window" if key == 'first_window_s' else "time to import"
+    print(f"{label}: median {median:.2f} s, min {min(times):.2f} s, max {max(times):.2f} s "
+          f"over {len(times)} launches (GUI module import {import_median:.2f} s)")
+
+    if args.top:
+        profiled = launch(no_window, importtime=True)
+        if not profiled.get('error'):
+            print("Slowest imports at launch:")
+            for seconds, module in slowest_imports(profiled['importtime'], args.top):
+                print(f"  {seconds:6.3f} s  {module}")
+
+    status = 0
+    heavy = [m for m in HEAVY_MODULES if m in launches[0]['modules']]
+    if heavy:
+        print(f"FAIL imported at launch: {', '.join(heavy)}")
+        status = 1
+    if median > args.budget:
+        print(f"FAIL {median:.2f} s is over the {args.budget:.2f} s budget")
+        status = 1
+    if not status:
+        print(f"OK within the {args.budget:.2f} s budget")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
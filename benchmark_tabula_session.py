@@ -0,0 +1,100 @@
+# Measures per-file tabula overhead: a fresh `java -jar` per call (the old
+# read_pdf path) versus the resident JPype session in tabula_session.py.
+#
+#   python benchmark_tabula_session.py                 # 20 generated one-page PDFs
+#   python benchmark_tabula_session.py a.pdf b.pdf ...  # your own files
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from tabula.io import read_pdf
+
+import tabula_session
+from extraction_engine import count_pages
+
+
+def make_fixture(path, rows=10, cols=4):
+    """Write a one-page PDF with a small ruled table"""
+    pdf = canvas.Canvas(path, pagesize=letter)
+    left, top, cell_w, cell_h = 72, 700, 100, 20
+    for r in range(rows + 1):
+        y = top - r * cell_h
+        pdf.line(left, y, left + cols * cell_w, y)
+    for c in range(cols + 1):
+        x = left + c * cell_w
+        pdf.line(x, top, x, top - rows * cell_h)
+    for r in range(rows):
+        for c in range(cols):
+            text = f"Col {c + 1}" if r == 0 else f"{r * 10 + c:,}.00"
+            pdf.drawString(left + c * cell_w + 4, top - (r + 1) * cell_h + 6, text)
+    pdf.save()
+
+
+def time_files(pdf_paths, extract):
+    """Run extract(pdf_path, pages) on every file and return per-file wall times in seconds"""
+    timings = []
+    for pdf_path in pdf_paths:
+        pages = list(range(1, count_pages(pdf_path) + 1))
+        start = time.perf_counter()
+        extract(pdf_path, pages)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def subprocess_extract(pdf_path, pages):
+    for page in pages:
+        read_pdf(pdf_path, pages=page, lattice=True, force_subprocess=True)
+
+
+def session_extract(pdf_path, pages):
+    tabula_session.get_session().extract(pdf_path, pages, lattice=True, stream=False)
+
+
+def report(label, timings):
+    ms = [t * 1000 for t in timings]
+    print(f"{label:<22} files={len(ms):<4} mean={statistics.mean(ms):8.1f} ms  "
+          f"median={statistics.median(ms):8.1f} ms  total={sum(ms) / 1000:7.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tabula JVM reuse")
+    parser.add_argument('pdfs', nargs='*', help="PDFs to use instead of generated fixtures")
+    parser.add_argument('-n', '--count', type=int, default=20,
+                        help="Number of generated fixtures (default: 20)")
+    args = parser.parse_args(argv)
+
+    if not tabula_session.jpype_available():
+        print("JPype is not installed (pip install jpype1) or finds no JVM library "
+              "(set JAVA_HOME); nothing to compare.", file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_paths = args.pdfs
+        if not pdf_paths:
+            pdf_paths = [os.path.join(tmp, f"fixture_{i}.pdf") for i in range(args.count)]
+            for path in pdf_paths:
+                make_fixture(path)
+
+        before = time_files(pdf_paths, subprocess_extract)
+
+        start = time.perf_counter()
+        tabula_session.get_session()
+        warm_up = time.perf_counter() - start
+        after = time_files(pdf_paths, session_extract)
+
+    report("subprocess per call", before)
+    print(f"{'session warm-up':<22} once={warm_up * 1000:8.1f} ms")
+    report("resident session", after)
+    speedup = statistics.mean(before) / statistics.mean(after)
+    print(f"Per-file speed-up: {speedup:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# Per-stage timing and memory instrumentation for conversions. Extraction code
+# wraps its expensive steps in stage(...); while a ConversionProfile is active
+# each step is recorded with wall time, CPU time and memory, otherwise the
+# wrappers cost next to nothing. Worker processes record into their own
+# profile and ship the records back with their results. The active profile
+# is a context variable, so conversions running at the same time in one
+# process (GUI threads, the asyncio server) each record into their own.
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+_active = contextvars.ContextVar('conversion_profile', default=None)
+
+
+def memory_usage():
+    """Current and peak resident set size of this process in bytes (None where unknown)"""
+    rss = peak = None
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        rss = info.rss
+        peak = getattr(info, 'peak_wset', None)  # Windows only
+    elif os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    if peak is None and resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KB on Linux, bytes on macOS
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    return rss, peak
+
+
+class ConversionProfile:
+    """Collects stage records for one or more documents
+
+    A record is a dict with the stage name, document, page (or pages), wall
+    and CPU seconds (CPU of the thread that ran the stage), the RSS when the
+    stage finished and the process's peak RSS so far.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, records):
+        with self._lock:
+            self.records.extend(records)
+
+    @contextmanager
+    def stage(self, name, document=None, pages=None, **info):
+        """Time the body of a with block as one record; pages is a page or list of pages"""
+        if pages is not None and not isinstance(pages, (list, tuple)):
+            pages = [pages]
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            rss, peak = memory_usage()
+            record = {'stage': name, 'document': document, 'pages': pages,
+                      'wall': time.perf_counter() - wall_start,
+                      'cpu': time.thread_time() - cpu_start,
+                      'rss': rss, 'peak_rss': peak, 'pid': os.getpid()}
+            record.update(info)
+            with self._lock:
+                self.records.append(record)
+
+    def document_records(self, document):
+        with self._lock:
+            return [r for r in self.records if r['document'] == document]
+
+    def report(self, document=None):
+        """Totals per stage and per page (for one document, or all records)"""
+        records = self.document_records(document) if document else list(self.records)
+        stages = {}
+        pages = {}
+        for record in records:
+            totals = stages.setdefault(record['stage'], {'calls': 0, 'wall': 0.0, 'cpu': 0.0,
+                                                         'peak_rss_mb': None})
+            totals['calls'] += 1
+            totals['wall'] += record['wall']
+            totals['cpu'] += record['cpu']
+            if record['peak_rss'] is not None:
+                totals['peak_rss_mb'] = max(totals['peak_rss_mb'] or 0,
+                                            round(record['peak_rss'] / MB, 1))
+            # A stage that handled several pages at once is shared out evenly
+            record_pages = record['pages'] or []
+            for page in record_pages:
+                page_totals = pages.setdefault(str(page), {'wall': 0.0, 'cpu': 0.0, 'stages': {}})
+                page_totals['wall'] += record['wall'] / len(record_pages)
+                page_totals['cpu'] += record['cpu'] / len(record_pages)
+                page_stages = page_totals['stages']
+                page_stages[record['stage']] = (page_stages.get(record['stage'], 0.0)
+                                                + record['wall'] / len(record_pages))
+        slowest = sorted(pages, key=lambda page: pages[page]['wall'], reverse=True)[:10]
+        return {'stages': stages, 'pages': pages, 'slowest_pages': [int(p) for p in slowest],
+                'records': records}
+
+    def write_report(self, path, document=None, **summary):
+        """Write report() plus any summary fields (source, output, settings...) as JSON"""
+        report = dict(summary)
+        report.update(self.report(document))
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        return path
+
+
+@contextmanager
+def activate(profile):
+    """Make profile the one stage() records into, in this thread or asyncio task
+
+    Threads started inside the block do not inherit it; hand functions they
+    run through carry_profile.
+    """
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+def carry_profile(function):
+    """function, made to record into the caller's active profile on whichever thread runs it"""
+    profile = _active.get()
+    if profile is None:
+        return function
+
+    def run(*args, **kwargs):
+        with activate(profile):
+            return function(*args, **kwargs)
+    return run
+
+
+@contextmanager
+def _no_stage():
+    yield
+
+
+def stage(name, document=None, pages=None, **info):
+    """Context manager timing one step into the active profile, if there is one"""
+    profile = _active.get()
+    if profile is None:
+        return _no_stage()
+    return profile.stage(name, document=document, pages=pages, **info)
+
+
+def report_path_for(output_path):
+    """<output>_profile.json next to an output file or directory"""
+    return os.path.splitext(output_path)[0] + '_profile.json'
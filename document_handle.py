@@ -0,0 +1,107 @@
+# One open PyMuPDF document per file per process, shared by every headless
+# subsystem that reads it: page counting, the page classifier, grid
+# detection, the extractors, OCR rasterising and split/merge. MuPDF reads
+# the file lazily through its own buffered reader, so an open document costs
+# its cross-reference table and whatever pages are loaded, not the file
+# size; opening it from memory (bytes or a memory map) would copy the whole
+# file instead. A shard opens the file once and loads each page once, where
+# it used to open it up to four times. Loaded pages are kept in a small LRU
+# per document.
+#
+#   with open_document(pdf_path, password) as handle:
+#       page = handle.page(3)
+#
+# Nested open_document calls for the same file share the outer handle, which
+# is closed when the outermost one exits. PyMuPDF documents are not
+# thread-safe, so the handle's lock is held for the duration. Long-running
+# users (a whole conversion, OCR waiting on tesseract) open it with
+# lock=False instead and take handle.lock around each page they read, so
+# other readers of the file are not blocked in between:
+#
+#   with open_document(pdf_path, password, lock=False) as handle:
+#       for page_number in page_numbers:
+#           with handle.lock:
+#               text = handle.page(page_number).get_text()
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+PAGE_CACHE_SIZE = 8   # loaded pages kept per document (one default shard)
+
+_handles = {}   # absolute path -> DocumentHandle of the file's current content
+_registry_lock = threading.Lock()
+
+
+def _file_state(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class DocumentHandle:
+    """An open PDF with a bounded cache of loaded pages (1-based page numbers)"""
+
+    def __init__(self, pdf_path, password=None, page_cache_size=PAGE_CACHE_SIZE):
+        self.path = os.path.abspath(pdf_path)
+        self.state = _file_state(self.path)
+        self.doc = fitz.open(self.path)
+        if self.doc.needs_pass and not self.doc.authenticate(password or ""):
+            self.doc.close()
+            raise ValueError(f"Wrong or missing password for {pdf_path}")
+        self.page_cache_size = max(1, int(page_cache_size))
+        self.lock = threading.RLock()
+        self.users = 0
+        self._pages = OrderedDict()
+
+    def page(self, page_number):
+        """The loaded fitz page, from the cache when it was used recently"""
+        page = self._pages.pop(page_number, None)
+        if page is None:
+            page = self.doc[page_number - 1]
+        self._pages[page_number] = page
+        while len(self._pages) > self.page_cache_size:
+            self._pages.popitem(last=False)
+        return page
+
+    def __len__(self):
+        return len(self.doc)
+
+    def current(self):
+        """False once the file has been replaced or changed on disk"""
+        try:
+            return _file_state(self.path) == self.state
+        except OSError:
+            return False
+
+    def close(self):
+        self._pages.clear()
+        self.doc.close()
+
+
+@contextmanager
+def open_document(pdf_path, password=None, lock=True):
+    """A shared DocumentHandle for pdf_path, held (and with lock, locked) until the block exits"""
+    path = os.path.abspath(pdf_path)
+    with _registry_lock:
+        handle = _handles.get(path)
+        if handle is None or not handle.current():
+            handle = DocumentHandle(path, password)
+            _handles[path] = handle
+        handle.users += 1
+    try:
+        if lock:
+            with handle.lock:
+                yield handle
+        else:
+            yield handle
+    finally:
+        with _registry_lock:
+            handle.users -= 1
+            if handle.users == 0:
+                # Replaced handles (the file changed) are closed by their last user too
+                if _handles.get(path) is handle:
+                    del _handles[path]
+                handle.close()
@@ -0,0 +1,396 @@
+# Headless table extraction engine shared by the GUI and the batch CLI.
+# Nothing in here may import tkinter so it can run on display-less workers.
+# camelot and tabula take most of a second to import each, so they are only
+# imported by the extractors that use them. With detect_areas the ruled tables
+# are located first (table_grid) and the extractors parse only those regions.
+
+import os
+
+import page_classifier
+import tabula_session
+from conversion_profile import stage
+from document_handle import open_document
+from fitz_tables import extract_fitz_pages
+from ocr_engine import DEFAULT_DPI, extract_ocr_pages
+from table_grid import detect_table_areas, pad_areas
+from table_stitcher import TableStitcher
+from table_types import normalize_table
+from table_writer import FORMATS, TableWriter
+
+ENGINES = ["auto", "tabula", "camelot", "pymupdf", "ocr"]
+
+
+class ConversionCancelled(Exception):
+    """A conversion was stopped by its cancel event before it finished"""
+
+    def __init__(self, message="Conversion cancelled"):
+        super().__init__(message)
+
+
+def normalize_engine(engine):
+    """Map a GUI/CLI engine label ("Auto", "Tabula", ...) to its internal name"""
+    name = (engine or "auto").strip().lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown extraction engine: {engine}")
+    return name
+
+
+def parse_page_range(pages, total_pages):
+    """Turn "all", "3" or "1-4,7,10-end" into a sorted list of 1-based page numbers"""
+    if pages is None or str(pages).strip().lower() in ("", "all"):
+        return list(range(1, total_pages + 1))
+
+    selected = set()
+    for part in str(pages).split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            start = int(start) if start.strip() else 1
+            end = total_pages if end.strip() in ("", "end") else int(end)
+        else:
+            start = end = int(part)
+        if start < 1 or end > total_pages or start > end:
+            raise ValueError(f"Invalid page range: {part} (document has {total_pages} pages)")
+        selected.update(range(start, end + 1))
+    return sorted(selected)
+
+
+def format_page_range(page_numbers):
+    """Collapse [1, 2, 3, 7] back into the "1-3,7" form tabula and camelot accept"""
+    parts = []
+    run_start = prev = None
+    for page in page_numbers:
+        if prev is not None and page == prev + 1:
+            prev = page
+            continue
+        if run_start is not None:
+            parts.append(str(run_start) if run_start == prev else f"{run_start}-{prev}")
+        run_start = prev = page
+    if run_start is not None:
+        parts.append(str(run_start) if run_start == prev else f"{run_start}-{prev}")
+    return ','.join(parts)
+
+
+def count_pages(pdf_path, password=None):
+    """Return the number of pages in a PDF"""
+    with open_document(pdf_path, password) as handle:
+        return len(handle)
+
+
+def _read_tabula(pdf_path, page_numbers, lattice, stream, password, areas=None):
+    """Run tabula page by page and return [(page, [DataFrame, ...]), ...]
+
+    areas optionally maps a page to the (x0, y0, x1, y1) rectangles, in
+    points from the top left, that hold its tables.
+    """
+    areas = pad_areas(areas)
+    session = tabula_session.start_session()
+    if session is not None:
+        # Resident JVM: no Java start-up and the PDF is parsed once per call
+        return session.extract(pdf_path, page_numbers, lattice=lattice, stream=stream,
+                               password=password, areas=areas)
+
+    from tabula.io import read_pdf
+
+    # Without a usable in-process JVM, tabula-py would try JPype again itself
+    options = {'force_subprocess': True}
+    # tabula refuses both modes at once; with both (or neither) ticked let it guess
+    if lattice and not stream:
+        options['lattice'] = True
+    elif stream and not lattice:
+        options['stream'] = True
+    # tabula's DataFrame output carries no page number, so ask for one page at a time
+    results = []
+    for page in page_numbers:
+        page_options = dict(options)
+        if areas.get(page):
+            # tabula wants top, left, bottom, right
+            page_options['area'] = [[y0, x0, y1, x1] for x0, y0, x1, y1 in areas[page]]
+        with stage('tabula', pages=page, mode='subprocess'):
+            results.append((page, read_pdf(pdf_path, pages=page, multiple_tables=True,
+                                           password=password, **page_options)))
+    return results
+
+
+def _read_fitz(pdf_path, page_numbers, lattice, stream, password, areas=None):
+    """PyMuPDF's table finder, searching only inside areas on the pages that have them"""
+    return extract_fitz_pages(pdf_path, page_numbers, lattice, stream, password,
+                              pad_areas(areas))
+
+
+def _camelot_areas(pdf_path, page_numbers, areas, password):
+    """camelot table_areas strings ("x1,y1,x2,y2", origin bottom left) per page"""
+    with open_document(pdf_path, password) as handle:
+        heights = {page: handle.page(page).rect.height for page in page_numbers}
+    return {page: [f"{x0},{heights[page] - y0},{x1},{heights[page] - y1}"
+                   for x0, y0, x1, y1 in areas[page]] for page in page_numbers}
+
+
+def _read_camelot(pdf_path, page_numbers, lattice, stream, password, areas=None):
+    """Run camelot over a set of pages and return [(page, [DataFrame, ...]), ...]
+
+    Pages with areas (see _read_tabula) are read one call each, since
+    camelot applies table_areas to every page of a call.
+    """
+    import camelot
+
+    flavor = 'stream' if stream and not lattice else 'lattice'
+    kwargs = {'password': password} if password else {}
+    areas = areas or {}
+    whole = [page for page in page_numbers if not areas.get(page)]
+    calls = [(format_page_range(whole), {})] if whole else []
+    clipped = [page for page in page_numbers if areas.get(page)]
+    if clipped:
+        table_areas = _camelot_areas(pdf_path, clipped, areas, password)
+        calls += [(str(page), {'table_areas': table_areas[page]}) for page in clipped]
+    by_page = {page: [] for page in page_numbers}
+    for pages, area_options in calls:
+        with stage('camelot', pages=pages):
+            tables = camelot.read_pdf(pdf_path, pages=pages, flavor=flavor, **area_options,
+                                      **kwargs)
+        for table in tables:
+            by_page.setdefault(int(table.page), []).append(table.df)
+    return sorted(by_page.items())
+
+
+def _read_auto(pdf_path, page_numbers, lattice, stream, password, ocr_dpi, ocr_workers,
+               detect_areas=False):
+    """Classify each page and send it to the cheapest extractor that can handle it
+
+    Bordered digital pages go to tabula's lattice mode, borderless ones to its
+    stream mode, scanned pages to OCR and blank pages nowhere. If the preferred
+    mode is switched off in the options the page uses the other one. Where
+    tabula cannot run (no JVM in-process and no `java` to launch, decided once
+    per process) the digital pages go to the native PyMuPDF extractor instead.
+    So do rotated digital pages, which tabula reads transposed. With
+    detect_areas the bordered pages are read only inside their grids.
+    """
+    routes = page_classifier.classify_pages(pdf_path, page_numbers, password)
+    with open_document(pdf_path, password) as handle:
+        rotated = {page for page in page_numbers if handle.page(page).rotation}
+    groups = {}
+    for page in page_numbers:
+        route = routes[page]
+        if route == page_classifier.LATTICE and not lattice and stream:
+            route = page_classifier.STREAM
+        elif route == page_classifier.STREAM and not stream and lattice:
+            route = page_classifier.LATTICE
+        groups.setdefault(route, []).append(page)
+
+    results = [(page, []) for page in groups.pop(page_classifier.EMPTY, [])]
+
+    def read_tabula_or_fitz(pdf_path, page_numbers, lattice, stream, password, areas):
+        if tabula_session.tabula_available():
+            from tabula.errors import JavaNotFoundError
+
+            try:
+                return _read_tabula(pdf_path, page_numbers, lattice, stream, password, areas)
+            except (JavaNotFoundError, OSError):
+                # `java` could not be launched after all; not tried again in this process
+                tabula_session.mark_unavailable()
+        return _read_fitz(pdf_path, page_numbers, lattice, stream, password, areas)
+
+    def read_digital(pdf_path, page_numbers, lattice, stream, password, areas=None):
+        results = []
+        turned = [page for page in page_numbers if page in rotated]
+        if turned:
+            results += _read_fitz(pdf_path, turned, lattice, stream, password, areas)
+        upright = [page for page in page_numbers if page not in rotated]
+        if upright:
+            results += read_tabula_or_fitz(pdf_path, upright, lattice, stream, password, areas)
+        return results
+
+    if page_classifier.LATTICE in groups:
+        bordered = groups[page_classifier.LATTICE]
+        areas = detect_table_areas(pdf_path, bordered, password) if detect_areas else None
+        results += read_digital(pdf_path, bordered, True, False, password, areas)
+    if page_classifier.STREAM in groups:
+        results += read_digital(pdf_path, groups[page_classifier.STREAM], False, True, password)
+    if page_classifier.OCR in groups:
+        results += extract_ocr_pages(pdf_path, groups[page_classifier.OCR], password=password,
+                                     dpi=ocr_dpi, workers=ocr_workers)
+    return sorted(results, key=lambda r: r[0])
+
+
+def _run_engine(pdf_path, page_numbers, engine, lattice, stream, password, ocr_dpi,
+                ocr_workers, detect_areas=False):
+    """Dispatch pages to the selected extractor"""
+    if engine == "ocr":
+        return extract_ocr_pages(pdf_path, page_numbers, password=password, dpi=ocr_dpi,
+                                 workers=ocr_workers)
+    if engine == "auto":
+        return _read_auto(pdf_path, page_numbers, lattice, stream, password, ocr_dpi,
+                          ocr_workers, detect_areas)
+    areas = detect_table_areas(pdf_path, page_numbers, password) if detect_areas else None
+    if engine == "camelot":
+        return _read_camelot(pdf_path, page_numbers, lattice, stream, password, areas)
+    if engine == "pymupdf":
+        return _read_fitz(pdf_path, page_numbers, lattice, stream, password, areas)
+    return _read_tabula(pdf_path, page_numbers, lattice, stream, password, areas)
+
+
+def cache_settings(engine="auto", lattice=True, stream=True, ocr_dpi=DEFAULT_DPI,
+                   detect_areas=False):
+    """The settings that change extraction results, as used in result cache keys"""
+    settings = {'engine': normalize_engine(engine), 'lattice': bool(lattice),
+                'stream': bool(stream)}
+    if settings['engine'] in ("auto", "ocr"):
+        settings['ocr_dpi'] = int(ocr_dpi)
+    # Only present when on, so results cached before the option existed still match
+    if detect_areas and settings['engine'] != "ocr":
+        settings['detect_areas'] = True
+    return settings
+
+
+def extract_page_tables(pdf_path, page_numbers, engine="auto", lattice=True, stream=True,
+                        password=None, cache=None, ocr_dpi=DEFAULT_DPI, ocr_workers=None,
+                        detect_areas=False, checkpoint=None):
+    """Extract tables from the given pages, returned as [(page, [DataFrame, ...]), ...] in page order
+
+    With a ResultCache, pages already extracted with the same settings are read
+    back from disk and only the missing ones are handed to the engine. A
+    Checkpoint is read first and stores every newly extracted page the same
+    way. With detect_areas, ruled tables are located on the rendered page
+    first and only those regions are parsed (pages without a grid are read
+    whole).
+    """
+    engine = normalize_engine(engine)
+    if not page_numbers:
+        return []
+    page_numbers = sorted(page_numbers)
+
+    settings = cache_settings(engine, lattice, stream, ocr_dpi, detect_areas)
+    cached = {}
+    for store in (checkpoint, cache):
+        missing = [page for page in page_numbers if page not in cached]
+        if store and missing:
+            with stage('cache_read', pages=missing):
+                cached.update(store.get_pages(pdf_path, missing, settings))
+    missing = [page for page in page_numbers if page not in cached]
+
+    results = []
+    if missing:
+        # One open document (and one load of each page) for the classifier,
+        # grid detection and the PyMuPDF-based extractors, each of which locks
+        # it per page, so tabula, camelot and tesseract run without the lock
+        with open_document(pdf_path, password, lock=False):
+            results = _run_engine(pdf_path, missing, engine, lattice, stream, password,
+                                  ocr_dpi, ocr_workers, detect_areas)
+        results = [(page, [table for table in tables if table is not None and not table.empty])
+                   for page, tables in results]
+        for store in (checkpoint, cache):
+            if store:
+                with stage('cache_write', pages=missing):
+                    store.put_pages(pdf_path, results, settings)
+    return sorted(list(cached.items()) + results, key=lambda r: r[0])
+
+
+def extract_tables(pdf_path, engine="auto", pages="all", lattice=True, stream=True,
+                   password=None, cache=None, ocr_dpi=DEFAULT_DPI, ocr_workers=None,
+                   detect_areas=False):
+    """Extract every table from the selected pages and return a list of DataFrames"""
+    page_numbers = parse_page_range(pages, count_pages(pdf_path, password))
+    results = extract_page_tables(pdf_path, page_numbers, engine=engine, lattice=lattice,
+                                  stream=stream, password=password, cache=cache,
+                                  ocr_dpi=ocr_dpi, ocr_workers=ocr_workers,
+                                  detect_areas=detect_areas)
+    return flatten_page_tables(results)
+
+
+def flatten_page_tables(page_results):
+    """Turn [(page, [tables]), ...] into a flat list of tables in page order"""
+    return [table for _, tables in sorted(page_results, key=lambda r: r[0])
+            for table in tables]
+
+
+def output_path_for(pdf_path, fmt, output_dir=None):
+    """Return the <name>_converted.<fmt> path (a directory for Parquet/Feather) for a source PDF"""
+    base = os.path.splitext(os.path.basename(pdf_path))[0] + f"_converted.{fmt}"
+    return os.path.join(output_dir or os.path.dirname(os.path.abspath(pdf_path)), base)
+
+
+def write_tables(tables, output_path, fmt="xlsx", source_file=None):
+    """Write extracted tables to one output in any of FORMATS (see TableWriter)"""
+    with TableWriter(output_path, fmt, source_file) as writer:
+        writer.write_tables(tables)
+    return output_path
+
+
+def convert_pdf(pdf_path, engine="auto", pages="all", lattice=True, stream=True,
+                fmt="xlsx", output_dir=None, password=None, cache=None, ocr_dpi=DEFAULT_DPI,
+                ocr_workers=None, normalize=True, stitch=True, detect_areas=False,
+                checkpoint=None, cancel=None, output_path=None):
+    """Convert one PDF; return the output path, or None if no tables were found
+
+    The output goes to output_path, by default <name>_converted.<fmt> in
+    output_dir (see output_path_for).
+
+    Pages are extracted and written one at a time, so only one page's tables
+    are in memory at once. With stitch, tables continuing over consecutive
+    pages are merged; with normalize, column types are inferred first. When
+    cancel (a threading.Event) is set, ConversionCancelled is raised before
+    the next page and nothing is written; with a Checkpoint, running the
+    conversion again resumes after the last extracted page.
+    """
+    # The document stays open across pages, so it is not reopened for each
+    # one; it is only locked while a page is read, not for the whole conversion
+    with open_document(pdf_path, password, lock=False) as handle, \
+            TableWriter(output_path or output_path_for(pdf_path, fmt, output_dir), fmt,
+                        source_file=os.path.basename(pdf_path)) as writer:
+        with handle.lock:
+            page_count = len(handle)
+        page_numbers = parse_page_range(pages, page_count)
+        stitcher = TableStitcher()
+        for page in page_numbers:
+            if cancel is not None and cancel.is_set():
+                raise ConversionCancelled()
+            for page, tables in extract_page_tables(pdf_path, [page], engine=engine,
+                                                    lattice=lattice, stream=stream,
+                                                    password=password, cache=cache,
+                                                    ocr_dpi=ocr_dpi, ocr_workers=ocr_workers,
+                                                    detect_areas=detect_areas,
+                                                    checkpoint=checkpoint):
+                pieces = stitcher.feed(page, tables) if stitch else [(t, False) for t in tables]
+                for table, continues in pieces:
+                    if normalize:
+                        table = normalize_table(table)
+                    writer.write(table, page, continues)
+    if checkpoint:
+        checkpoint.discard(pdf_path, page_numbers,
+                           cache_settings(engine, lattice, stream, ocr_dpi, detect_areas))
+    return writer.output_path if writer.tables_written else None
+
+
+def save_tables(tables, pdf_path, fmt="xlsx", output_dir=None):
+    """Write a document's tables to its output file; return the path, or None if there are none"""
+    if not tables:
+        return None
+    return write_tables(tables, output_path_for(pdf_path, fmt, output_dir), fmt,
+                        os.path.basename(pdf_path))
+
+
+def collect_pdfs(inputs, recursive=False):
+    """Expand a mix of files and directories into a sorted, de-duplicated list of PDFs"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for root, _, files in os.walk(item):
+                    found.extend(os.path.join(root, f) for f in files
+                                 if f.lower().endswith('.pdf'))
+            else:
+                found.extend(os.path.join(item, f) for f in os.listdir(item)
+                             if f.lower().endswith('.pdf'))
+        elif os.path.isfile(item):
+            found.append(item)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {item}")
+    seen = set()
+    unique = []
+    for path in sorted(os.path.abspath(p) for p in found):
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
@@ -0,0 +1,104 @@
+# Native table extraction built on PyMuPDF's own table finder, which works
+# from the page's text spans and vector drawings. No Java, Ghostscript or
+# OpenCV is involved and the document is parsed once per call.
+#
+# find_tables reads a rotated page as it is displayed. That suits landscape
+# tables drawn sideways and turned upright by /Rotate, but a page whose text
+# is upright as drawn and only turned by /Rotate (scanners and printers do
+# this) would come out transposed, so such pages are read with the rotation
+# set to 0 for the duration.
+
+import fitz  # PyMuPDF
+
+from conversion_profile import stage
+from document_handle import open_document
+
+
+def find_tables_supported():
+    """PyMuPDF gained Page.find_tables in 1.23"""
+    return hasattr(fitz.Page, 'find_tables')
+
+
+def _tables_to_frames(found):
+    """Convert a PyMuPDF TableFinder result into DataFrames with a 'bbox' attr"""
+    frames = []
+    for table in found.tables:
+        frame = table.to_pandas()
+        # Whitespace-aligned detection yields a blank spacer row between lines
+        cells = frame.fillna('').astype(str)
+        frame = frame[cells.apply(lambda column: column.str.strip() != '').any(axis=1)]
+        if frame.empty:
+            continue
+        frame = frame.reset_index(drop=True)
+        frame.attrs['bbox'] = tuple(table.bbox)
+        frames.append(frame)
+    return frames
+
+
+def _find_in(page, clip, lattice, stream):
+    if lattice or not stream:
+        frames = _tables_to_frames(page.find_tables(clip=clip, strategy="lines"))
+        if frames or not stream:
+            return frames
+    return _tables_to_frames(page.find_tables(clip=clip, strategy="text"))
+
+
+def _upright_as_drawn(page):
+    """True if most text lines run horizontally on the unrotated page"""
+    horizontal = vertical = 0
+    for block in page.get_text('dict', flags=0)['blocks']:
+        for line in block.get('lines', ()):
+            cos, sin = line['dir']   # in unrotated page space
+            if abs(cos) >= abs(sin):
+                horizontal += 1
+            else:
+                vertical += 1
+    return horizontal > vertical
+
+
+def extract_page(page, lattice=True, stream=True, areas=None):
+    """Extract tables from one fitz page
+
+    lattice uses ruling lines (vector drawings) to find cells; stream aligns
+    words on whitespace. With both enabled ruled tables are tried first and
+    the text strategy only runs if no ruled table was found. With areas
+    (x0, y0, x1, y1 rectangles) only those parts of the page are searched.
+    """
+    with stage('pymupdf', pages=page.number + 1):
+        rotation = page.rotation
+        if not rotation or not _upright_as_drawn(page):
+            return _find_all(page, lattice, stream, areas)
+        page.set_rotation(0)
+        try:
+            return _find_all(page, lattice, stream, areas)
+        finally:
+            page.set_rotation(rotation)
+
+
+def _find_all(page, lattice, stream, areas):
+    if not areas:
+        return _find_in(page, None, lattice, stream)
+    return [frame for area in areas
+            for frame in _find_in(page, fitz.Rect(area), lattice, stream)]
+
+
+def extract_fitz_pages(document, page_numbers, lattice=True, stream=True, password=None,
+                       areas=None):
+    """Extract tables from 1-based pages of an open fitz document or a PDF path
+
+    areas optionally maps a page to the rectangles to search on it (see
+    table_grid.detect_table_areas). Returns [(page, [DataFrame, ...]), ...].
+    """
+    if not find_tables_supported():
+        raise RuntimeError("The PyMuPDF engine needs PyMuPDF 1.23 or newer")
+    areas = areas or {}
+    if isinstance(document, fitz.Document):
+        return [(page, extract_page(document[page - 1], lattice, stream, areas.get(page)))
+                for page in page_numbers]
+    results = []
+    with open_document(document, password, lock=False) as handle:
+        for page in page_numbers:
+            with handle.lock:
+                results.append((page, extract_page(handle.page(page), lattice, stream,
+                                                   areas.get(page))))
+    return results
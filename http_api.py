@@ -0,0 +1,595 @@
+# Local HTTP API for other services: submit a PDF (uploaded, or a path on
+# this machine), get a job id back, and read each page's tables as soon as
+# its shard is extracted. The server is a single asyncio event loop using
+# only the standard library; extraction runs on a process pool, fed from one
+# FIFO of page shards so large documents do not starve small ones. It binds
+# to 127.0.0.1 by default and is meant for local use only.
+#
+#   python http_api.py --port 8765 -w 4
+#   curl --data-binary @statement.pdf -H "Content-Type: application/pdf" \
+#        "http://127.0.0.1:8765/jobs?engine=pymupdf&pages=1-5"
+#   curl -N http://127.0.0.1:8765/jobs/<id>/results          # NDJSON, one line per page
+#   curl -o t1.parquet http://127.0.0.1:8765/jobs/<id>/tables/1.parquet
+#   curl http://127.0.0.1:8765/metrics
+
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from extraction_engine import ENGINES, count_pages, extract_page_tables, parse_page_range
+from ocr_engine import DEFAULT_DPI
+from parallel_extract import DEFAULT_PAGES_PER_SHARD, default_workers, plan_shards
+from result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache
+from table_types import normalize_table
+from table_writer import table_json, table_parquet
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+KEEP_FINISHED = 1000         # finished jobs kept for reading; older ones are dropped
+KEEP_FINISHED_BYTES = 1024 * 1024 * 1024   # ... and their results on disk, at most 1 GB
+THROUGHPUT_WINDOW = 60.0     # seconds of history behind pages_per_s
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 411: "Length Required",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+_TRUE = ("1", "true", "yes", "on")
+
+
+class HTTPError(Exception):
+    """Turned into a JSON {"error": message} response with this status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _extract_shard(pdf_path, page_numbers, normalize, options):
+    """Worker entry point; must stay at module level so it can be pickled"""
+    results = extract_page_tables(pdf_path, page_numbers, **options)
+    if normalize:
+        results = [(page, [normalize_table(table) for table in tables])
+                   for page, tables in results]
+    return results
+
+
+def job_options(fields):
+    """Extraction options from query-string or JSON fields; returns (pages, normalize, options)"""
+    def flag(name, default):
+        value = fields.get(name, default)
+        return value if isinstance(value, bool) else str(value).lower() in _TRUE
+
+    engine = str(fields.get('engine', 'auto')).lower()
+    if engine not in ENGINES:
+        raise HTTPError(400, f"Unknown engine: {engine} (one of {', '.join(ENGINES)})")
+    try:
+        ocr_dpi = int(fields.get('ocr_dpi', DEFAULT_DPI))
+    except ValueError:
+        raise HTTPError(400, "ocr_dpi must be a number") from None
+    options = {'engine': engine, 'lattice': flag('lattice', True),
+               'stream': flag('stream', True), 'detect_areas': flag('detect_areas', False),
+               'ocr_dpi': ocr_dpi, 'password': fields.get('password') or None}
+    return fields.get('pages', 'all'), flag('normalize', True), options
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class Job:
+    """One submitted PDF and the tables extracted from it so far
+
+    Tables are written to result_dir as <n>.json and <n>.parquet as soon as
+    they are numbered; only their page numbers stay in memory.
+    """
+
+    def __init__(self, pdf_path, name, page_numbers, normalize, options, upload=False):
+        self.id = uuid.uuid4().hex
+        self.pdf_path = pdf_path
+        self.name = name
+        self.page_numbers = page_numbers
+        self.normalize = normalize
+        self.options = options
+        self.upload = upload
+        self.state = QUEUED
+        self.error = None
+        self.pages = []    # [(page, [table index, ...])] in page order
+        self.tables = {}   # table index (from 1, in page order) -> page
+        self.result_dir = None
+        self.result_bytes = 0
+        self.shards_left = 0
+        self.next_shard = 0
+        self.waiting = {}  # shard number -> page results that finished ahead of earlier ones
+        self.delivering = asyncio.Lock()
+        self.created = time.time()
+        self.started = self.finished = None
+        self.changed = asyncio.Condition()
+
+    @property
+    def done(self):
+        return self.state in (DONE, FAILED)
+
+    async def notify(self):
+        async with self.changed:
+            self.changed.notify_all()
+
+    def summary(self):
+        end = self.finished or time.time()
+        return {'id': self.id, 'name': self.name, 'state': self.state, 'error': self.error,
+                'pages_total': len(self.page_numbers), 'pages_done': len(self.pages),
+                'tables': len(self.tables), 'created': self.created,
+                'started': self.started, 'finished': self.finished,
+                'elapsed': end - self.started if self.started else None,
+                'results': f"/jobs/{self.id}/results"}
+
+    def table_path(self, index, extension):
+        return os.path.join(self.result_dir, f"{index}.{extension}")
+
+    def spill(self, page_results):
+        """Number a shard's tables after those already kept and write them to result_dir
+
+        Returns [(page, [table index, ...])]; blocking, so run it off the event loop.
+        """
+        os.makedirs(self.result_dir, exist_ok=True)
+        pages = []
+        index = len(self.tables)
+        for page, tables in page_results:
+            indexes = []
+            for table in tables:
+                index += 1
+                with open(self.table_path(index, 'json'), 'w', encoding='utf-8') as f:
+                    json.dump(table_json(table), f)
+                with open(self.table_path(index, 'parquet'), 'wb') as f:
+                    f.write(table_parquet(table, self.name, page, index))
+                self.result_bytes += (os.path.getsize(self.table_path(index, 'json'))
+                                      + os.path.getsize(self.table_path(index, 'parquet')))
+                indexes.append(index)
+            pages.append((page, indexes))
+        return pages
+
+    def page_record(self, page, indexes):
+        """One page's tables read back from result_dir; blocking, like spill"""
+        tables = []
+        for index in indexes:
+            record = json.loads(_read_bytes(self.table_path(index, 'json')))
+            record.update(index=index, parquet=f"/jobs/{self.id}/tables/{index}.parquet")
+            tables.append(record)
+        return {'page': page, 'tables': tables}
+
+
+class ExtractionServer:
+    """Job registry, shard queue and process pool behind the HTTP routes"""
+
+    def __init__(self, workers=1, pages_per_shard=DEFAULT_PAGES_PER_SHARD, cache=None,
+                 max_upload=MAX_UPLOAD_BYTES, keep_bytes=KEEP_FINISHED_BYTES):
+        self.workers = max(1, int(workers))
+        self.pages_per_shard = max(1, int(pages_per_shard))
+        self.cache = cache
+        # Share the cores between worker processes and their tesseract threads
+        self.ocr_workers = max(1, default_workers() // self.workers)
+        self.max_upload = max_upload
+        self.keep_bytes = keep_bytes
+        self.jobs = {}
+        self.upload_dir = None
+        self.shards = None
+        self.pool = None
+        self.running = 0
+        self.started = time.time()
+        self.pages_done = 0
+        self.tables_found = 0
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self._recent = deque()   # (time, pages) of recently finished shards
+        self._dispatchers = []
+
+    def _new_pool(self):
+        # spawn, not fork: a forked child would inherit a JVM it cannot use
+        return ProcessPoolExecutor(max_workers=self.workers,
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening and extracting; returns the asyncio server"""
+        # Uploads and every job's result files; removed by close()
+        self.upload_dir = tempfile.mkdtemp(prefix='pdf_api_uploads-')
+        self.shards = asyncio.Queue()
+        self.pool = self._new_pool()
+        self._dispatchers = [asyncio.create_task(self._dispatch())
+                             for _ in range(self.workers)]
+        return await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self):
+        for task in self._dispatchers:
+            task.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        if self.upload_dir:
+            shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    # Jobs
+
+    async def submit(self, pdf_path, name, fields, upload=False):
+        """Queue a PDF's pages; fields are the job's options (see job_options)"""
+        pages, normalize, options = job_options(fields)
+        try:
+            total = await asyncio.to_thread(count_pages, pdf_path, options['password'])
+            page_numbers = parse_page_range(pages, total)
+        except Exception as e:
+            if upload:
+                os.remove(pdf_path)
+            raise HTTPError(400, f"Cannot read {name}: {e}") from None
+        job = Job(pdf_path, name, page_numbers, normalize, options, upload)
+        job.result_dir = os.path.join(self.upload_dir, job.id)
+        self.jobs[job.id] = job
+        shards = plan_shards([(pdf_path, page_numbers)], self.pages_per_shard)
+        job.shards_left = len(shards)
+        for number, (_, shard_pages) in enumerate(shards):
+            self.shards.put_nowait((job, number, shard_pages))
+        if not shards:
+            await self._finish(job)
+        return job
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, number, page_numbers = await self.shards.get()
+            if job.done or job.id not in self.jobs:
+                continue  # failed or deleted while this shard waited
+            if job.state == QUEUED:
+                job.state, job.started = RUNNING, time.time()
+            options = dict(job.options, cache=self.cache, ocr_workers=self.ocr_workers)
+            self.running += 1
+            pool = self.pool
+            try:
+                results = await loop.run_in_executor(
+                    pool, functools.partial(_extract_shard, job.pdf_path, page_numbers,
+                                            job.normalize, options))
+            except BrokenProcessPool as e:
+                # Every shard on the dead pool lands here; only the first replaces it
+                if self.pool is pool:
+                    pool.shutdown(wait=False)
+                    self.pool = self._new_pool()
+                await self._finish(job, f"worker process died: {e}")
+                continue
+            except Exception as e:
+                await self._finish(job, str(e) or type(e).__name__)
+                continue
+            finally:
+                self.running -= 1
+            if job.done:
+                continue
+            self.pages_done += len(results)
+            self._recent.append((time.time(), len(results)))
+            # Tables are numbered in page order, as convert_pdf numbers them,
+            # so shards finishing early wait for the ones before them
+            job.waiting[number] = results
+            try:
+                async with job.delivering:
+                    while job.next_shard in job.waiting:
+                        pages = await asyncio.to_thread(job.spill,
+                                                        job.waiting.pop(job.next_shard))
+                        for page, indexes in pages:
+                            job.tables.update((index, page) for index in indexes)
+                            self.tables_found += len(indexes)
+                        job.pages.extend(pages)
+                        job.next_shard += 1
+            except Exception as e:
+                await self._finish(job, f"cannot store results: {e}")
+                continue
+            if job.id not in self.jobs:
+                # Deleted while its tables were being written
+                shutil.rmtree(job.result_dir, ignore_errors=True)
+                continue
+            job.shards_left -= 1
+            if job.shards_left == 0:
+                await self._finish(job)
+            else:
+                await job.notify()
+
+    async def _finish(self, job, error=None):
+        if job.done:
+            return
+        job.state, job.error, job.finished = (FAILED if error else DONE), error, time.time()
+        if error:
+            self.jobs_failed += 1
+        else:
+            self.jobs_done += 1
+        await job.notify()
+        if self.cache is not None:
+            # The workers' copies of the cache store entries without evicting
+            await asyncio.to_thread(self.cache.trim)
+        # Drop the oldest finished jobs beyond KEEP_FINISHED or keep_bytes of
+        # results, but never the one that just finished
+        finished = [j for j in self.jobs.values() if j.done]
+        count, kept_bytes = len(finished), sum(j.result_bytes for j in finished)
+        for old in finished:
+            if count <= KEEP_FINISHED and kept_bytes <= self.keep_bytes:
+                break
+            if old is not job:
+                count -= 1
+                kept_bytes -= old.result_bytes
+                await self.forget(old)
+
+    async def forget(self, job):
+        """Drop a job (its queued shards are skipped), its result files and its uploaded file"""
+        self.jobs.pop(job.id, None)
+        if not job.done:
+            job.state, job.error, job.finished = FAILED, "deleted", time.time()
+            await job.notify()
+        if job.result_dir:
+            await asyncio.to_thread(shutil.rmtree, job.result_dir, True)
+        if job.upload:
+            try:
+                os.remove(job.pdf_path)
+            except OSError:
+                pass  # still open in a worker on Windows; the directory goes at exit
+
+    def get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"No such job: {job_id}")
+        return job
+
+    def metrics(self):
+        now = time.time()
+        while self._recent and self._recent[0][0] < now - THROUGHPUT_WINDOW:
+            self._recent.popleft()
+        window = min(THROUGHPUT_WINDOW, now - self.started) or 1.0
+        states = {}
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        waiting = [job for job in self.jobs.values() if not job.done]
+        return {
+            'uptime_s': now - self.started,
+            'workers': self.workers,
+            'jobs': states,
+            'queue_depth': {'shards': self.shards.qsize(),
+                            'pages': sum(len(job.page_numbers) - len(job.pages)
+                                         for job in waiting),
+                            'jobs': len(waiting)},
+            'shards_running': self.running,
+            'throughput': {'pages_per_s': sum(n for _, n in self._recent) / window,
+                           'window_s': window},
+            'totals': {'pages': self.pages_done, 'tables': self.tables_found,
+                       'jobs_done': self.jobs_done, 'jobs_failed': self.jobs_failed},
+        }
+
+    # HTTP
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                method, path, query, headers = await _read_head(reader)
+                await self._route(method, path, query, headers, reader, writer)
+            except HTTPError as e:
+                await _send_json(writer, e.status, {'error': str(e)})
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                await _send_json(writer, 400, {'error': "Malformed request"})
+            except Exception as e:
+                await _send_json(writer, 500, {'error': f"{type(e).__name__}: {e}"})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, query, headers, reader, writer):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['health'] and method == 'GET':
+            return await _send_json(writer, 200, {'status': 'ok'})
+        if parts == ['metrics'] and method == 'GET':
+            return await _send_json(writer, 200, self.metrics())
+        if parts == ['jobs']:
+            if method == 'GET':
+                return await _send_json(writer, 200,
+                                        [job.summary() for job in self.jobs.values()])
+            if method == 'POST':
+                job = await self._create_job(query, headers, reader)
+                return await _send_json(writer, 202, job.summary())
+        elif parts[:1] == ['jobs'] and len(parts) == 2:
+            job = self.get_job(parts[1])
+            if method == 'GET':
+                return await _send_json(writer, 200, job.summary())
+            if method == 'DELETE':
+                await self.forget(job)
+                return await _send_json(writer, 200, {'deleted': job.id})
+        elif parts[:1] == ['jobs'] and parts[2:] == ['results']:
+            if method == 'GET':
+                return await self._send_results(self.get_job(parts[1]),
+                                                query.get('format', 'ndjson'), writer)
+        elif parts[:1] == ['jobs'] and len(parts) == 4 and parts[2] == 'tables':
+            if method == 'GET':
+                return await self._send_table(self.get_job(parts[1]), parts[3], writer)
+        else:
+            raise HTTPError(404, f"No such resource: {path}")
+        raise HTTPError(405, f"{method} is not supported on {path}")
+
+    async def _create_job(self, query, headers, reader):
+        length = headers.get('content-length')
+        if length is None:
+            raise HTTPError(411, "Content-Length is required")
+        length = int(length)
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        if content_type == 'application/json':
+            if length > MAX_HEADER_BYTES:
+                raise HTTPError(413, "JSON body too large")
+            try:
+                fields = json.loads(await reader.readexactly(length))
+                pdf_path = os.path.abspath(fields['path'])
+            except (ValueError, KeyError, TypeError):
+                raise HTTPError(400, 'Expected {"path": "/file.pdf", ...options}') from None
+            if not os.path.isfile(pdf_path):
+                raise HTTPError(400, f"No such file: {pdf_path}")
+            return await self.submit(pdf_path, os.path.basename(pdf_path), fields)
+        if content_type not in ('application/pdf', 'application/octet-stream'):
+            raise HTTPError(400, "Send a PDF as application/pdf or a JSON {\"path\": ...}")
+        if length > self.max_upload:
+            raise HTTPError(413, f"Upload larger than {self.max_upload} bytes")
+        job_options(query)  # reject bad options before taking the upload
+        # Stream the upload to disk; a PDF is never held in memory whole
+        upload_path = os.path.join(self.upload_dir, f"{uuid.uuid4().hex}.pdf")
+        try:
+            with open(upload_path, 'wb') as f:
+                remaining = length
+                while remaining:
+                    chunk = await reader.read(min(1024 * 1024, remaining))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b'', remaining)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except BaseException:
+            os.remove(upload_path)
+            raise
+        name = os.path.basename(query.get('name', 'upload.pdf'))
+        return await self.submit(upload_path, name, query, upload=True)
+
+    async def _send_results(self, job, fmt, writer):
+        if fmt == 'json':
+            # The whole document at once, in page order, when the job is finished
+            async with job.changed:
+                await job.changed.wait_for(lambda: job.done)
+            pages = await asyncio.to_thread(
+                lambda: [job.page_record(page, indexes) for page, indexes in job.pages])
+            return await _send_json(writer, 200, dict(job.summary(), pages=pages))
+        if fmt != 'ndjson':
+            raise HTTPError(400, f"Unknown results format: {fmt} (ndjson or json)")
+        # One line per page as soon as its shard is done, then a summary line
+        await _send_head(writer, 200, 'application/x-ndjson', chunked=True)
+        sent = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.pages) > sent or job.done)
+            ready = job.pages[sent:]
+            sent += len(ready)
+            lines = await asyncio.to_thread(
+                lambda: [json.dumps(job.page_record(page, indexes)) for page, indexes in ready])
+            if job.done and sent == len(job.pages):
+                lines.append(json.dumps(dict(job.summary(), done=True)))
+            await _send_chunk(writer, ''.join(line + '\n' for line in lines).encode())
+            if job.done and sent == len(job.pages):
+                break
+        await _send_chunk(writer, b'')
+
+    async def _send_table(self, job, name, writer):
+        stem, _, extension = name.partition('.')
+        if not stem.isdigit() or extension not in ('parquet', 'json'):
+            raise HTTPError(404, f"No such table: {name} (use <n>.parquet or <n>.json)")
+        if int(stem) not in job.tables:
+            state = "not extracted yet" if not job.done else "not in this document"
+            raise HTTPError(404, f"Table {stem} is {state}")
+        try:
+            body = await asyncio.to_thread(_read_bytes, job.table_path(int(stem), extension))
+        except OSError:
+            raise HTTPError(404, f"Table {stem} is no longer kept") from None
+        if extension == 'json':
+            return await _send_json(writer, 200, dict(json.loads(body), index=int(stem),
+                                                      page=job.tables[int(stem)]))
+        await _send_head(writer, 200, 'application/vnd.apache.parquet', length=len(body))
+        writer.write(body)
+        await writer.drain()
+
+
+async def _read_head(reader):
+    """(method, path, {query: value}, {header: value}) of the next request"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+    method, target, _ = request_line.split(' ', 2)
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return method.upper(), url.path, query, headers
+
+
+async def _send_head(writer, status, content_type, length=None, chunked=False):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+             f"Content-Type: {content_type}", "Connection: close"]
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    elif length is not None:
+        lines.append(f"Content-Length: {length}")
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+
+
+async def _send_chunk(writer, data):
+    """One chunk of a chunked response; empty data ends the response"""
+    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+    await writer.drain()
+
+
+async def _send_json(writer, status, payload):
+    body = json.dumps(payload).encode()
+    await _send_head(writer, status, 'application/json', length=len(body))
+    writer.write(body)
+    await writer.drain()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **server_options):
+    server_state = ExtractionServer(**server_options)
+    server = await server_state.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Listening on http://{address[0]}:{address[1]} "
+          f"({server_state.workers} workers)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        server_state.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve table extraction over local HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on, 0 for any free port (default: {DEFAULT_PORT})")
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--pages-per-shard', type=int, default=DEFAULT_PAGES_PER_SHARD,
+                        help=f"Pages extracted per worker task; results stream per shard "
+                             f"(default: {DEFAULT_PAGES_PER_SHARD})")
+    parser.add_argument('--max-upload-mb', type=int, default=MAX_UPLOAD_BYTES // (1024 * 1024),
+                        help="Largest accepted upload in MB")
+    parser.add_argument('--keep-mb', type=int, default=KEEP_FINISHED_BYTES // (1024 * 1024),
+                        help="Disk space for the results of finished jobs in MB; the oldest "
+                             "jobs are dropped beyond it")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"Extraction result cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help="Always re-extract, ignoring and not updating the cache")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cache = ResultCache(args.cache_dir, DEFAULT_MAX_BYTES) if args.use_cache else None
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers,
+                          pages_per_shard=args.pages_per_shard, cache=cache,
+                          max_upload=args.max_upload_mb * 1024 * 1024,
+                          keep_bytes=args.keep_mb * 1024 * 1024))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# Durable job queue for the watch-folder service, kept in one SQLite file.
+# A job is a PDF identified by its content hash, so a file dropped twice (or
+# copied in again under another name) is converted once. Jobs claimed but
+# never finished, because the service was killed, go back to the queue when
+# it restarts, and failed jobs are retried with exponential backoff.
+
+import sqlite3
+import time
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 30.0   # seconds before the first retry; doubles with every attempt
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    output TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, not_before, id);
+"""
+
+
+class JobQueue:
+    """SQLite-backed queue of PDF conversion jobs, deduplicated by content hash
+
+    Every change is its own transaction, committed before the method returns,
+    so the queue survives a crash at any point. Jobs are dicts with the
+    columns above.
+    """
+
+    def __init__(self, db_path, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY):
+        self.db_path = db_path
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_delay = float(retry_delay)
+        # Autocommit; claim() opens its own write transaction
+        self._db = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def enqueue(self, path, digest):
+        """Queue a PDF; returns the new job id, or None if its content was seen before"""
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO jobs (digest, path, state, created, updated) "
+            "VALUES (?, ?, ?, ?, ?)", (digest, path, QUEUED, now, now))
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def claim(self):
+        """Mark the oldest job that is due as running and return it, or None"""
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE state = ? AND not_before <= ? ORDER BY id LIMIT 1",
+                (QUEUED, now)).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, attempts = attempts + 1, updated = ? "
+                    "WHERE id = ?", (RUNNING, now, row['id']))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return self.get(row['id']) if row is not None else None
+
+    def complete(self, job_id, output=None):
+        """Record a finished job (output is None when the PDF held no tables)"""
+        self._db.execute("UPDATE jobs SET state = ?, output = ?, error = NULL, updated = ? "
+                         "WHERE id = ?", (DONE, output, time.time(), job_id))
+        return self.get(job_id)
+
+    def fail(self, job_id, error):
+        """Record a failed attempt: the job is queued again after a backoff, or marked failed"""
+        job = self.get(job_id)
+        now = time.time()
+        if job['attempts'] < self.max_attempts:
+            state = QUEUED
+            not_before = now + self.retry_delay * 2 ** (job['attempts'] - 1)
+        else:
+            state, not_before = FAILED, job['not_before']
+        self._db.execute("UPDATE jobs SET state = ?, not_before = ?, error = ?, updated = ? "
+                         "WHERE id = ?", (state, not_before, str(error), now, job_id))
+        return self.get(job_id)
+
+    def recover(self):
+        """Queue again the jobs left running by a previous run; returns how many"""
+        return self._db.execute("UPDATE jobs SET state = ?, updated = ? WHERE state = ?",
+                                (QUEUED, time.time(), RUNNING)).rowcount
+
+    def retry_failed(self):
+        """Give every failed job a fresh set of attempts; returns how many"""
+        return self._db.execute(
+            "UPDATE jobs SET state = ?, attempts = 0, not_before = 0, updated = ? "
+            "WHERE state = ?", (QUEUED, time.time(), FAILED)).rowcount
+
+    def get(self, job_id):
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def counts(self):
+        """{state: number of jobs}"""
+        return {state: count for state, count in
+                self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")}
+
+    def next_due(self):
+        """Time the earliest queued job becomes due, or None when nothing is queued"""
+        return self._db.execute("SELECT MIN(not_before) FROM jobs WHERE state = ?",
+                                (QUEUED,)).fetchone()[0]
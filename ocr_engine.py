@@ -0,0 +1,149 @@
+# OCR table extraction for scanned pages: rasterise with PyMuPDF, clean the
+# image up (denoise + Otsu), read word boxes with tesseract in a worker pool
+# and rebuild rows and columns from the word positions. OpenCV, pytesseract
+# and pandas are imported on first use: the GUI imports this module at launch.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from conversion_profile import carry_profile, stage
+from document_handle import open_document
+from page_raster import OCR_DPI
+
+DEFAULT_DPI = OCR_DPI
+MIN_CONFIDENCE = 0      # tesseract reports -1 for non-word boxes
+CELL_GAP_RATIO = 1.2    # a gap wider than this many text heights starts a new cell
+
+# Every tesseract process would otherwise start one OpenMP thread per core,
+# which fights with our own worker pool
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+
+def default_ocr_workers():
+    """Number of concurrent tesseract processes when none is configured"""
+    return max(1, os.cpu_count() or 1)
+
+
+def render_page(page, dpi=DEFAULT_DPI):
+    """Rasterise a fitz page to a greyscale numpy array"""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+
+def preprocess(image):
+    """Denoise and Otsu-binarise a page image (PIL image or greyscale array) for OCR"""
+    import cv2
+
+    gray = np.asarray(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    denoised = cv2.fastNlMeansDenoising(gray)
+    return cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def read_words(image):
+    """Run tesseract and return a DataFrame of words with their boxes"""
+    import pytesseract
+
+    data = pytesseract.image_to_data(Image.fromarray(image),
+                                     output_type=pytesseract.Output.DATAFRAME)
+    data = data[(data['conf'] > MIN_CONFIDENCE) & data['text'].notna()]
+    data = data[data['text'].astype(str).str.strip() != '']
+    return data
+
+
+def words_to_lines(words):
+    """Group word boxes into text lines, each split into (x0, x1, text) cells at wide gaps"""
+    lines = []
+    for _, line in words.groupby(['block_num', 'par_num', 'line_num'], sort=False):
+        line = line.sort_values('left')
+        lefts = line['left'].to_numpy()
+        rights = lefts + line['width'].to_numpy()
+        texts = line['text'].astype(str).to_numpy()
+        gaps = lefts[1:] - rights[:-1]
+        breaks = np.flatnonzero(gaps > CELL_GAP_RATIO * line['height'].median()) + 1
+        cells = []
+        for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(texts)]):
+            cells.append((lefts[start], rights[start:end].max(), ' '.join(texts[start:end])))
+        lines.append((line['top'].min(), line['top'].max() + line['height'].max(), cells))
+    lines.sort(key=lambda l: l[0])
+    return lines
+
+
+def column_spans(lines):
+    """Find column x-ranges as the union of cell extents; gutters are the gaps left over"""
+    intervals = np.array([(x0, x1) for _, _, cells in lines if len(cells) > 1
+                          for x0, x1, _ in cells], dtype=float)
+    if not len(intervals):
+        return []
+    intervals = intervals[np.argsort(intervals[:, 0])]
+    # A new column starts wherever an interval begins right of everything before it
+    running_right = np.maximum.accumulate(intervals[:, 1])
+    starts = np.r_[0, np.flatnonzero(intervals[1:, 0] > running_right[:-1]) + 1]
+    ends = np.r_[starts[1:], len(intervals)]
+    return [(intervals[s, 0], running_right[e - 1]) for s, e in zip(starts, ends)]
+
+
+def lines_to_table(lines):
+    """Lay the tabular (multi-cell) lines out on the shared column grid"""
+    import pandas as pd
+
+    lines = [line for line in lines if len(line[2]) > 1]
+    spans = column_spans(lines)
+    if not spans:
+        return None
+    centers = np.array([(x0 + x1) / 2 for x0, x1 in spans])
+    rows = []
+    for _, _, cells in lines:
+        row = [''] * len(spans)
+        for x0, x1, text in cells:
+            column = int(np.argmin(np.abs(centers - (x0 + x1) / 2)))
+            row[column] = f"{row[column]} {text}".strip()
+        rows.append(row)
+    table = pd.DataFrame(rows)
+    xs = [x for span in spans for x in span]
+    table.attrs['bbox'] = (min(xs), lines[0][0], max(xs), lines[-1][1])
+    return table
+
+
+def ocr_image(image, dpi=DEFAULT_DPI, page_number=None):
+    """Preprocess one page image and return its tables (bbox in PDF points)"""
+    with stage('ocr_preprocess', pages=page_number):
+        image = preprocess(image)
+    with stage('ocr', pages=page_number):
+        table = lines_to_table(words_to_lines(read_words(image)))
+    if table is None:
+        return []
+    scale = 72.0 / dpi
+    table.attrs['bbox'] = tuple(float(v) * scale for v in table.attrs['bbox'])
+    return [table]
+
+
+def extract_ocr_pages(pdf_path, page_numbers, password=None, dpi=DEFAULT_DPI, workers=None):
+    """OCR the given pages with a pool of tesseract workers; returns [(page, [DataFrame, ...]), ...]
+
+    Pages are rasterised one at a time on this thread (PyMuPDF is not
+    thread-safe) while earlier pages are being recognised, with at most two
+    pages per worker held in memory. The document is only locked while a
+    page is rasterised.
+    """
+    workers = workers or default_ocr_workers()
+    results = {}
+    recognise = carry_profile(ocr_image)
+    with open_document(pdf_path, password, lock=False) as handle, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        for page_number in page_numbers:
+            if len(in_flight) >= 2 * workers:
+                oldest = next(iter(in_flight))
+                results[oldest] = in_flight.pop(oldest).result()
+            with stage('rasterize', pages=page_number, dpi=dpi), handle.lock:
+                image = render_page(handle.page(page_number), dpi)
+            in_flight[page_number] = pool.submit(recognise, image, dpi, page_number)
+        for page_number, future in in_flight.items():
+            results[page_number] = future.result()
+    return [(page, results[page]) for page in page_numbers]
@@ -0,0 +1,103 @@
+# Cheap per-page classification used by the "Auto" engine to route each page
+# to the least expensive extractor that can handle it. Everything here reads
+# the PyMuPDF text layer and vector drawings; no page is rasterised.
+
+import fitz  # PyMuPDF
+
+from conversion_profile import stage
+from document_handle import open_document
+
+LATTICE = "lattice"   # digital page with ruled (bordered) tables
+STREAM = "stream"     # digital page, tables aligned by whitespace only
+OCR = "ocr"           # scanned page, no usable text layer
+EMPTY = "empty"       # nothing to extract
+
+MIN_TEXT_WORDS = 10          # fewer words than this means "no usable text layer"
+MIN_IMAGE_COVERAGE = 0.3     # share of the page covered by images to call it scanned
+MIN_RULING_LENGTH = 20       # points; shorter strokes are glyph decoration, not rulings
+MAX_RULING_THICKNESS = 2     # points; thicker "lines" are filled boxes
+MIN_HORIZONTAL_RULINGS = 3
+MIN_VERTICAL_RULINGS = 2
+
+
+def count_rulings(page):
+    """Count horizontal and vertical ruling lines among a page's vector drawings"""
+    horizontal = vertical = 0
+    for path in page.get_drawings():
+        stroked = path.get('color') is not None
+        for item in path['items']:
+            kind = item[0]
+            if kind == 'l':
+                p1, p2 = item[1], item[2]
+                dx, dy = abs(p2.x - p1.x), abs(p2.y - p1.y)
+                if dy <= MAX_RULING_THICKNESS and dx >= MIN_RULING_LENGTH:
+                    horizontal += 1
+                elif dx <= MAX_RULING_THICKNESS and dy >= MIN_RULING_LENGTH:
+                    vertical += 1
+            elif kind == 're':
+                rect = item[1]
+                if rect.height <= MAX_RULING_THICKNESS and rect.width >= MIN_RULING_LENGTH:
+                    horizontal += 1
+                elif rect.width <= MAX_RULING_THICKNESS and rect.height >= MIN_RULING_LENGTH:
+                    vertical += 1
+                elif stroked and min(rect.width, rect.height) >= MIN_RULING_LENGTH / 2:
+                    # Outlined cell or table border
+                    horizontal += 2
+                    vertical += 2
+    return horizontal, vertical
+
+
+def image_coverage(page):
+    """Fraction of the page area covered by placed images (0.0 - 1.0)"""
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info['bbox']) & page_rect
+        if not bbox.is_empty:
+            covered += bbox.width * bbox.height
+    return min(1.0, covered / page_area)
+
+
+def page_features(page):
+    """Return the measurements the classifier looks at for one page"""
+    horizontal, vertical = count_rulings(page)
+    return {
+        'words': len(page.get_text("words")),
+        'image_coverage': image_coverage(page),
+        'horizontal_rulings': horizontal,
+        'vertical_rulings': vertical,
+    }
+
+
+def classify_features(features):
+    """Pick LATTICE, STREAM, OCR or EMPTY from a page's features"""
+    if features['words'] < MIN_TEXT_WORDS:
+        if features['image_coverage'] >= MIN_IMAGE_COVERAGE:
+            return OCR
+        if features['words'] == 0:
+            return EMPTY
+    if (features['horizontal_rulings'] >= MIN_HORIZONTAL_RULINGS
+            and features['vertical_rulings'] >= MIN_VERTICAL_RULINGS):
+        return LATTICE
+    return STREAM
+
+
+def classify_page(page):
+    """Classify one fitz page"""
+    with stage('classify', pages=page.number + 1):
+        return classify_features(page_features(page))
+
+
+def classify_pages(document, page_numbers, password=None):
+    """Classify 1-based pages of an open fitz document or a PDF path; returns {page: class}"""
+    if isinstance(document, fitz.Document):
+        return {page: classify_page(document[page - 1]) for page in page_numbers}
+    routes = {}
+    with open_document(document, password, lock=False) as handle:
+        for page in page_numbers:
+            with handle.lock:
+                routes[page] = classify_page(handle.page(page))
+    return routes
@@ -0,0 +1,260 @@
+# Render-once page raster service for the GUI. Preview, table detection, OCR
+# and image export all ask this cache for page images instead of calling
+# pdf2image (a poppler process that re-reads the whole file) each time.
+
+import threading
+from collections import OrderedDict, deque
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+ANALYSIS_DPI = 200   # pdf2image's default, used for detection, OCR and export
+OCR_DPI = 300        # ocr_engine's default; here so the GUI can show it without importing that
+MIN_DPI = 18         # draft renders for progressive preview never go below this
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+PREFETCH_RADIUS = 2  # pages on each side of the current one to render ahead
+TILE_SIZE = 512      # pixels per side of a zoomed-in preview tile
+BAND_PIXELS = 2 * 1024 * 1024   # pixels the prefetcher renders per hold of the document lock
+MAX_BANDS = 4        # ... in at most this many bands, since each one decodes the page's images
+DEFAULT_TILE_BYTES = 64 * 1024 * 1024
+
+
+class _ImageLRU:
+    """OrderedDict of PIL images that evicts the oldest once over a byte budget"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.bytes = 0
+
+    def get(self, key):
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        self.images[key] = image
+        self.bytes += image.width * image.height * 3
+        # Always keep the most recent image, even if it alone exceeds the budget
+        while self.bytes > self.max_bytes and len(self.images) > 1:
+            _, old = self.images.popitem(last=False)
+            self.bytes -= old.width * old.height * 3
+
+    def drop_page(self, page_index):
+        for key in [k for k in self.images if k[0] == page_index]:
+            image = self.images.pop(key)
+            self.bytes -= image.width * image.height * 3
+
+    def clear(self):
+        self.images.clear()
+        self.bytes = 0
+
+
+def _pixmap_to_image(pix):
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+
+class PageRasterCache:
+    """Memory-bounded LRU of rendered pages keyed by (page index, DPI, rotation)
+
+    Zoomed-in previews use get_tile(), which renders only a TILE_SIZE square
+    of the page through a clip rectangle and keeps tiles in a separate LRU,
+    so memory stays flat however far a page is zoomed.
+    """
+
+    def __init__(self, document, max_bytes=DEFAULT_MAX_BYTES, max_tile_bytes=DEFAULT_TILE_BYTES):
+        self.document = document
+        self._pages = _ImageLRU(max_bytes)
+        self._tiles = _ImageLRU(max_tile_bytes)
+        # PyMuPDF documents must not be used from two threads at once
+        self._lock = threading.RLock()
+        self._generation = 0   # bumped by invalidate() and clear()
+
+    def _key(self, page_index, dpi):
+        return (page_index, int(dpi), self.document[page_index].rotation)
+
+    def fit_dpi(self, page_number, width, height):
+        """DPI at which the page (as rotated) fits inside width x height pixels"""
+        with self._lock:
+            rect = self.document[page_number - 1].rect
+        return max(MIN_DPI, int(72 * min(width / rect.width, height / rect.height)))
+
+    def page_size(self, page_number, dpi):
+        """Pixel size of the whole page (as rotated) at dpi"""
+        with self._lock:
+            rect = self.document[page_number - 1].rect
+        return int(rect.width * dpi / 72), int(rect.height * dpi / 72)
+
+    def peek(self, page_number, dpi):
+        """Return the cached render if there is one, without rendering"""
+        with self._lock:
+            return self._pages.get(self._key(page_number - 1, dpi))
+
+    def get(self, page_number, dpi=ANALYSIS_DPI, band_pixels=None):
+        """Return the 1-based page rendered at dpi as an RGB PIL image
+
+        With band_pixels the page is rendered in horizontal bands of about
+        that many pixels, letting go of the document lock (and, between
+        PyMuPDF calls, the GIL) in between. A background render then holds
+        up other threads (a draft on the Tk thread) for one band at most
+        rather than a whole page. Every band decodes the page's images
+        again, so there are never more than MAX_BANDS.
+        """
+        page_index = page_number - 1
+        with self._lock:
+            key = self._key(page_index, dpi)
+            image = self._pages.get(key)
+            if image is not None:
+                return image
+            if band_pixels is None:
+                pix = self.document[page_index].get_pixmap(dpi=int(dpi), colorspace=fitz.csRGB,
+                                                           alpha=False)
+                image = _pixmap_to_image(pix)
+                self._pages.put(key, image)
+                return image
+            # Recorded once; every band replays it instead of re-reading the page
+            display_list = self.document[page_index].get_displaylist()
+            generation = self._generation
+        image = self._render_bands(display_list, int(dpi), band_pixels)
+        with self._lock:
+            if self._generation == generation:
+                self._pages.put(key, image)
+        return image
+
+    def _render_bands(self, display_list, dpi, band_pixels):
+        rect = display_list.rect
+        matrix = fitz.Matrix(dpi / 72, dpi / 72)
+        rows = int(rect.height * dpi / 72) + 1
+        band_rows = max(1, int(band_pixels // max(1.0, rect.width * dpi / 72)),
+                        -(-rows // MAX_BANDS))
+        bands = []
+        for first in range(0, rows, band_rows):
+            top = rect.y0 + first * 72.0 / dpi
+            clip = fitz.Rect(rect.x0, top, rect.x1, top + band_rows * 72.0 / dpi) & rect
+            if clip.is_empty:
+                break
+            with self._lock:
+                pix = display_list.get_pixmap(matrix=matrix, clip=clip, colorspace=fitz.csRGB,
+                                              alpha=False)
+            bands.append((pix.x, pix.y, _pixmap_to_image(pix)))
+        x0 = min(x for x, _, _ in bands)
+        y0 = min(y for _, y, _ in bands)
+        width = max(x + band.width for x, _, band in bands) - x0
+        height = max(y + band.height for _, y, band in bands) - y0
+        image = Image.new("RGB", (width, height))
+        for x, y, band in bands:
+            image.paste(band, (x - x0, y - y0))
+        return image
+
+    def get_tile(self, page_number, dpi, column, row, tile_size=TILE_SIZE):
+        """Render one tile_size square of the page at dpi; column/row count from the top left"""
+        page_index = page_number - 1
+        with self._lock:
+            key = self._key(page_index, dpi) + (column, row, tile_size)
+            image = self._tiles.get(key)
+            if image is None:
+                page = self.document[page_index]
+                rect = page.rect
+                scale = 72.0 / dpi
+                clip = fitz.Rect(rect.x0 + column * tile_size * scale,
+                                 rect.y0 + row * tile_size * scale,
+                                 rect.x0 + (column + 1) * tile_size * scale,
+                                 rect.y0 + (row + 1) * tile_size * scale) & rect
+                pix = page.get_pixmap(dpi=int(dpi), clip=clip, colorspace=fitz.csRGB,
+                                      alpha=False)
+                image = _pixmap_to_image(pix)
+                self._tiles.put(key, image)
+            return image
+
+    def invalidate(self, page_number):
+        """Drop every cached raster of one page (after it was rotated or edited)"""
+        with self._lock:
+            self._generation += 1
+            self._pages.drop_page(page_number - 1)
+            self._tiles.drop_page(page_number - 1)
+
+    def clear(self):
+        """Drop everything (after pages were deleted or reordered)"""
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+            self._tiles.clear()
+
+    def locked(self):
+        """The document lock, to hold while editing or saving the document elsewhere"""
+        return self._lock
+
+
+class PagePrefetcher:
+    """Background thread that renders pages into a PageRasterCache ahead of time
+
+    Requests for the page on screen jump the queue; neighbouring pages are
+    rendered afterwards so flipping forwards or backwards finds them cached.
+    """
+
+    def __init__(self, rasters):
+        self.rasters = rasters
+        self._pending = deque()
+        self._callbacks = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, page_number, dpi, callback=None):
+        """Render the on-screen page next; callback(image) runs on the worker thread
+
+        Only one page is on screen at a time, so an earlier request that has
+        not started yet is dropped along with its callback.
+        """
+        with self._condition:
+            key = (page_number, dpi)
+            for stale in list(self._callbacks):
+                self._pending.remove(stale)
+            self._callbacks.clear()
+            if key in self._pending:
+                self._pending.remove(key)
+            self._pending.appendleft(key)
+            if callback:
+                self._callbacks[key] = [callback]
+            self._condition.notify()
+
+    def prefetch_around(self, page_number, total_pages, dpi, radius=PREFETCH_RADIUS):
+        """Queue the neighbours of page_number, nearest first, replacing older prefetches"""
+        with self._condition:
+            # Keep explicit requests (those with callbacks), drop stale prefetches
+            self._pending = deque(key for key in self._pending if key in self._callbacks)
+            for distance in range(1, radius + 1):
+                for neighbour in (page_number + distance, page_number - distance):
+                    key = (neighbour, dpi)
+                    if 1 <= neighbour <= total_pages and key not in self._pending:
+                        self._pending.append(key)
+            self._condition.notify()
+
+    def stop(self):
+        """Stop the worker thread; pending renders are dropped"""
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._callbacks.clear()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                key = self._pending.popleft()
+                callbacks = self._callbacks.pop(key, [])
+            page_number, dpi = key
+            try:
+                # In bands, so renders on the Tk thread get the document in between
+                image = self.rasters.get(page_number, dpi, band_pixels=BAND_PIXELS)
+            except Exception:
+                # Page vanished (deleted) or the document was closed
+                continue
+            for callback in callbacks:
+                callback(image)
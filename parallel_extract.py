@@ -0,0 +1,405 @@
+# Shards documents and page ranges across a process pool and merges the
+# per-page results back in page order.
+
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import conversion_profile
+import tabula_session
+from conversion_profile import ConversionProfile, report_path_for
+from extraction_engine import (ConversionCancelled, cache_settings, count_pages,
+                               extract_page_tables, normalize_engine, output_path_for,
+                               parse_page_range)
+from ocr_engine import DEFAULT_DPI
+from table_stitcher import TableStitcher
+from table_types import normalize_table
+from table_writer import TableWriter
+
+DEFAULT_PAGES_PER_SHARD = 8
+CANCEL_POLL = 0.25   # seconds between checks of the cancel event while shards run
+
+
+def default_workers():
+    """Number of worker processes to use when none is configured"""
+    return max(1, os.cpu_count() or 1)
+
+
+def plan_shards(documents, pages_per_shard=DEFAULT_PAGES_PER_SHARD):
+    """Split [(pdf_path, [pages])] into (pdf_path, [pages]) shards of at most pages_per_shard pages"""
+    pages_per_shard = max(1, int(pages_per_shard))
+    shards = []
+    for pdf_path, page_numbers in documents:
+        for i in range(0, len(page_numbers), pages_per_shard):
+            shards.append((pdf_path, page_numbers[i:i + pages_per_shard]))
+    return shards
+
+
+# Stage records from worker start-up, handed back with the worker's first shard
+_startup_records = []
+
+
+def _init_worker(engine):
+    """Warm the per-process tabula JVM once, before the worker sees its first shard"""
+    # Ctrl+C reaches the whole process group; the parent decides when shards stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if normalize_engine(engine) in ("auto", "tabula") and tabula_session.jpype_available():
+        with conversion_profile.activate(ConversionProfile()) as recorder:
+            # None if the JVM cannot start here; shards then use tabula's subprocess path
+            tabula_session.start_session()
+        _startup_records.extend(recorder.records)
+
+
+def _portable_error(error):
+    """The error itself if it survives pickling, else a RuntimeError with its message
+
+    Some library exceptions (pytesseract's TesseractNotFoundError, for one)
+    cannot be rebuilt from their pickled form, which breaks the whole pool.
+    """
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(str(error) or type(error).__name__)
+
+
+def _extract_shard(pdf_path, page_numbers, options, profile=False):
+    """Worker entry point; must stay at module level so it can be pickled
+
+    Returns (page_results, stage records or None).
+    """
+    try:
+        if not profile:
+            return extract_page_tables(pdf_path, page_numbers, **options), None
+        with conversion_profile.activate(ConversionProfile()) as recorder:
+            page_results = extract_page_tables(pdf_path, page_numbers, **options)
+    except Exception as e:
+        raise _portable_error(e) from None
+    records = _startup_records + recorder.records
+    _startup_records.clear()
+    for record in records:
+        record['document'] = record['document'] or pdf_path
+    return page_results, records
+
+
+def _plan_segments(page_numbers, cached, pages_per_shard):
+    """Split a document's pages into runs of at most pages_per_shard that are all cached or all not"""
+    segments = []
+    for page in page_numbers:
+        is_cached = page in cached
+        if (segments and segments[-1][1] == is_cached
+                and len(segments[-1][0]) < pages_per_shard):
+            segments[-1][0].append(page)
+        else:
+            segments.append(([page], is_cached))
+    return segments
+
+
+def run_shards(documents, workers=1, pages_per_shard=DEFAULT_PAGES_PER_SHARD,
+               on_shard_done=None, on_pages_done=None, on_document_done=None, profile=None,
+               cancel=None, **options):
+    """Extract tables from many documents, sharding their pages across worker processes
+
+    documents is a list of (pdf_path, [page numbers]). on_shard_done(done, total, shard)
+    fires after every shard. on_pages_done(pdf_path, page_results) receives each
+    document's results in page order, one shard at a time, as soon as every earlier
+    page of that document is done; on_document_done(pdf_path, error) follows its last
+    pages (or its first error). Only shards that finish ahead of an earlier one are
+    held in memory, and at most 2 * workers shards are in flight or waiting.
+    With a ConversionProfile, every shard's stage records are added to it.
+    Once cancel (a threading.Event) is set no further shard is started, the
+    shards already running are finished (and checkpointed, with a Checkpoint
+    in options), and every unfinished document gets a ConversionCancelled.
+    """
+    pages_per_shard = max(1, int(pages_per_shard))
+    # Cached and checkpointed pages are read in the parent when their turn
+    # comes, so fully cached documents never start a worker
+    stores = [store for store in (options.get('checkpoint'), options.get('cache')) if store]
+    settings = cache_settings(options.get('engine', 'auto'), options.get('lattice', True),
+                              options.get('stream', True),
+                              options.get('ocr_dpi', DEFAULT_DPI),
+                              options.get('detect_areas', False))
+    plans = {}
+    shards = []
+    for pdf_path, page_numbers in documents:
+        cached = set()
+        for store in stores:
+            try:
+                cached |= store.cached_pages(pdf_path, page_numbers, settings)
+            except OSError:
+                pass
+        segments = _plan_segments(page_numbers, cached, pages_per_shard)
+        plans[pdf_path] = {'segments': segments, 'next': 0, 'finished': {}}
+        shards.extend((pdf_path, index) for index, (pages, is_cached) in enumerate(segments)
+                      if not is_cached)
+    total = len(shards)
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    def run_shard(pdf_path, page_numbers):
+        page_results, records = _extract_shard(pdf_path, page_numbers, options,
+                                               profile is not None)
+        if records:
+            profile.add(records)
+        return page_results
+
+    def deliver(pdf_path):
+        """Hand over every segment of a document that is next in page order"""
+        plan = plans[pdf_path]
+        segments = plan['segments']
+        while plan['next'] < len(segments):
+            index = plan['next']
+            pages, is_cached = segments[index]
+            if is_cached:
+                if cancelled():
+                    return
+                page_results = error = None
+                try:
+                    # Pages evicted since planning are simply re-extracted here
+                    page_results = run_shard(pdf_path, pages)
+                except Exception as e:
+                    error = e
+            elif index in plan['finished']:
+                page_results, error = plan['finished'].pop(index)
+            else:
+                return
+            if error is not None:
+                plan['next'] = len(segments) + 1  # ignore any shards still running
+                plan['finished'].clear()
+                if on_document_done:
+                    on_document_done(pdf_path, error)
+                return
+            if on_pages_done:
+                on_pages_done(pdf_path, page_results)
+            plan['next'] += 1
+        if plan['next'] == len(segments):
+            plan['next'] += 1
+            if on_document_done:
+                on_document_done(pdf_path, None)
+
+    def shard_finished(done, shard, page_results, error):
+        pdf_path, index = shard
+        if on_shard_done:
+            on_shard_done(done, total, (pdf_path, plans[pdf_path]['segments'][index][0]))
+        if plans[pdf_path]['next'] <= index:
+            plans[pdf_path]['finished'][index] = (page_results, error)
+            deliver(pdf_path)
+
+    def cancel_unfinished():
+        for pdf_path, plan in plans.items():
+            if plan['next'] <= len(plan['segments']):
+                plan['next'] = len(plan['segments']) + 1
+                plan['finished'].clear()
+                if on_document_done:
+                    on_document_done(pdf_path, ConversionCancelled())
+
+    for pdf_path, _ in documents:
+        deliver(pdf_path)
+
+    if workers <= 1 or total <= 1:
+        for done, shard in enumerate(shards, start=1):
+            if cancelled():
+                break
+            page_results = error = None
+            try:
+                page_results = run_shard(shard[0], plans[shard[0]]['segments'][shard[1]][0])
+            except Exception as e:
+                error = e
+            shard_finished(done, shard, page_results, error)
+        cancel_unfinished()
+        return
+
+    # spawn, not fork: a forked child would inherit a JVM it cannot use
+    window = 2 * min(workers, total)
+    with ProcessPoolExecutor(max_workers=min(workers, total),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(options.get('engine', 'auto'),)) as executor:
+        try:
+            queue = iter(shards)
+            futures = {}
+            done = 0
+            while True:
+                if cancelled():
+                    # Drop the shards still waiting for a worker; running ones finish
+                    for future in [future for future in futures if future.cancel()]:
+                        del futures[future]
+                    queue = iter(())
+                # Submit in order, but never run further ahead than the window
+                buffered = sum(len(plan['finished']) for plan in plans.values())
+                while len(futures) + buffered < window:
+                    shard = next(queue, None)
+                    if shard is None:
+                        break
+                    pages = plans[shard[0]]['segments'][shard[1]][0]
+                    futures[executor.submit(_extract_shard, shard[0], pages, options,
+                                            profile is not None)] = shard
+                if not futures:
+                    break
+                finished, _ = wait(futures, timeout=CANCEL_POLL if cancel is not None else None,
+                                   return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += 1
+                    page_results = error = None
+                    try:
+                        page_results, records = future.result()
+                        if records:
+                            profile.add(records)
+                    except Exception as e:
+                        error = e
+                    shard_finished(done, futures.pop(future), page_results, error)
+        except BaseException:
+            # Interrupted: leave the queued shards, so only running ones delay the exit
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    if options.get('cache'):
+        # The workers' copies of the cache store entries without evicting
+        options['cache'].trim()
+    cancel_unfinished()
+
+
+def convert_batch(pdf_paths, engine="auto", pages="all", lattice=True, stream=True,
+                  fmt="xlsx", output_dir=None, password=None, workers=1,
+                  pages_per_shard=DEFAULT_PAGES_PER_SHARD, on_result=None, on_progress=None,
+                  cache=None, ocr_dpi=DEFAULT_DPI, ocr_workers=None, normalize=True,
+                  stitch=True, profile=None, detect_areas=False, checkpoint=None, cancel=None):
+    """Convert many PDFs, never stopping on a single bad file
+
+    With stitch, tables continuing over consecutive pages are merged into one;
+    with normalize, column types (numbers, percentages, dates) are inferred
+    and converted before tables are written. With detect_areas only the ruled
+    table regions found by table_grid are parsed. on_result(pdf_path, output_path,
+    error) is called as each document completes and on_progress(done, total,
+    shard) after every page shard. With a ConversionProfile every stage is
+    timed and a <output>_profile.json report is written next to each output.
+    With a Checkpoint, every extracted page shard is kept on disk until its
+    document is written, so converting again after a cancel or crash resumes
+    where it stopped. Setting cancel (a threading.Event) stops the batch
+    after the shards already running; unfinished documents are reported to
+    on_result with a ConversionCancelled error and written nowhere.
+    Returns a dict with the lists of converted, empty, failed and cancelled files.
+    """
+    summary = {'converted': [], 'empty': [], 'failed': [], 'cancelled': []}
+    started = {}
+    settings = cache_settings(engine, lattice, stream, ocr_dpi, detect_areas)
+
+    def timed(name, pdf_path, pages=None):
+        if profile is None:
+            return nullcontext()
+        return profile.stage(name, document=pdf_path, pages=pages)
+
+    def record(pdf_path, output_path, error):
+        if isinstance(error, ConversionCancelled):
+            summary['cancelled'].append(pdf_path)
+        elif error is not None:
+            summary['failed'].append((pdf_path, str(error)))
+        elif output_path:
+            summary['converted'].append((pdf_path, output_path))
+        else:
+            summary['empty'].append(pdf_path)
+        if on_result:
+            on_result(pdf_path, output_path, error)
+
+    documents = []
+    for pdf_path in pdf_paths:
+        started[pdf_path] = time.perf_counter()
+        if cancel is not None and cancel.is_set():
+            record(pdf_path, None, ConversionCancelled())
+            continue
+        try:
+            with timed('count_pages', pdf_path):
+                page_numbers = parse_page_range(pages, count_pages(pdf_path, password))
+        except Exception as e:
+            record(pdf_path, None, e)
+            continue
+        if page_numbers:
+            documents.append((pdf_path, page_numbers))
+        else:
+            record(pdf_path, None, None)
+
+    # One streaming writer (and stitcher) per document, opened with its first table
+    writers = {}
+    stitchers = {}
+    write_errors = {}
+
+    def pages_done(pdf_path, page_results):
+        if pdf_path in write_errors:
+            return
+        try:
+            writer = writers.get(pdf_path)
+            if writer is None:
+                writer = writers[pdf_path] = TableWriter(
+                    output_path_for(pdf_path, fmt, output_dir), fmt,
+                    source_file=os.path.basename(pdf_path))
+                stitchers[pdf_path] = TableStitcher()
+            for page, tables in page_results:
+                if stitch:
+                    with timed('stitch', pdf_path, page):
+                        pieces = stitchers[pdf_path].feed(page, tables)
+                else:
+                    pieces = [(table, False) for table in tables]
+                for table, continues in pieces:
+                    if normalize:
+                        with timed('normalize', pdf_path, page):
+                            table = normalize_table(table)
+                    with timed('write', pdf_path, page):
+                        writer.write(table, page, continues)
+        except Exception as e:
+            write_errors[pdf_path] = e
+
+    def document_done(pdf_path, error):
+        writer = writers.pop(pdf_path, None)
+        stitchers.pop(pdf_path, None)
+        write_error = write_errors.pop(pdf_path, None)
+        error = error or write_error
+        output_path = None
+        if writer is not None:
+            if error is None:
+                try:
+                    with timed('finalize', pdf_path):
+                        output_path = writer.close()
+                except Exception as e:
+                    error = e
+            else:
+                writer.abort()
+        if checkpoint and error is None:
+            checkpoint.discard(pdf_path, document_pages[pdf_path], settings)
+        if profile is not None:
+            write_profile(pdf_path, output_path, error)
+        record(pdf_path, output_path, error)
+
+    def write_profile(pdf_path, output_path, error):
+        path = report_path_for(output_path_for(pdf_path, fmt, output_dir))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profile.write_report(path, document=pdf_path, source=pdf_path, output=output_path,
+                                 error=str(error) if error else None, engine=engine,
+                                 format=fmt, workers=workers,
+                                 elapsed=time.perf_counter() - started[pdf_path])
+        except OSError:
+            # A missing report must not fail the conversion itself
+            pass
+
+    if ocr_workers is None:
+        # Share the cores between shard processes and their tesseract threads
+        ocr_workers = max(1, default_workers() // max(1, workers))
+
+    document_pages = dict(documents)
+    try:
+        run_shards(documents, workers=workers, pages_per_shard=pages_per_shard,
+                   on_shard_done=on_progress, on_pages_done=pages_done,
+                   on_document_done=document_done, cancel=cancel,
+                   engine=engine, lattice=lattice, stream=stream, password=password,
+                   cache=cache, ocr_dpi=ocr_dpi, ocr_workers=ocr_workers,
+                   detect_areas=detect_areas, checkpoint=checkpoint, profile=profile)
+    except BaseException:
+        # Interrupted outright (a second Ctrl+C): no half-written outputs
+        for writer in writers.values():
+            writer.abort()
+        raise
+    return summary
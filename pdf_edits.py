@@ -0,0 +1,75 @@
+# Apply the GUI's pending edits to the open PyMuPDF document and save it.
+# Saving back to the file the document was opened from is an incremental
+# update: only changed objects (the edited pages, new annotations, the page
+# tree after deletions or rotations) are appended to the end of the file, so
+# a one-note edit of a 1 GB scan writes a few kilobytes.
+#
+# Annotation dicts carry their position in PDF points on the unrotated page,
+# so they stay put when the page is rotated later; bbox is what the
+# AnnotationStore indexes:
+#   {'type': 'text', 'page': 3, 'coords': (x, y), 'text': ..., 'bbox': ...}
+#   {'type': 'note', 'page': 3, 'coords': (x, y), 'text': ..., 'bbox': ...}
+#   {'type': 'highlight', 'page': 3, 'coords': (x0, y0, x1, y1), 'bbox': ...}
+#   {'type': 'draw', 'page': 3, 'points': [(x, y), ...], 'bbox': ...}
+#   {'type': 'image', 'page': 3, 'rect': (x0, y0, x1, y1), 'path': ..., 'bbox': ...}
+
+import os
+
+import fitz  # PyMuPDF
+
+TEXT_SIZE = 11
+IMAGE_WIDTH = 200   # points; inserted images keep their aspect ratio
+
+
+def apply_annotation(doc, annotation):
+    """Write one annotation dict into its page of doc"""
+    page = doc[annotation['page'] - 1]
+    kind = annotation['type']
+    # Text and images are turned with the page so they read upright as shown
+    if kind == 'text':
+        page.insert_text(annotation['coords'], annotation['text'], fontsize=TEXT_SIZE,
+                         rotate=page.rotation)
+    elif kind == 'note':
+        page.add_text_annot(annotation['coords'], annotation['text'])
+    elif kind == 'highlight':
+        page.add_highlight_annot(fitz.Rect(annotation['coords']))
+    elif kind == 'draw':
+        points = [tuple(point) for point in annotation['points']]
+        if len(points) > 1:
+            page.add_ink_annot([points])
+    elif kind == 'image':
+        page.insert_image(fitz.Rect(annotation['rect']), filename=annotation['path'],
+                          rotate=page.rotation)
+    else:
+        raise ValueError(f"Unknown annotation type: {kind}")
+
+
+def save_document(doc, annotations=(), output_path=None):
+    """Apply annotations to doc and save it; returns True if the save was incremental
+
+    Without output_path (or with the document's own path) the changes are
+    appended to the original file. Anywhere else, or when the document
+    cannot take an incremental update (repaired on opening, new, ...), the
+    whole file is written, compacted, to a temporary file and moved into
+    place. Replacing the document's own file closes doc (Windows cannot
+    replace an open file), so the caller must reopen it.
+    """
+    for annotation in annotations:
+        apply_annotation(doc, annotation)
+    same_file = output_path is None or (
+        doc.name and os.path.abspath(output_path) == os.path.abspath(doc.name))
+    if same_file and doc.can_save_incrementally():
+        doc.save(doc.name, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        return True
+    target = doc.name if same_file else output_path
+    temp_path = target + '.tmp'
+    try:
+        doc.save(temp_path, garbage=3, deflate=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        if same_file:
+            doc.close()
+        os.replace(temp_path, target)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return False
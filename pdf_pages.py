@@ -0,0 +1,173 @@
+# Split and merge PDFs with PyMuPDF page-range copies (Document.insert_pdf).
+# Each output is built from whole page ranges of its source and written once,
+# shared fonts and images are copied once per output, and merges open one
+# input at a time. Headless like extraction_engine, so the GUI can run these
+# on a worker thread.
+
+import os
+import re
+
+import fitz  # PyMuPDF
+
+from document_handle import open_document
+
+SPLIT_MODES = ["pages", "bookmarks", "size"]
+# Keys that point from a page back up the tree or to other pages' annotations
+_BACK_REFERENCES = re.compile(r"/(?:Parent|P)\s+\d+\s+0\s+R")
+_REFERENCE = re.compile(r"\b(\d+)\s+0\s+R\b")
+
+
+def _safe_name(text, limit=60):
+    name = re.sub(r'[\\/:*?"<>|\s]+', '_', text).strip('._')
+    return name[:limit] or "untitled"
+
+
+def ranges_by_page_count(page_count, pages_per_file):
+    """[(first, last), ...] 0-based inclusive ranges of at most pages_per_file pages"""
+    pages_per_file = max(1, int(pages_per_file))
+    return [(start, min(start + pages_per_file, page_count) - 1)
+            for start in range(0, page_count, pages_per_file)]
+
+
+def ranges_by_bookmarks(doc, level=1):
+    """[(first, last, title), ...] starting a range at every bookmark of the given level
+
+    Pages before the first bookmark form their own range; bookmarks pointing
+    to the same page as the previous one are folded into it.
+    """
+    starts = []
+    for entry_level, title, page in doc.get_toc(simple=True):
+        if entry_level == level and page >= 1 and (not starts or page - 1 > starts[-1][0]):
+            starts.append((page - 1, title))
+    if not starts:
+        return [(0, len(doc) - 1, "all")]
+    if starts[0][0] > 0:
+        starts.insert(0, (0, "front"))
+    ends = [start for start, _ in starts[1:]] + [len(doc)]
+    return [(start, end - 1, title) for (start, title), end in zip(starts, ends)]
+
+
+def _page_objects(doc, page_index, page_xrefs, sizes):
+    """xrefs of every object a page needs (contents, fonts, images...), not other pages"""
+    found = set()
+    pending = [doc[page_index].xref]
+    while pending:
+        xref = pending.pop()
+        if xref in found or xref <= 0:
+            continue
+        found.add(xref)
+        source = doc.xref_object(xref, compressed=True)
+        if xref not in sizes:
+            length = len(source)
+            if doc.xref_is_stream(xref):
+                length += len(doc.xref_stream_raw(xref) or b'')
+            sizes[xref] = length
+        for match in _REFERENCE.finditer(_BACK_REFERENCES.sub('', source)):
+            ref = int(match.group(1))
+            if ref not in page_xrefs:
+                pending.append(ref)
+    return found
+
+
+def ranges_by_size(doc, max_bytes):
+    """[(first, last), ...] ranges whose output should stay under max_bytes
+
+    Each page's size is estimated from the compressed objects it uses; an
+    object shared by several pages of one range (a font, a logo) counts once.
+    A single page larger than max_bytes still gets a range of its own.
+    """
+    page_xrefs = {page.xref for page in doc}
+    sizes = {}
+    ranges = []
+    start = 0
+    objects = set()
+    size = 0
+    for index in range(len(doc)):
+        page_objects = _page_objects(doc, index, page_xrefs, sizes)
+        added = sum(sizes[xref] for xref in page_objects - objects)
+        if index > start and size + added > max_bytes:
+            ranges.append((start, index - 1))
+            start, objects, size = index, set(), 0
+            added = sum(sizes[xref] for xref in page_objects)
+        objects |= page_objects
+        size += added
+    if len(doc):
+        ranges.append((start, len(doc) - 1))
+    return ranges
+
+
+def _range_toc(toc, first, last):
+    """Bookmarks pointing into pages first..last, renumbered for an output starting at first"""
+    entries = [[level, title, page - first] for level, title, page in toc
+               if first + 1 <= page <= last + 1]
+    # A table of contents must start at level 1 and never skip a level
+    result = []
+    for level, title, page in entries:
+        level = min(level, result[-1][0] + 1 if result else 1)
+        result.append([level, title, page])
+    return result
+
+
+def split_pdf(pdf_path, output_dir, mode="pages", value=1, password=None, on_progress=None):
+    """Split a PDF into several; returns the list of written paths
+
+    mode "pages" writes value pages per file, "bookmarks" one file per
+    bookmark of level value (default 1) and "size" files of at most about
+    value bytes. on_progress(done, total) is called after every file.
+    """
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode: {mode}")
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    with open_document(pdf_path, password) as handle:
+        doc = handle.doc
+        if mode == "bookmarks":
+            ranges = ranges_by_bookmarks(doc, int(value or 1))
+            names = [f"{stem}_{n:02d}_{_safe_name(title)}.pdf"
+                     for n, (_, _, title) in enumerate(ranges, 1)]
+            ranges = [(first, last) for first, last, _ in ranges]
+        else:
+            if mode == "pages":
+                ranges = ranges_by_page_count(len(doc), value)
+            else:
+                ranges = ranges_by_size(doc, int(value))
+            names = [f"{stem}_page_{first + 1}.pdf" if first == last
+                     else f"{stem}_pages_{first + 1}-{last + 1}.pdf" for first, last in ranges]
+        toc = doc.get_toc(simple=True)
+        for done, ((first, last), name) in enumerate(zip(ranges, names), 1):
+            with fitz.open() as part:
+                part.insert_pdf(doc, from_page=first, to_page=last)
+                part.set_toc(_range_toc(toc, first, last))
+                path = os.path.join(output_dir, name)
+                part.save(path, garbage=3, deflate=True)
+            written.append(path)
+            if on_progress:
+                on_progress(done, len(ranges))
+    return written
+
+
+def merge_pdfs(pdf_paths, output_path, password=None, on_progress=None):
+    """Concatenate PDFs into output_path; returns output_path
+
+    Inputs are opened one at a time and closed once their pages are copied.
+    Each input becomes a top-level bookmark holding its own bookmarks, and
+    identical objects (fonts or images embedded in several inputs) are
+    stored once in the output. on_progress(done, total) follows every input.
+    """
+    toc = []
+    with fitz.open() as merged:
+        for done, pdf_path in enumerate(pdf_paths, 1):
+            with open_document(pdf_path, password) as handle:
+                doc = handle.doc
+                offset = len(merged)
+                merged.insert_pdf(doc)
+                toc.append([1, os.path.splitext(os.path.basename(pdf_path))[0], offset + 1])
+                toc += [[level + 1, title, page + offset]
+                        for level, title, page in doc.get_toc(simple=True) if page >= 1]
+            if on_progress:
+                on_progress(done, len(pdf_paths))
+        merged.set_toc(toc)
+        # garbage=4 also merges duplicate objects across the inputs
+        merged.save(output_path, garbage=4, deflate=True)
+    return output_path
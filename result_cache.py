@@ -0,0 +1,248 @@
+# On-disk cache of extracted tables, keyed by PDF content hash, page number and
+# extraction settings. Tables are stored as Arrow IPC (Feather) files so a hit
+# is a memory-mapped read instead of another tabula/camelot run. Checkpoint
+# uses the same layout for the pages of conversions still in progress.
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.pdf_table_extractor', 'cache')
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+TRIM_INTERVAL = 60.0  # seconds between size checks for entries stored by workers
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser('~'), '.pdf_table_extractor',
+                                      'checkpoints')
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's content, memoised per (path, size, mtime) for this process"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    with _digest_lock:
+        _digest_memo[memo_key] = digest.hexdigest()
+    return digest.hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ResultCache:
+    """Content-addressed page-level table cache with size-based LRU eviction
+
+    Each entry is a directory holding one Feather file per table plus meta.json.
+    The mtime of meta.json is the entry's last-used time.
+
+    Only the instance a process creates tracks the cache size and evicts.
+    Copies pickled into worker processes just store entries, since each of
+    them would otherwise walk the whole cache for its first put; the owning
+    process calls trim() after handing work out. With max_bytes=sys.maxsize
+    the size is never tracked at all.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self._size = None
+        self._tracks_size = self.max_bytes < sys.maxsize
+        self._trimmed_at = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        return {'cache_dir': self.cache_dir, 'max_bytes': self.max_bytes, '_size': None,
+                '_tracks_size': False, '_trimmed_at': None}
+
+    def page_key(self, digest, page, settings):
+        """Cache key for one page extracted with one set of settings (a JSON-able dict)"""
+        parts = json.dumps([CACHE_VERSION, digest, int(page), settings], sort_keys=True)
+        return hashlib.sha256(parts.encode()).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """Return the cached list of tables for a key, or None on a miss"""
+        entry = self._entry_dir(key)
+        meta_path = os.path.join(entry, 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            tables = []
+            for i, info in enumerate(meta['tables']):
+                table = pd.read_feather(os.path.join(entry, f'table_{i}.feather'))
+                table.columns = info['columns']
+                if table.columns.equals(pd.RangeIndex(len(table.columns))):
+                    # Unlabelled (camelot, OCR); the stitcher tells them apart by RangeIndex
+                    table.columns = pd.RangeIndex(len(table.columns))
+                table.attrs.update(info['attrs'])
+                tables.append(table)
+            os.utime(meta_path)  # mark as recently used
+            return tables
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, tables):
+        """Store a page's tables (possibly none) under a key"""
+        entry = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # Build the entry in a scratch directory and rename it into place, so
+        # readers in other worker processes never see a half-written entry
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(entry))
+        try:
+            meta = {'tables': []}
+            for i, table in enumerate(tables):
+                stored = table.reset_index(drop=True)
+                stored.columns = [str(c) for c in range(len(stored.columns))]
+                path = os.path.join(staging, f'table_{i}.feather')
+                try:
+                    stored.to_feather(path)
+                except (TypeError, ValueError, ImportError):
+                    # Mixed-type object columns: Arrow needs one type per column
+                    stored.astype('string').to_feather(path)
+                meta['tables'].append({
+                    'columns': [c if isinstance(c, (str, int, float)) else str(c)
+                                for c in table.columns],
+                    'attrs': {k: v for k, v in table.attrs.items()
+                              if isinstance(v, (str, int, float, list, tuple))},
+                })
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            entry_size = _dir_size(staging) if self._tracks_size else 0
+            try:
+                os.replace(staging, entry)
+            except OSError:
+                # Another worker stored the same page first; keep theirs
+                shutil.rmtree(staging, ignore_errors=True)
+                return
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if not self._tracks_size:
+            return
+        if self._size is None:
+            self._size = _dir_size(self.cache_dir)
+        else:
+            self._size += entry_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def trim(self, interval=TRIM_INTERVAL):
+        """Evict if entries stored by worker processes took the cache over max_bytes
+
+        Walks the cache at most once per interval seconds.
+        """
+        if not self._tracks_size:
+            return
+        now = time.monotonic()
+        if self._trimmed_at is not None and now - self._trimmed_at < interval:
+            return
+        self._trimmed_at = now
+        self._size = _dir_size(self.cache_dir)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_ratio=0.9):
+        """Delete least recently used entries until the cache fits in target_ratio * max_bytes"""
+        entries = []
+        total = 0
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                entry = os.path.join(shard_dir, key)
+                if key.startswith('.tmp-'):
+                    continue
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry, 'meta.json'))
+                except OSError:
+                    last_used = 0
+                size = _dir_size(entry)
+                entries.append((last_used, size, entry))
+                total += size
+
+        target = self.max_bytes * target_ratio
+        for _, size, entry in sorted(entries):
+            if total <= target:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+        self._size = total
+
+    def clear(self):
+        """Remove every cached entry"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = 0
+
+    def cached_pages(self, pdf_path, page_numbers, settings):
+        """Return the set of pages that have an entry, without reading any tables"""
+        digest = file_digest(pdf_path)
+        return {page for page in page_numbers
+                if os.path.exists(os.path.join(
+                    self._entry_dir(self.page_key(digest, page, settings)), 'meta.json'))}
+
+    def get_pages(self, pdf_path, page_numbers, settings):
+        """Look up several pages; returns {page: [tables]} for the hits only"""
+        digest = file_digest(pdf_path)
+        hits = {}
+        for page in page_numbers:
+            tables = self.get(self.page_key(digest, page, settings))
+            if tables is not None:
+                hits[page] = tables
+        return hits
+
+    def put_pages(self, pdf_path, page_results, settings):
+        """Store [(page, [tables]), ...] for one document"""
+        digest = file_digest(pdf_path)
+        for page, tables in page_results:
+            self.put(self.page_key(digest, page, settings), tables)
+
+
+class Checkpoint(ResultCache):
+    """Pages already extracted by conversions that have not finished yet
+
+    Stored like the cache, but never evicted: a conversion that is cancelled,
+    fails or dies with its process resumes from these pages when it is run
+    again with the same settings, and discards them once its output is
+    written.
+    """
+
+    def __init__(self, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        super().__init__(checkpoint_dir, max_bytes=sys.maxsize)
+
+    def discard(self, pdf_path, page_numbers, settings):
+        """Remove a document's pages, once they are no longer needed"""
+        try:
+            digest = file_digest(pdf_path)
+        except OSError:
+            return  # the PDF is gone; its entries can no longer be matched anyway
+        for page in page_numbers:
+            shutil.rmtree(self._entry_dir(self.page_key(digest, page, settings)),
+                          ignore_errors=True)
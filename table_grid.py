@@ -0,0 +1,133 @@
+# Ruled-table detection on rendered pages with OpenCV. Horizontal and
+# vertical rulings are isolated with morphological openings, joined into
+# grids by connected components, and each grid's row and column lines are
+# found by clustering mask projections with NumPy. The regions are handed to
+# tabula (area), camelot (table_areas) and PyMuPDF (clip), so they parse only
+# the tables and not the whole page. Borderless tables have no rulings and
+# are not found here; their pages are still read whole.
+
+import numpy as np
+
+from conversion_profile import stage
+from document_handle import open_document
+
+DETECT_DPI = 100
+MIN_LINE_FRACTION = 1 / 30   # shortest ruling, as a share of the page's smaller side
+MIN_TABLE_POINTS = 30        # narrower or shorter grids are boxes or underlines
+LINE_GAP_POINTS = 3          # parallel rulings closer than this are one line
+AREA_MARGIN = 2              # points; keeps a grid's outer rulings inside a clipped area
+
+
+def line_masks(gray, min_length):
+    """Binary masks of the horizontal and vertical rulings in a greyscale page image"""
+    import cv2
+
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                   cv2.THRESH_BINARY_INV, 15, 10)
+    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (min_length, 1)))
+    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                cv2.getStructuringElement(cv2.MORPH_RECT, (1, min_length)))
+    # Close the one-pixel gaps antialiasing leaves where rulings cross
+    joint = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    return cv2.dilate(horizontal, joint), cv2.dilate(vertical, joint)
+
+
+def cluster_lines(projection, min_length, max_gap):
+    """Centres of the runs of indices where projection >= min_length (runs split at gaps > max_gap)"""
+    indices = np.flatnonzero(projection >= min_length)
+    if not len(indices):
+        return indices.astype(float)
+    breaks = np.flatnonzero(np.diff(indices) > max_gap)
+    starts = indices[np.r_[0, breaks + 1]]
+    ends = indices[np.r_[breaks, len(indices) - 1]]
+    return (starts + ends) / 2.0
+
+
+def grid_cells(rows, columns):
+    """(n, 4) array of x0, y0, x1, y1 for every cell between consecutive row and column lines"""
+    x0, y0 = np.meshgrid(columns[:-1], rows[:-1])
+    x1, y1 = np.meshgrid(columns[1:], rows[1:])
+    return np.column_stack([x0.ravel(), y0.ravel(), x1.ravel(), y1.ravel()])
+
+
+def detect_grids(gray, dpi=DETECT_DPI):
+    """Find ruled tables in a greyscale page image rendered at dpi
+
+    Returns a list of dicts in PDF points (origin top left of the page as
+    rendered), top to bottom: bbox (x0, y0, x1, y1), rows and columns (line
+    positions) and cells (an (n, 4) array), all NumPy arrays.
+    """
+    import cv2
+
+    scale = 72.0 / dpi
+    min_length = max(10, int(min(gray.shape) * MIN_LINE_FRACTION))
+    horizontal, vertical = line_masks(gray, min_length)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(horizontal | vertical,
+                                                               connectivity=8)
+    min_size = MIN_TABLE_POINTS / scale
+    candidates = np.flatnonzero((stats[:, cv2.CC_STAT_WIDTH] >= min_size)
+                                & (stats[:, cv2.CC_STAT_HEIGHT] >= min_size))
+    max_gap = max(1, int(LINE_GAP_POINTS / scale))
+    grids = []
+    for label in candidates[candidates > 0]:  # label 0 is the background
+        x, y, width, height = stats[label, :4]
+        inside = labels[y:y + height, x:x + width] == label
+        rows = cluster_lines(((horizontal[y:y + height, x:x + width] > 0) & inside).sum(axis=1),
+                             min_length, max_gap)
+        columns = cluster_lines(((vertical[y:y + height, x:x + width] > 0) & inside).sum(axis=0),
+                                min_length, max_gap)
+        if len(rows) < 2 or len(columns) < 2 or len(rows) + len(columns) < 5:
+            continue  # a plain box or a single divider, not a table
+        rows = (rows + y) * scale
+        columns = (columns + x) * scale
+        grids.append({'bbox': np.array([columns[0], rows[0], columns[-1], rows[-1]]),
+                      'rows': rows, 'columns': columns, 'cells': grid_cells(rows, columns)})
+    grids.sort(key=lambda grid: grid['bbox'][1])
+    return grids
+
+
+def detect_page(page, dpi=DETECT_DPI):
+    """detect_grids for one fitz page, offset by the page's origin"""
+    from ocr_engine import render_page
+
+    with stage('grid_detect', pages=page.number + 1, dpi=dpi):
+        grids = detect_grids(np.ascontiguousarray(render_page(page, dpi)), dpi)
+    origin = np.array([page.rect.x0, page.rect.y0] * 2)
+    for grid in grids:
+        grid['bbox'] = grid['bbox'] + origin
+        grid['rows'] = grid['rows'] + page.rect.y0
+        grid['columns'] = grid['columns'] + page.rect.x0
+        grid['cells'] = grid['cells'] + origin
+    return grids
+
+
+def detect_table_areas(pdf_path, page_numbers, password=None, dpi=DETECT_DPI):
+    """{page: [(x0, y0, x1, y1), ...]} of the ruled tables on each page, in PDF points
+
+    The rectangles run exactly along the outer rulings (what camelot's
+    table_areas expects); see pad_areas for extractors that clip the page.
+    Rotated pages and pages without a grid are left out, so extractors read
+    them whole as before.
+    """
+    areas = {}
+    with open_document(pdf_path, password, lock=False) as handle:
+        for page_number in page_numbers:
+            with handle.lock:
+                page = handle.page(page_number)
+                if page.rotation:
+                    continue
+                grids = detect_page(page, dpi)
+            if grids:
+                areas[page_number] = [tuple(float(v) for v in grid['bbox']) for grid in grids]
+    return areas
+
+
+def pad_areas(areas, margin=AREA_MARGIN):
+    """detect_table_areas output with every rectangle grown by margin points
+
+    tabula and PyMuPDF crop the page to the area, which would cut the outer
+    rulings (and so the first and last rows and columns) off a tight box.
+    """
+    return {page: [(x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+                   for x0, y0, x1, y1 in rects] for page, rects in (areas or {}).items()}
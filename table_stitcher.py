@@ -0,0 +1,128 @@
+# Cross-page table stitching. A table that runs over many pages comes back
+# from every extractor as one table per page, usually with the header row
+# repeated on each. The stitcher decides, page by page as results stream in,
+# whether the first table on a page continues the last table of the previous
+# page, and turns continuations into plain rows under the original header.
+# Only the header and position of the last table are remembered, never rows.
+
+import re
+
+import pandas as pd
+
+X_TOLERANCE = 15.0  # points; continuation tables start and end at the same x positions
+
+
+def _label(value):
+    """Comparable form of a header cell: whitespace-collapsed, lower case, '' for blanks"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    text = re.sub(r'\s+', ' ', str(value)).strip().lower()
+    return '' if text.startswith('unnamed:') else text
+
+
+def _has_labels(table):
+    """True if the header row became the column labels (tabula, PyMuPDF), not row 0 (camelot, OCR)"""
+    return not isinstance(table.columns, pd.RangeIndex)
+
+
+def _header_row(table):
+    """The column labels turned back into cell values, undoing pandas' 'Unnamed: n' and '.n' renames"""
+    row = []
+    seen = set()
+    for label in table.columns:
+        text = str(label)
+        if text.startswith('Unnamed:'):
+            row.append(None)
+            continue
+        base = re.sub(r'\.\d+$', '', text)
+        row.append(base if base != text and base in seen else text)
+        seen.add(row[-1])
+    return row
+
+
+def header_signature(table):
+    """Normalised header of a table, from its labels or else its first row"""
+    if _has_labels(table):
+        return tuple(_label(c) for c in table.columns)
+    if len(table):
+        return tuple(_label(v) for v in table.iloc[0])
+    return None
+
+
+def _x_range(table):
+    bbox = table.attrs.get('bbox')
+    return (float(bbox[0]), float(bbox[2])) if bbox else None
+
+
+class TableStitcher:
+    """Merge tables that continue across consecutive pages, one page at a time
+
+    feed() takes a page's tables in page order and returns (table, continues)
+    pairs. continues=True means the table holds more rows for the previous
+    logical table: its columns are renamed to that table's and any repeated
+    header row is removed, so writers can simply append it.
+
+    The first table on a page continues the last table of the previous page if
+    both have the same number of columns and either repeat the same header or,
+    when neither repeats it, both span the same x positions on their pages.
+    """
+
+    def __init__(self, x_tolerance=X_TOLERANCE):
+        self.x_tolerance = x_tolerance
+        self._open = None
+
+    def _aligned(self, table):
+        ours, theirs = self._open['x_range'], _x_range(table)
+        if ours is None or theirs is None:
+            return False
+        return (abs(ours[0] - theirs[0]) <= self.x_tolerance
+                and abs(ours[1] - theirs[1]) <= self.x_tolerance)
+
+    def _continuation(self, page, table):
+        """The table as rows of the open logical table, or None if it starts a new one"""
+        open_table = self._open
+        if (open_table is None or page != open_table['page'] + 1
+                or table.shape[1] != len(open_table['columns'])):
+            return None
+        signature = open_table['signature']
+        repeats_header = signature is not None and header_signature(table) == signature
+
+        if _has_labels(table):
+            if repeats_header:
+                piece = table
+            elif self._aligned(table):
+                # No header on this page, so its first data row became the labels
+                header_row = pd.DataFrame([_header_row(table)])
+                piece = pd.concat([header_row, table.set_axis(range(table.shape[1]), axis=1)],
+                                  ignore_index=True)
+            else:
+                return None
+        else:
+            if repeats_header:
+                piece = table.iloc[1:]
+            elif self._aligned(table):
+                piece = table
+            else:
+                return None
+        piece = piece.set_axis(open_table['columns'], axis=1).reset_index(drop=True)
+        piece.attrs = dict(table.attrs)
+        return piece
+
+    def feed(self, page, tables):
+        """Return [(table, continues), ...] for one page's tables"""
+        pieces = []
+        last = None
+        for position, table in enumerate(tables):
+            piece = self._continuation(page, table) if position == 0 else None
+            if piece is not None:
+                if len(piece):
+                    pieces.append((piece, True))
+                # The logical table keeps its header; only position and page move on
+                last = dict(self._open, page=page, x_range=_x_range(table) or self._open['x_range'])
+            else:
+                pieces.append((table, False))
+                last = {'page': page, 'columns': list(table.columns),
+                        'signature': header_signature(table), 'x_range': _x_range(table)}
+        # A page without tables ends any table running over from earlier pages
+        self._open = last
+        return pieces
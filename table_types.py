@@ -0,0 +1,154 @@
+# Post-extraction type inference. Extractors return every cell as text; this
+# stage decides per column whether it holds numbers, percentages or dates and
+# converts the whole column at once with pandas string and NumPy operations.
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+CURRENCY_SYMBOLS = "$€£¥₹"
+
+# Optional brackets, sign, currency symbol, the digits, percent sign and
+# trailing sign ("12.00-" in ledgers), in any sensible combination
+NUMBER_PATTERN = (
+    r"^(?P<open>\()?\s*(?P<lead_sign>[-−+])?\s*(?P<currency>[" + CURRENCY_SYMBOLS + r"])?"
+    r"\s*(?P<inner_sign>[-−+])?\s*(?P<digits>[\d.,]*\d[\d.,]*)\s*(?P<percent>%)?"
+    r"\s*(?P<trailing_currency>[" + CURRENCY_SYMBOLS + r"])?\s*(?P<trail_sign>[-−])?"
+    r"\s*(?P<close>\))?$"
+)
+# 1,234,567.89 / 1234.5 / .5  and  1.234.567,89 / 1234,5
+POINT_DECIMAL = r"^(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?$|^\.\d+$"
+COMMA_DECIMAL = r"^(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?$"
+
+DATE_FORMATS = ["ISO8601", None, "dayfirst"]
+
+
+def _text(column):
+    """Column as stripped strings with blanks as NA (Arrow-backed, so str ops run in C++)"""
+    try:
+        text = column.astype('string[pyarrow]').str.strip()
+    except ImportError:
+        text = column.astype('string').str.strip()
+    return text.mask(text == '')
+
+
+def parse_numbers(text):
+    """Parse stripped strings (NA for blanks) as numbers
+
+    Returns an Int64 Series for whole numbers written without decimals, a
+    float64 Series otherwise (NA/NaN for blanks), or None if any non-blank
+    cell is not a number or the column looks like zero-padded identifiers.
+    """
+    present = text.notna()
+    cells = text[present]
+    # Cheap whole-column checks first; text columns usually fail on the first one
+    if not cells.str.fullmatch(NUMBER_PATTERN).all():
+        return None
+    bracketed = cells.str.startswith('(')
+    if (bracketed != cells.str.endswith(')')).any():
+        return None
+    # The pattern only allows these characters inside the number itself
+    digits = cells.str.replace(r"[^\d.,]", '', regex=True)
+    if digits.str.match(r"^0\d").any():
+        return None  # account numbers, references, ...
+
+    if digits.str.match(POINT_DECIMAL).all():
+        digits = digits.str.replace(',', '', regex=False)
+    elif digits.str.match(COMMA_DECIMAL).all():
+        digits = digits.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    else:
+        return None
+
+    values = pd.to_numeric(digits, errors='coerce').astype('float64')
+    if values.isna().any():
+        return None
+    negative = (bracketed | cells.str.contains(r"[-−]", regex=True)).to_numpy(dtype=bool)
+    percent = cells.str.contains('%', regex=False).to_numpy(dtype=bool)
+    values = values.where(~negative, -values)
+    values = values.where(~percent, values / 100)
+
+    result = pd.Series(np.nan, index=text.index, dtype='float64')
+    result[present] = values.to_numpy()
+    if (not percent.any() and not digits.str.contains('.', regex=False).any()
+            and values.abs().max() < 2 ** 53):
+        return result.astype('Int64')
+    return result
+
+
+def parse_dates(text):
+    """Parse stripped strings (NA for blanks) as dates; returns datetime64 or None"""
+    present = text.notna()
+    values = text[present]
+    # Dates need a digit and a separator; this also keeps bare years out
+    if not (values.str.contains(r"\d", regex=True).all()
+            and values.str.contains(r"[-/.\s]", regex=True).all()):
+        return None
+    for date_format in DATE_FORMATS:
+        with warnings.catch_warnings():
+            # "Could not infer format" for the element-wise fallback
+            warnings.simplefilter('ignore', UserWarning)
+            if date_format == "dayfirst":
+                parsed = pd.to_datetime(values, errors='coerce', dayfirst=True)
+            else:
+                parsed = pd.to_datetime(values, errors='coerce', format=date_format)
+        if parsed.notna().all():
+            result = pd.Series(pd.NaT, index=text.index, dtype=parsed.dtype)
+            result[present] = parsed.to_numpy()
+            return result
+    return None
+
+
+def normalize_column(column):
+    """Return the column converted to Int64, float64 or datetime64 if every cell fits, else unchanged"""
+    if column.dtype != object and not pd.api.types.is_string_dtype(column.dtype):
+        return column
+    text = _text(column)
+    if text.isna().all():
+        return column
+
+    numbers = parse_numbers(text)
+    if numbers is not None:
+        return numbers
+
+    dates = parse_dates(text)
+    if dates is not None:
+        return dates
+    return column
+
+
+def _normalize_below_header(column):
+    """normalize_column for the cells under a header kept in row 0 (camelot, OCR)
+
+    The header cell stays text, so a converted column holds the header
+    followed by numbers or dates as one object column.
+    """
+    cells = column.iloc[1:]
+    converted = normalize_column(cells)
+    if converted is cells:
+        return column
+    result = column.astype(object)
+    result.iloc[1:] = converted.astype(object).to_numpy()
+    return result
+
+
+def normalize_table(table):
+    """Infer and convert the type of every column of one table (attrs such as bbox are kept)
+
+    Tables without column labels (camelot, OCR) have their header in row 0;
+    a column that does not convert as a whole is tried again without it.
+    """
+    normalized = table.copy()
+    header_in_row = isinstance(table.columns, pd.RangeIndex) and len(table) > 1
+    for position in range(normalized.shape[1]):
+        column = normalized.iloc[:, position]
+        converted = normalize_column(column)
+        if converted is column and header_in_row:
+            converted = _normalize_below_header(column)
+        normalized.isetitem(position, converted)
+    return normalized
+
+
+def normalize_tables(tables):
+    """normalize_table for a list of tables"""
+    return [normalize_table(table) for table in tables]
@@ -0,0 +1,268 @@
+# Streaming output stage: tables are appended to the output file page by page
+# as they are extracted, so a conversion never holds more than one page's
+# tables in memory however long the document is. pyarrow and openpyxl are
+# imported when the first output of their format is opened, which keeps them
+# out of extraction workers that never write.
+
+import json
+import os
+import shutil
+import tempfile
+
+FORMATS = ["xlsx", "csv", "parquet", "feather", "jsonl"]
+ARROW_FORMATS = ["parquet", "feather"]     # written as one file per table in a directory
+METADATA_COLUMNS = ["source_file", "page", "table_index"]
+
+# mkstemp/mkdtemp create private files; finished outputs get the usual umask-based mode
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _header(table):
+    """Column labels as written by DataFrame.to_excel / to_csv"""
+    return [c if isinstance(c, (str, int, float)) else str(c) for c in table.columns]
+
+
+def _unique_columns(columns):
+    """String column names with repeats suffixed .1, .2, ... (Arrow and JSON need unique names)"""
+    names = []
+    seen = set()
+    for column in columns:
+        name = base = str(column)
+        n = 0
+        while name in seen:
+            n += 1
+            name = f"{base}.{n}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def with_metadata(table, source_file, page, table_index):
+    """Copy of a table with source_file, page and table_index columns in front"""
+    frame = table.reset_index(drop=True)
+    frame.columns = _unique_columns(METADATA_COLUMNS + list(frame.columns))[len(METADATA_COLUMNS):]
+    frame.insert(0, "table_index", table_index)
+    frame.insert(0, "page", page)
+    frame.insert(0, "source_file", source_file)
+    return frame
+
+
+def _to_arrow(frame):
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    except (TypeError, ValueError):
+        # Mixed-type object columns: Arrow needs one type per column
+        columns = frame.select_dtypes(include='object').columns
+        frame = frame.astype({column: 'string' for column in columns})
+        return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def table_json(table):
+    """{'columns': [...], 'rows': [[...], ...]} of plain JSON values (dates as ISO strings)"""
+    frame = table.reset_index(drop=True)
+    return {'columns': _unique_columns(frame.columns),
+            'rows': json.loads(frame.to_json(orient='values', date_format='iso'))}
+
+
+def table_parquet(table, source_file=None, page=None, table_index=None):
+    """One table, with the metadata columns in front, as the bytes of a Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(_to_arrow(with_metadata(table, source_file, page, table_index)), sink)
+    return sink.getvalue().to_pybytes()
+
+
+def _cell_rows(table):
+    """Rows of plain Python values with missing cells as None (openpyxl writes NaN as text)"""
+    cells = table.astype(object).where(table.notna(), None)
+    return cells.itertuples(index=False, name=None)
+
+
+class TableWriter:
+    """Append tables to one output (xlsx, CSV, Parquet, Feather or JSON Lines) as they arrive
+
+    xlsx output uses openpyxl's write-only workbook, which spools every sheet
+    to a temporary file row by row instead of building it in memory; each
+    table gets its own sheet. CSV rows are appended directly; a new header
+    line is written whenever a table's columns differ from the previous
+    table's.
+
+    The analytics formats carry source_file, page and table_index columns.
+    Parquet and Feather output is a directory per source document holding one
+    file per table (tables have different columns, so they cannot share a
+    schema); JSON Lines is one file per document with one object per row.
+
+    write(..., continues=True) appends rows to the previous table (a table
+    stitched across pages) instead of starting a new sheet or file. If a
+    continuation's column types cannot be cast to the Arrow schema of the
+    file it belongs to, it goes to a new part file, table_0001_2.parquet.
+
+    Nothing is created until the first table arrives, and the output only
+    appears under output_path once close() succeeds.
+    """
+
+    def __init__(self, output_path, fmt="xlsx", source_file=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        self.output_path = output_path
+        self.fmt = fmt
+        self.source_file = source_file
+        self.tables_written = 0
+        self._temp_path = None
+        self._workbook = None
+        self._handle = None
+        self._columns = None
+        self._sheet = None
+        self._arrow_writer = None
+        self._arrow_schema = None
+        self._arrow_parts = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.output_path))
+        os.makedirs(directory, exist_ok=True)
+        if self.fmt in ARROW_FORMATS:
+            self._temp_path = tempfile.mkdtemp(prefix='.tmp-', dir=directory)
+            return
+        fd, self._temp_path = tempfile.mkstemp(prefix='.tmp-', suffix=f'.{self.fmt}',
+                                               dir=directory)
+        if self.fmt == "xlsx":
+            from openpyxl import Workbook
+
+            os.close(fd)
+            self._workbook = Workbook(write_only=True)
+        else:
+            self._handle = os.fdopen(fd, 'w', newline='', encoding='utf-8')
+
+    def _open_arrow_file(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._close_arrow_file()
+        self._arrow_parts += 1
+        suffix = f'_{self._arrow_parts}' if self._arrow_parts > 1 else ''
+        path = os.path.join(self._temp_path,
+                            f'table_{self.tables_written:04d}{suffix}.{self.fmt}')
+        if self.fmt == "parquet":
+            self._arrow_writer = pq.ParquetWriter(path, schema)
+        else:
+            self._arrow_writer = pa.ipc.new_file(path, schema)
+        # Kept here: the IPC file writer, unlike ParquetWriter, has no .schema
+        self._arrow_schema = schema
+
+    def _close_arrow_file(self):
+        self._arrow_schema = None
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_writer = None
+
+    def write(self, table, page=None, continues=False):
+        """Append one table, or with continues more rows of the previous one
+
+        page fills the page metadata column; table_index counts logical tables.
+        """
+        if self._temp_path is None:
+            self._open()
+        continues = continues and self.tables_written > 0
+        if not continues:
+            self.tables_written += 1
+        if self.fmt == "xlsx":
+            if not continues:
+                self._sheet = self._workbook.create_sheet(title=f'Table_{self.tables_written}')
+                self._sheet.append(_header(table))
+            for row in _cell_rows(table):
+                self._sheet.append(row)
+        elif self.fmt == "csv":
+            columns = _header(table)
+            table.to_csv(self._handle, header=columns != self._columns, index=False)
+            self._columns = columns
+        elif self.fmt == "jsonl":
+            frame = with_metadata(table, self.source_file, page, self.tables_written)
+            frame.to_json(self._handle, orient='records', lines=True, force_ascii=False,
+                          date_format='iso')
+        else:
+            batch = _to_arrow(with_metadata(table, self.source_file, page, self.tables_written))
+            if not continues:
+                self._arrow_parts = 0
+                self._open_arrow_file(batch.schema)
+            else:
+                import pyarrow as pa
+
+                try:
+                    batch = batch.cast(self._arrow_schema)
+                except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
+                    self._open_arrow_file(batch.schema)
+            self._arrow_writer.write_table(batch)
+
+    def write_tables(self, tables, page=None):
+        """Append a page's worth of tables, each as a new table"""
+        for table in tables:
+            self.write(table, page)
+
+    def close(self):
+        """Finish the file and move it into place; returns output_path, or None if no table was written"""
+        if self._temp_path is None:
+            return None
+        try:
+            self._close_arrow_file()
+            if self._workbook is not None:
+                self._workbook.save(self._temp_path)
+                self._workbook = None
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            if self.fmt in ARROW_FORMATS:
+                os.chmod(self._temp_path, 0o777 & ~_UMASK)
+                # A directory can only be renamed over an empty one
+                if os.path.isdir(self.output_path):
+                    shutil.rmtree(self.output_path)
+            else:
+                os.chmod(self._temp_path, 0o666 & ~_UMASK)
+            os.replace(self._temp_path, self.output_path)
+        except Exception:
+            self.abort()
+            raise
+        self._temp_path = None
+        return self.output_path
+
+    def abort(self):
+        """Discard everything written so far"""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        try:
+            self._close_arrow_file()
+        except Exception:
+            self._arrow_writer = None
+        if self._workbook is not None:
+            # Finish the write-only sheets now; left to the garbage collector
+            # they write to already closed files and print tracebacks
+            for sheet in self._workbook.worksheets:
+                try:
+                    sheet.close()
+                except Exception:
+                    pass
+        self._workbook = None
+        self._sheet = None
+        if self._temp_path is not None:
+            if os.path.isdir(self._temp_path):
+                shutil.rmtree(self._temp_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(self._temp_path)
+                except OSError:
+                    pass
+            self._temp_path = None
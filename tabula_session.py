@@ -0,0 +1,240 @@
+# Long-lived tabula-java session running inside this process through JPype.
+#
+# tabula-py's read_pdf falls back to launching `java -jar tabula.jar` for every
+# call, so each page paid for a JVM start and a fresh parse of the PDF. The
+# session below starts the JVM once per process, keeps the tabula classes
+# loaded and keeps the current PDDocument open while its pages are extracted.
+# Where the JVM cannot be loaded in-process (java on PATH but no libjvm that
+# JPype can find) the failure is remembered and callers fall back to
+# tabula-py's subprocess path.
+
+import importlib.util
+import json
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+from conversion_profile import stage
+
+JAVA_OPTIONS = [
+    "-Djava.awt.headless=true",
+    "-Dfile.encoding=UTF8",
+    "-Dorg.slf4j.simpleLogger.defaultLogLevel=off",
+    "-Dorg.apache.commons.logging.Log=org.apache.commons.logging.impl.NoOpLog",
+]
+
+_session = None
+_start_error = None   # why the JVM could not be started in this process, once it failed
+_tabula_usable = None  # tabula_available()'s answer for this process
+_session_lock = threading.Lock()
+
+
+def jpype_available():
+    """Return True if JPype is installed and finds a JVM library, so an in-process JVM can be used"""
+    if _start_error is not None:
+        return False
+    try:
+        import jpype
+    except ImportError:
+        return False
+    if jpype.isJVMStarted():
+        return True
+    try:
+        jpype.getDefaultJVMPath()
+    except (jpype.JVMNotFoundException, OSError, RuntimeError):
+        return False
+    return True
+
+
+def tabula_available():
+    """Return True if tabula can run here, in-process or as a `java` subprocess
+
+    Decided once per process, which starts the in-process JVM if there is
+    one; see also mark_unavailable.
+    """
+    global _tabula_usable
+    if _tabula_usable is None:
+        _tabula_usable = (importlib.util.find_spec("tabula") is not None
+                          and (start_session() is not None or shutil.which("java") is not None))
+    return _tabula_usable
+
+
+def mark_unavailable():
+    """Record that tabula failed to start here, so tabula_available() stops offering it"""
+    global _tabula_usable
+    _tabula_usable = False
+
+
+def get_session():
+    """Return the process-wide tabula session, starting the JVM on first use
+
+    If the JVM cannot be started the error is raised, and raised again on
+    later calls without another attempt.
+    """
+    global _session, _start_error
+    with _session_lock:
+        if _session is None:
+            if _start_error is not None:
+                raise _start_error
+            import jpype
+
+            session = TabulaSession()
+            try:
+                session.start()
+            except (jpype.JVMNotFoundException, OSError, RuntimeError) as e:
+                _start_error = e
+                raise
+            _session = session
+        return _session
+
+
+def start_session():
+    """The process-wide session, or None when no in-process JVM is available here"""
+    if not jpype_available():
+        return None
+    try:
+        return get_session()
+    except Exception:
+        # Remembered by get_session; callers use the subprocess path from now on
+        return None
+
+
+def _rows_to_frame(rows):
+    """Build a DataFrame from tabula JSON rows, using the first row as the header like tabula-py"""
+    data = [[cell['text'] or None for cell in row] for row in rows]
+    if not data:
+        return pd.DataFrame()
+    header, body = data[0], data[1:]
+    columns = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = name if name is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return pd.DataFrame(body, columns=columns)
+
+
+class TabulaSession:
+    """Resident tabula-java extractor; one JVM per process, reused for every document"""
+
+    def __init__(self, java_options=None):
+        self.java_options = list(java_options or JAVA_OPTIONS)
+        self.started = False
+
+    def start(self):
+        """Start (or attach to) the JVM and load the tabula classes"""
+        if self.started:
+            return self
+        import jpype
+        import jpype.imports  # noqa: F401
+        from tabula.backend import jar_path
+
+        if not jpype.isJVMStarted():
+            with stage('jvm_start'):
+                jpype.addClassPath(jar_path())
+                jpype.startJVM(*self.java_options, convertStrings=False)
+
+        from java.io import File
+        from java.lang import StringBuilder
+        from java.util import ArrayList
+        from java.util.logging import Level, Logger
+        from org.apache.pdfbox.pdmodel import PDDocument
+        from technology.tabula import ObjectExtractor
+        from technology.tabula.detectors import NurminenDetectionAlgorithm
+        from technology.tabula.extractors import (BasicExtractionAlgorithm,
+                                                  SpreadsheetExtractionAlgorithm)
+        from technology.tabula.writers import JSONWriter
+
+        # PDFBox logs font fallbacks through java.util.logging; keep a reference
+        # to the logger so the level is not lost when it is garbage collected
+        self._pdfbox_logger = Logger.getLogger("org.apache.pdfbox")
+        self._pdfbox_logger.setLevel(Level.OFF)
+
+        self._File = File
+        self._StringBuilder = StringBuilder
+        self._ArrayList = ArrayList
+        self._PDDocument = PDDocument
+        self._ObjectExtractor = ObjectExtractor
+        self._detector = NurminenDetectionAlgorithm()
+        self._basic = BasicExtractionAlgorithm()
+        self._spreadsheet = SpreadsheetExtractionAlgorithm()
+        self._writer = JSONWriter()
+        self.started = True
+        return self
+
+    def _extract_page(self, page, lattice, stream, guess):
+        """Run the same method selection as tabula-java's command line on one page"""
+        if lattice and not stream:
+            use_spreadsheet = True
+        elif stream and not lattice:
+            use_spreadsheet = False
+        else:
+            use_spreadsheet = bool(self._spreadsheet.isTabular(page))
+
+        if use_spreadsheet:
+            return list(self._spreadsheet.extract(page))
+        if guess:
+            areas = list(self._detector.detect(page))
+            # Nurminen finds nothing on pages without any rulings; rather than
+            # returning no tables (as tabula-java does) read the whole page
+            if areas:
+                tables = []
+                for area in areas:
+                    tables.extend(self._basic.extract(page.getArea(area)))
+                return tables
+        return list(self._basic.extract(page))
+
+    def _to_frames(self, tables):
+        """Convert Java Table objects to DataFrames, keeping each table's bounding box"""
+        if not tables:
+            return []
+        table_list = self._ArrayList()
+        for table in tables:
+            table_list.add(table)
+        buffer = self._StringBuilder()
+        self._writer.write(buffer, table_list)
+        frames = []
+        for table in json.loads(str(buffer.toString())):
+            if not table['data']:
+                continue
+            frame = _rows_to_frame(table['data'])
+            frame.attrs['bbox'] = (table['left'], table['top'], table['right'], table['bottom'])
+            frames.append(frame)
+        return frames
+
+    def extract(self, pdf_path, page_numbers, lattice=True, stream=True, password=None,
+                guess=True, areas=None):
+        """Extract tables from the given pages; returns [(page, [DataFrame, ...]), ...]
+
+        areas optionally maps a page to (x0, y0, x1, y1) rectangles in points;
+        those pages are read only inside them, without guessing.
+        """
+        areas = areas or {}
+        self.start()
+        pdf_file = self._File(os.path.abspath(pdf_path))
+        with stage('pdf_open', pages=list(page_numbers), engine='tabula'):
+            document = (self._PDDocument.load(pdf_file, password) if password
+                        else self._PDDocument.load(pdf_file))
+        try:
+            extractor = self._ObjectExtractor(document)
+            results = []
+            for page_number in page_numbers:
+                with stage('tabula', pages=page_number):
+                    page = extractor.extract(int(page_number))
+                    if areas.get(page_number):
+                        tables = []
+                        for x0, y0, x1, y1 in areas[page_number]:
+                            area = page.getArea(float(y0), float(x0), float(y1), float(x1))
+                            tables.extend(self._extract_page(area, lattice, stream, False))
+                    else:
+                        tables = self._extract_page(page, lattice, stream, guess)
+                    results.append((page_number, self._to_frames(tables)))
+            return results
+        finally:
+            document.close()
@@ -0,0 +1,63 @@
+# Which profile stage() records into when conversions share a process.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from conversion_profile import ConversionProfile, activate, carry_profile, stage
+
+
+def test_concurrent_conversions_record_into_their_own_profiles():
+    profiles = {name: ConversionProfile() for name in ("a", "b")}
+    both_active = threading.Barrier(2)
+
+    def convert(name):
+        with activate(profiles[name]):
+            both_active.wait()
+            with stage(name):
+                pass
+            both_active.wait()
+
+    threads = [threading.Thread(target=convert, args=(name,)) for name in profiles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [r['stage'] for r in profiles['a'].records] == ["a"]
+    assert [r['stage'] for r in profiles['b'].records] == ["b"]
+
+
+def test_finished_profile_is_not_restored_by_an_overlapping_one():
+    first, second = ConversionProfile(), ConversionProfile()
+    first_done = threading.Event()
+    second_started = threading.Event()
+
+    def run_second():
+        with activate(second):
+            second_started.set()
+            first_done.wait()
+        with stage("after"):
+            pass
+
+    thread = threading.Thread(target=run_second)
+    with activate(first):
+        thread.start()
+        second_started.wait()
+    first_done.set()
+    thread.join()
+    with stage("outside"):
+        pass
+    assert first.records == [] and second.records == []
+
+
+def test_carry_profile_hands_the_profile_to_pool_threads():
+    profile = ConversionProfile()
+
+    def work(page):
+        with stage("ocr", pages=page):
+            return page
+
+    with activate(profile), ThreadPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(carry_profile(work), [1, 2, 3])) == [1, 2, 3]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(work, 4).result()
+    assert sorted(r['pages'][0] for r in profile.records) == [1, 2, 3]
@@ -0,0 +1,160 @@
+# The HTTP API end to end on localhost: an ExtractionServer on an ephemeral
+# port of 127.0.0.1, driven with http.client from a thread while the event
+# loop serves it.
+
+import asyncio
+import http.client
+import io
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from benchmark_corpus import make_fixture
+from http_api import ExtractionServer
+
+PAGES = 3
+
+
+@pytest.fixture(scope="module")
+def pdf_bytes(tmp_path_factory):
+    path = tmp_path_factory.mktemp("api") / "statement.pdf"
+    make_fixture(str(path), PAGES, bordered=True)
+    return path.read_bytes()
+
+
+def serve(client, **options):
+    """Run client(request) against a fresh server
+
+    request(method, url, body=None, content_type=...) returns (status, body bytes).
+    """
+    async def main():
+        server = ExtractionServer(workers=1, **options)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        def request(method, url, body=None, content_type="application/pdf"):
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            try:
+                headers = {'Content-Type': content_type} if body is not None else {}
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            finally:
+                connection.close()
+
+        try:
+            await asyncio.to_thread(client, request)
+        finally:
+            listener.close()
+            server.close()
+
+    asyncio.run(main())
+
+
+def wait_done(request, job_id):
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        status, body = request("GET", f"/jobs/{job_id}")
+        job = json.loads(body)
+        if job['state'] in ("done", "failed"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_upload_status_results_and_downloads(pdf_bytes):
+    def client(request):
+        status, body = request("POST", "/jobs?engine=pymupdf&name=statement.pdf", pdf_bytes)
+        assert status == 202
+        job_id = json.loads(body)['id']
+
+        job = wait_done(request, job_id)
+        assert job['state'] == "done" and job['error'] is None
+        assert job['name'] == "statement.pdf"
+        assert job['pages_total'] == job['pages_done'] == PAGES
+        assert job['tables'] == PAGES
+
+        status, body = request("GET", f"/jobs/{job_id}/results")
+        assert status == 200
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        assert [line['page'] for line in lines[:-1]] == [1, 2, 3]
+        assert [[t['index'] for t in line['tables']] for line in lines[:-1]] == [[1], [2], [3]]
+        assert lines[-1]['done'] is True
+
+        status, body = request("GET", f"/jobs/{job_id}/results?format=json")
+        document = json.loads(body)
+        assert [page['page'] for page in document['pages']] == [1, 2, 3]
+        first = document['pages'][0]['tables'][0]
+        assert first['columns'] == ["Date", "Reference", "Description", "Amount"]
+        assert first['parquet'] == f"/jobs/{job_id}/tables/1.parquet"
+
+        status, body = request("GET", f"/jobs/{job_id}/tables/2.json")
+        assert status == 200
+        table = json.loads(body)
+        assert table['page'] == 2 and table['index'] == 2
+        assert table['rows'] == document['pages'][1]['tables'][0]['rows']
+
+        status, body = request("GET", f"/jobs/{job_id}/tables/2.parquet")
+        assert status == 200
+        frame = pd.read_parquet(io.BytesIO(body))
+        assert list(frame.columns[:3]) == ["source_file", "page", "table_index"]
+        assert set(frame['page']) == {2} and set(frame['table_index']) == {2}
+        assert len(frame) == len(table['rows'])
+
+        status, body = request("GET", "/jobs")
+        assert [job['id'] for job in json.loads(body)] == [job_id]
+
+    serve(client)
+
+
+def test_error_paths(pdf_bytes):
+    def client(request):
+        status, body = request("POST", "/jobs", pdf_bytes)
+        assert status == 413
+        assert "larger than" in json.loads(body)['error']
+
+        status, body = request("GET", "/jobs/0123456789abcdef")
+        assert status == 404
+        assert json.loads(body) == {'error': "No such job: 0123456789abcdef"}
+        assert request("GET", "/jobs/0123456789abcdef/results")[0] == 404
+        assert request("GET", "/nowhere")[0] == 404
+
+        status, body = request("POST", "/jobs?engine=nope", b"%PDF")
+        assert status == 400 and "Unknown engine" in json.loads(body)['error']
+        status, body = request("POST", "/jobs", b"not a pdf", content_type="text/plain")
+        assert status == 400
+        status, body = request("POST", "/jobs", json.dumps({'path': "/no/such.pdf"}).encode(),
+                               content_type="application/json")
+        assert status == 400 and "No such file" in json.loads(body)['error']
+
+    serve(client, max_upload=len(pdf_bytes) - 1)
+
+
+def test_unknown_table_and_deleted_job(pdf_bytes):
+    def client(request):
+        job_id = json.loads(request("POST", "/jobs?engine=pymupdf", pdf_bytes)[1])['id']
+        wait_done(request, job_id)
+        status, body = request("GET", f"/jobs/{job_id}/tables/99.parquet")
+        assert status == 404 and "not in this document" in json.loads(body)['error']
+        assert request("GET", f"/jobs/{job_id}/tables/1.csv")[0] == 404
+
+        assert request("DELETE", f"/jobs/{job_id}")[0] == 200
+        assert request("GET", f"/jobs/{job_id}")[0] == 404
+
+    serve(client)
+
+
+def test_oldest_finished_jobs_are_dropped_beyond_keep_bytes(pdf_bytes):
+    def client(request):
+        first = json.loads(request("POST", "/jobs?engine=pymupdf", pdf_bytes)[1])['id']
+        wait_done(request, first)
+        second = json.loads(request("POST", "/jobs?engine=pymupdf", pdf_bytes)[1])['id']
+        wait_done(request, second)
+
+        assert request("GET", f"/jobs/{first}")[0] == 404
+        # The job that finished last is kept even though it is over the limit
+        assert request("GET", f"/jobs/{second}/tables/1.json")[0] == 200
+
+    serve(client, keep_bytes=1)
@@ -0,0 +1,94 @@
+# The watch-folder service's SQLite job queue: claiming, deduplication by
+# content hash, retries with backoff and recovery after a crash.
+
+import pytest
+
+import job_queue
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite")
+
+
+def test_claims_the_oldest_queued_job_once(db_path):
+    with JobQueue(db_path) as queue:
+        first = queue.enqueue("/in/a.pdf", "aaa")
+        second = queue.enqueue("/in/b.pdf", "bbb")
+
+        job = queue.claim()
+        assert (job['id'], job['path'], job['state'], job['attempts']) == \
+            (first, "/in/a.pdf", RUNNING, 1)
+        assert queue.claim()['id'] == second
+        assert queue.claim() is None
+
+        done = queue.complete(first, "/out/a.xlsx")
+        assert (done['state'], done['output'], done['error']) == (DONE, "/out/a.xlsx", None)
+        assert queue.counts() == {DONE: 1, RUNNING: 1}
+
+
+def test_two_connections_never_claim_the_same_job(db_path):
+    with JobQueue(db_path) as one, JobQueue(db_path) as other:
+        one.enqueue("/in/a.pdf", "aaa")
+        one.enqueue("/in/b.pdf", "bbb")
+        claimed = [one.claim(), other.claim(), one.claim()]
+        assert sorted(job['path'] for job in claimed[:2]) == ["/in/a.pdf", "/in/b.pdf"]
+        assert claimed[2] is None
+
+
+def test_same_content_is_queued_once(db_path):
+    with JobQueue(db_path) as queue:
+        job_id = queue.enqueue("/in/statement.pdf", "abc")
+        assert job_id is not None
+        # Dropped again, or copied in under another name
+        assert queue.enqueue("/in/statement.pdf", "abc") is None
+        assert queue.enqueue("/in/copy of statement.pdf", "abc") is None
+        queue.complete(queue.claim()['id'])
+        assert queue.enqueue("/in/statement.pdf", "abc") is None
+        assert queue.counts() == {DONE: 1}
+
+
+def test_failed_attempts_back_off_then_fail(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue.time, 'time', lambda: now[0])
+    with JobQueue(db_path, max_attempts=3, retry_delay=10) as queue:
+        job_id = queue.enqueue("/in/a.pdf", "aaa")
+
+        queue.claim()
+        job = queue.fail(job_id, ValueError("bad page"))
+        assert (job['state'], job['not_before'], job['error']) == (QUEUED, 1010.0, "bad page")
+        assert queue.claim() is None  # not due yet
+        assert queue.next_due() == 1010.0
+
+        now[0] = 1010.0
+        assert queue.claim()['attempts'] == 2
+        assert queue.fail(job_id, "again")['not_before'] == 1030.0  # doubled
+
+        now[0] = 1030.0
+        assert queue.claim()['attempts'] == 3
+        job = queue.fail(job_id, "still broken")
+        assert (job['state'], job['error']) == (FAILED, "still broken")
+        now[0] = 1e9
+        assert queue.claim() is None
+        assert queue.next_due() is None
+
+        assert queue.retry_failed() == 1
+        job = queue.claim()
+        assert (job['id'], job['attempts']) == (job_id, 1)
+
+
+def test_jobs_running_when_the_service_died_are_requeued(db_path):
+    queue = JobQueue(db_path)
+    job_id = queue.enqueue("/in/a.pdf", "aaa")
+    queue.enqueue("/in/b.pdf", "bbb")
+    assert queue.claim()['id'] == job_id
+    queue.close()  # killed mid-conversion: never completed or failed
+
+    with JobQueue(db_path) as restarted:
+        assert restarted.counts() == {QUEUED: 1, RUNNING: 1}
+        assert restarted.recover() == 1
+        assert restarted.recover() == 0
+        job = restarted.claim()
+        # Oldest first again; the interrupted run counts as an attempt
+        assert (job['id'], job['state'], job['attempts']) == (job_id, RUNNING, 2)
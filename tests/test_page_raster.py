@@ -0,0 +1,40 @@
+# Banded background renders against whole-page renders.
+
+import fitz
+import numpy as np
+import pytest
+
+from page_raster import PageRasterCache
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+@pytest.mark.parametrize("dpi", [72, 150, 333])
+def test_banded_render_matches_the_whole_page(rotation, dpi):
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    page.draw_rect(fitz.Rect(50, 50, 400, 700), color=(1, 0, 0), fill=(0, 0, 1))
+    page.insert_text((72, 100), "Banded render", fontsize=20)
+    page.set_rotation(rotation)
+
+    whole = np.asarray(PageRasterCache(doc).get(1, dpi)).astype(int)
+    # Small bands, so the page takes the most bands allowed
+    banded = np.asarray(PageRasterCache(doc).get(1, dpi, band_pixels=1000)).astype(int)
+    assert banded.shape == whole.shape
+    # Only anti-aliasing along band edges may differ
+    assert np.abs(banded - whole).max() <= 40
+
+
+def test_page_edited_during_a_banded_render_is_not_cached(monkeypatch):
+    doc = fitz.open()
+    doc.new_page(width=200, height=200)
+    rasters = PageRasterCache(doc)
+    render = rasters._render_bands
+
+    def render_then_edit(*args):
+        image = render(*args)
+        rasters.invalidate(1)  # the Tk thread rotated the page in between bands
+        return image
+
+    monkeypatch.setattr(rasters, '_render_bands', render_then_edit)
+    assert rasters.get(1, 72, band_pixels=1000).size == (200, 200)
+    assert rasters.peek(1, 72) is None
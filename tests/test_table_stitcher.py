@@ -0,0 +1,109 @@
+# Cross-page stitching decisions on synthetic per-page tables: labelled
+# tables (tabula, PyMuPDF) and unlabelled ones with the header in row 0
+# (camelot, OCR).
+
+import pandas as pd
+
+from table_stitcher import TableStitcher, header_signature
+
+HEADER = ["Date", "Amount"]
+
+
+def labelled(rows, bbox=(50, 100, 500, 700), columns=HEADER):
+    table = pd.DataFrame(rows, columns=columns)
+    table.attrs['bbox'] = bbox
+    return table
+
+
+def unlabelled(rows, bbox=(50, 100, 500, 700)):
+    table = pd.DataFrame(rows)
+    table.attrs['bbox'] = bbox
+    return table
+
+
+def test_repeated_header_continues_the_table():
+    stitcher = TableStitcher()
+    first = labelled([["2024-01-01", "1"]])
+    assert stitcher.feed(1, [first]) == [(first, False)]
+
+    # The repeated header is enough, wherever the table sits
+    page_2 = labelled([["2024-01-02", "2"]], bbox=(300, 0, 400, 50))
+    [(piece, continues)] = stitcher.feed(2, [page_2])
+    assert continues
+    assert list(piece.columns) == HEADER
+    assert piece.values.tolist() == [["2024-01-02", "2"]]
+
+
+def test_repeated_header_in_row_0_is_dropped():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [unlabelled([["Date", "Amount"], ["2024-01-01", "1"]])])
+    [(piece, continues)] = stitcher.feed(2, [unlabelled([[" date ", "AMOUNT"], ["2024-01-02", "2"]],
+                                                        bbox=(0, 0, 100, 100))])
+    assert continues
+    assert list(piece.columns) == [0, 1]
+    assert piece.values.tolist() == [["2024-01-02", "2"]]
+
+
+def test_aligned_table_without_header_continues():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [labelled([["2024-01-01", "1"]])])
+    # No header on page 2, so its first row became the labels
+    page_2 = labelled([["2024-01-03", "3"]], bbox=(55, 20, 495, 300),
+                      columns=["2024-01-02", "2"])
+    [(piece, continues)] = stitcher.feed(2, [page_2])
+    assert continues
+    assert list(piece.columns) == HEADER
+    assert piece.values.tolist() == [["2024-01-02", "2"], ["2024-01-03", "3"]]
+    assert piece.attrs['bbox'] == (55, 20, 495, 300)
+
+
+def test_misaligned_table_without_header_starts_a_new_table():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [labelled([["2024-01-01", "1"]])])
+    page_2 = labelled([["x", "y"]], bbox=(200, 20, 500, 300), columns=["Name", "Value"])
+    assert stitcher.feed(2, [page_2]) == [(page_2, False)]
+
+
+def test_different_column_count_starts_a_new_table():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [labelled([["2024-01-01", "1"]])])
+    page_2 = labelled([["2024-01-02", "2", "x"]], columns=HEADER + ["Note"])
+    assert stitcher.feed(2, [page_2]) == [(page_2, False)]
+
+
+def test_only_the_first_table_on_a_page_can_continue():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [labelled([["2024-01-01", "1"]])])
+    other = labelled([["a", "b"]], bbox=(50, 10, 200, 60), columns=["Name", "Value"])
+    repeat = labelled([["2024-01-02", "2"]])
+    pieces = stitcher.feed(2, [other, repeat])
+    assert [continues for _, continues in pieces] == [False, False]
+    # The page's last table is the one page 3 may continue
+    [(_, continues)] = stitcher.feed(3, [labelled([["2024-01-03", "3"]])])
+    assert continues
+
+
+def test_a_gap_stops_the_table():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [labelled([["2024-01-01", "1"]])])
+    assert stitcher.feed(2, []) == []
+    page_3 = labelled([["2024-01-03", "3"]])
+    assert stitcher.feed(3, [page_3]) == [(page_3, False)]
+
+    stitcher.feed(5, [labelled([["2024-01-05", "5"]])])
+    page_7 = labelled([["2024-01-07", "7"]])
+    assert stitcher.feed(7, [page_7]) == [(page_7, False)]
+
+
+def test_header_only_continuation_adds_no_rows_but_keeps_the_table_open():
+    stitcher = TableStitcher()
+    stitcher.feed(1, [unlabelled([["Date", "Amount"], ["2024-01-01", "1"]])])
+    assert stitcher.feed(2, [unlabelled([["Date", "Amount"]])]) == []
+    [(piece, continues)] = stitcher.feed(3, [unlabelled([["Date", "Amount"], ["2024-01-03", "3"]])])
+    assert continues and piece.values.tolist() == [["2024-01-03", "3"]]
+
+
+def test_header_signature_ignores_case_spacing_and_pandas_renames():
+    assert header_signature(labelled([], columns=["Date ", "Unnamed: 1"])) == ("date", "")
+    assert header_signature(unlabelled([["  Posting\nDate", None]])) == ("posting date", "")
+    assert header_signature(unlabelled([])) is None
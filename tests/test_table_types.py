@@ -0,0 +1,55 @@
+# Column type inference on tables as the extractors return them: labelled
+# columns (tabula, PyMuPDF) and unlabelled ones with the header in row 0
+# (camelot, OCR).
+
+import pandas as pd
+
+from table_types import normalize_column, normalize_table
+
+
+def test_tabula_style_columns_are_converted():
+    table = pd.DataFrame({'Item': ["a", "b", "c"],
+                          'Amount': ["1,234.50", "(12.00)", "5%"],
+                          'Count': ["1", "", "3"],
+                          'Date': ["2024-01-02", "2024-02-03", ""]})
+    table.attrs['bbox'] = (10, 20, 300, 400)
+    normalized = normalize_table(table)
+
+    assert list(normalized['Item']) == ["a", "b", "c"]
+    assert list(normalized['Amount']) == [1234.5, -12.0, 0.05]
+    assert str(normalized['Count'].dtype) == 'Int64'
+    assert normalized['Count'].isna().tolist() == [False, True, False]
+    assert pd.api.types.is_datetime64_any_dtype(normalized['Date'])
+    assert normalized['Date'][0] == pd.Timestamp(2024, 1, 2)
+    assert normalized.attrs['bbox'] == (10, 20, 300, 400)
+    # The input is not modified
+    assert list(table['Amount']) == ["1,234.50", "(12.00)", "5%"]
+
+
+def test_header_in_row_0_is_kept_and_the_cells_below_are_converted():
+    table = pd.DataFrame([["Item", "Amount", "Date"],
+                          ["a", "1,234.50", "2024-01-02"],
+                          ["b", "12", "2024-02-03"]])
+    normalized = normalize_table(table)
+
+    assert list(normalized.iloc[0]) == ["Item", "Amount", "Date"]
+    assert list(normalized[0]) == ["Item", "a", "b"]
+    assert list(normalized[1])[1:] == [1234.5, 12.0]
+    assert list(normalized[2])[1:] == [pd.Timestamp(2024, 1, 2), pd.Timestamp(2024, 2, 3)]
+
+
+def test_unlabelled_table_without_a_header_converts_whole_columns():
+    # A continuation piece: its repeated header was already removed
+    normalized = normalize_table(pd.DataFrame([["1", "2024-01-02"], ["2", "2024-02-03"]]))
+    assert str(normalized[0].dtype) == 'Int64'
+    assert pd.api.types.is_datetime64_any_dtype(normalized[1])
+
+
+def test_labelled_columns_still_need_every_cell_to_fit():
+    table = pd.DataFrame({'Amount': ["total", "1", "2"]})
+    assert list(normalize_table(table)['Amount']) == ["total", "1", "2"]
+
+
+def test_identifiers_and_mixed_columns_stay_text():
+    assert list(normalize_column(pd.Series(["007", "012"]))) == ["007", "012"]
+    assert list(normalize_column(pd.Series(["12", "n/a"]))) == ["12", "n/a"]
@@ -0,0 +1,51 @@
+# End-to-end checks of TableWriter's Arrow outputs with tables stitched
+# across pages (write(..., continues=True)).
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from table_writer import TableWriter
+
+
+def _read(path, fmt):
+    if fmt == "parquet":
+        return pq.read_table(path).to_pandas()
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+@pytest.mark.parametrize("fmt", ["feather", "parquet"])
+def test_continuation_appends_to_the_same_file(tmp_path, fmt):
+    output = str(tmp_path / f"doc_converted.{fmt}")
+    with TableWriter(output, fmt, source_file="doc.pdf") as writer:
+        writer.write(pd.DataFrame({'Item': ["a", "b"], 'Amount': [1.5, 2.5]}), page=1)
+        writer.write(pd.DataFrame({'Item': ["c"], 'Amount': [3.5]}), page=2, continues=True)
+
+    assert os.listdir(output) == [f"table_0001.{fmt}"]
+    table = _read(os.path.join(output, f"table_0001.{fmt}"), fmt)
+    assert list(table['Item']) == ["a", "b", "c"]
+    assert list(table['page']) == [1, 1, 2]
+    assert set(table['table_index']) == {1}
+
+
+@pytest.mark.parametrize("fmt", ["feather", "parquet"])
+def test_continuation_with_other_types_starts_a_part_file(tmp_path, fmt):
+    output = str(tmp_path / f"doc_converted.{fmt}")
+    with TableWriter(output, fmt, source_file="doc.pdf") as writer:
+        writer.write(pd.DataFrame({'Amount': [1.5, 2.5]}), page=1)
+        # Text where the first part has numbers: cannot be cast to its schema
+        writer.write(pd.DataFrame({'Amount': ["n/a"]}), page=2, continues=True)
+        writer.write(pd.DataFrame({'Amount': ["x"]}), page=3, continues=True)
+        writer.write(pd.DataFrame({'Amount': [7.0]}), page=4)
+
+    assert sorted(os.listdir(output)) == [f"table_0001.{fmt}", f"table_0001_2.{fmt}",
+                                          f"table_0002.{fmt}"]
+    first = _read(os.path.join(output, f"table_0001.{fmt}"), fmt)
+    second = _read(os.path.join(output, f"table_0001_2.{fmt}"), fmt)
+    assert list(first['Amount']) == [1.5, 2.5]
+    assert list(second['Amount']) == ["n/a", "x"]
+    assert list(second['page']) == [2, 3]
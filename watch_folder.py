@@ -0,0 +1,362 @@
+# Watch-folder service: converts every PDF dropped into a directory, without
+# the GUI. New files are picked up with inotify on Linux (a directory poll
+# elsewhere, or with --poll for network shares inotify cannot see), queued
+# in a durable SQLite job queue (job_queue.py) deduplicated by content hash,
+# and converted on a process pool. Only as many jobs as there are workers
+# are taken off the queue at a time, so a burst of files waits on disk, not
+# in memory. Outputs are written atomically by TableWriter; every finished
+# job also gets a JSON status record, written to a temporary file and
+# renamed into place. Outputs and records are named <name>-<hash>, so PDFs
+# that share a name but not their content never overwrite each other.
+#
+#   python watch_folder.py /srv/statements -o /srv/converted -w 4
+#   python watch_folder.py //share/drop --poll --interval 10 -f parquet
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from extraction_engine import ENGINES, FORMATS, convert_pdf
+from job_queue import DONE, FAILED, MAX_ATTEMPTS, JobQueue
+from ocr_engine import DEFAULT_DPI
+from parallel_extract import default_workers
+from result_cache import (DEFAULT_CACHE_DIR, DEFAULT_CHECKPOINT_DIR, DEFAULT_MAX_BYTES,
+                          Checkpoint, ResultCache, file_digest)
+
+POLL_INTERVAL = 5.0   # seconds between directory scans in polling mode
+TICK = 1.0            # longest wait before finished jobs are collected
+
+# <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = os.O_NONBLOCK
+_EVENT = struct.Struct('iIII')
+
+
+def _is_pdf(name):
+    # Hidden names are partial uploads (.~lock, rsync's .name.XXXX)
+    return name.lower().endswith('.pdf') and not name.startswith('.')
+
+
+def _list_pdfs(directory):
+    with os.scandir(directory) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.is_file() and _is_pdf(entry.name))
+
+
+class InotifyWatcher:
+    """Reports PDFs in a directory once they are closed after writing or moved in
+
+    The first poll() also returns the PDFs already there. Linux only.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory),
+                                  _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+        self._pending = _list_pdfs(directory)
+
+    def poll(self, timeout):
+        """Paths that became ready, waiting up to timeout seconds for the first one"""
+        if self._pending:
+            ready, self._pending = self._pending, []
+            return ready
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return []
+        paths = []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped; the queue's dedup makes a rescan harmless
+                paths += _list_pdfs(self.directory)
+            elif _is_pdf(name):
+                paths.append(os.path.join(self.directory, name))
+        return list(dict.fromkeys(paths))
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Reports PDFs whose size and modification time held still across one scan interval"""
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._seen = {}      # path -> (size, mtime) at the last scan
+        self._reported = {}  # path -> (size, mtime) when it was last reported
+        self._next_scan = 0.0
+
+    def poll(self, timeout):
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, delay))
+        self._next_scan = time.monotonic() + self.interval
+        current = {}
+        for path in _list_pdfs(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            current[path] = (stat.st_size, stat.st_mtime_ns)
+        ready = [path for path, state in current.items()
+                 if self._seen.get(path) == state and self._reported.get(path) != state]
+        self._reported = {path: state for path, state in self._reported.items()
+                          if path in current}
+        self._reported.update((path, current[path]) for path in ready)
+        self._seen = current
+        return ready
+
+    def close(self):
+        pass
+
+
+def make_watcher(directory, poll=False, interval=POLL_INTERVAL):
+    """inotify where available, else directory polling"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            print(f"inotify unavailable ({e}); polling every {interval:g} s", flush=True)
+    return PollingWatcher(directory, interval)
+
+
+def _init_worker():
+    # Ctrl+C reaches the whole process group; the service decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _convert_job(pdf_path, output_path, options):
+    """Worker entry point; must stay at module level so it can be pickled"""
+    return convert_pdf(pdf_path, output_path=output_path, **options)
+
+
+def job_name(job):
+    """<name>-<first 12 hex digits of the content hash>, the stem of a job's files"""
+    name = os.path.splitext(os.path.basename(job['path']))[0]
+    return f"{name}-{job['digest'][:12]}"
+
+
+def job_output_path(job, output_dir, fmt="xlsx"):
+    """Where a job's tables go: OUTPUT_DIR/<name>-<hash>_converted.<fmt>"""
+    return os.path.join(output_dir, f"{job_name(job)}_converted.{fmt}")
+
+
+def write_status(status_dir, job, **extra):
+    """Write a job's status record as <name>-<hash>.json, atomically; returns its path"""
+    path = os.path.join(status_dir, f"{job_name(job)}.json")
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(dict(job, **extra), f, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path
+
+
+def run_service(input_dir, output_dir, db_path=None, workers=1, poll=False,
+                interval=POLL_INTERVAL, max_attempts=MAX_ATTEMPTS, retry_failed=False,
+                stop=None, log=print, **options):
+    """Convert PDFs arriving in input_dir until stop (a threading.Event) is set
+
+    options are passed to extraction_engine.convert_pdf (engine, fmt,
+    lattice, cache, ...). Jobs still converting when stop is set are
+    finished first; if the process is killed instead they are run again on
+    the next start, resuming after their last extracted page when a
+    Checkpoint is among the options.
+    """
+    stop = stop or threading.Event()
+    if options.get('ocr_workers') is None:
+        # Share the cores between worker processes and their tesseract threads
+        options['ocr_workers'] = max(1, default_workers() // max(1, workers))
+    status_dir = os.path.join(output_dir, 'status')
+    os.makedirs(status_dir, exist_ok=True)
+    queue = JobQueue(db_path or os.path.join(output_dir, 'jobs.sqlite'), max_attempts)
+    recovered = queue.recover()
+    if recovered:
+        log(f"Re-queued {recovered} job(s) interrupted by the last shutdown")
+    if retry_failed:
+        log(f"Re-queued {queue.retry_failed()} failed job(s)")
+    watcher = make_watcher(input_dir, poll, interval)
+    log(f"Watching {input_dir} ({type(watcher).__name__}), writing to {output_dir}")
+
+    def new_pool():
+        # spawn, not fork: a forked child would inherit a JVM it cannot use
+        return ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker)
+
+    def finished(job, started, future):
+        try:
+            output = future.result()
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            job = queue.fail(job['id'], e)
+            retry = "" if job['state'] == FAILED else \
+                f", retry {job['attempts'] + 1} in {job['not_before'] - time.time():.0f} s"
+            log(f"[job {job['id']}] {job['path']} FAILED: {e}{retry}")
+        else:
+            job = queue.complete(job['id'], output)
+            log(f"[job {job['id']}] {job['path']} -> {output or 'no tables found'}")
+        if job['state'] in (DONE, FAILED):
+            write_status(status_dir, job, elapsed=time.time() - started)
+        if options.get('cache'):
+            # The workers' copies of the cache store entries without evicting
+            options['cache'].trim()
+
+    pool = new_pool()
+    in_flight = {}   # future -> (job, start time)
+    try:
+        while not stop.is_set() or in_flight:
+            if not stop.is_set():
+                for path in watcher.poll(0 if in_flight else TICK):
+                    try:
+                        digest = file_digest(path)
+                    except OSError:
+                        continue  # gone again before it could be read
+                    job_id = queue.enqueue(path, digest)
+                    if job_id is not None:
+                        log(f"[job {job_id}] queued {path}")
+                # Backpressure: claim no more jobs than there are free workers
+                while len(in_flight) < workers:
+                    job = queue.claim()
+                    if job is None:
+                        break
+                    future = pool.submit(_convert_job, job['path'],
+                                         job_output_path(job, output_dir,
+                                                         options.get('fmt', 'xlsx')),
+                                         options)
+                    in_flight[future] = (job, time.time())
+            if not in_flight:
+                continue
+            done, _ = wait(in_flight, timeout=TICK, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, started = in_flight.pop(future)
+                try:
+                    finished(job, started, future)
+                except BrokenProcessPool as e:
+                    # A worker died (out of memory, a crash in a native library):
+                    # every job in the pool counts as a failed attempt
+                    for lost, _ in [(job, started)] + list(in_flight.values()):
+                        queue.fail(lost['id'], f"worker process died: {e}")
+                    log(f"Worker pool broke ({e}); restarting it")
+                    in_flight.clear()
+                    pool.shutdown(wait=False)
+                    pool = new_pool()
+                    break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        watcher.close()
+        counts = queue.counts()
+        queue.close()
+        log("Stopped: " + ", ".join(f"{n} {state}" for state, n in sorted(counts.items())))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert every PDF dropped into a directory (runs until interrupted)")
+    parser.add_argument('input_dir', help="Directory to watch for new PDFs")
+    parser.add_argument('-o', '--output-dir',
+                        help="Where outputs and status records go (default: INPUT_DIR/converted)")
+    parser.add_argument('--db', help="Job queue database (default: OUTPUT_DIR/jobs.sqlite)")
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(),
+                        help="Documents converted at once (default: CPU count)")
+    parser.add_argument('--poll', action='store_true',
+                        help="Scan the directory instead of using inotify (network shares)")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help=f"Seconds between scans when polling (default: {POLL_INTERVAL:g})")
+    parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS,
+                        help=f"Tries per document before it is marked failed (default: {MAX_ATTEMPTS})")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Queue the documents that failed in earlier runs again")
+    parser.add_argument('-e', '--engine', default='auto', choices=ENGINES,
+                        type=str.lower, help="Extraction engine (default: auto)")
+    parser.add_argument('--no-lattice', dest='lattice', action='store_false',
+                        help="Do not detect bordered tables")
+    parser.add_argument('--no-stream', dest='stream', action='store_false',
+                        help="Do not detect borderless tables")
+    parser.add_argument('--detect-areas', action='store_true',
+                        help="Locate ruled tables first and parse only those regions")
+    parser.add_argument('-f', '--format', dest='fmt', default='xlsx', choices=FORMATS,
+                        help="Output format (default: xlsx)")
+    parser.add_argument('--password', help="Password for encrypted PDFs")
+    parser.add_argument('--ocr-dpi', type=int, default=DEFAULT_DPI,
+                        help=f"Resolution scanned pages are rasterised at (default: {DEFAULT_DPI})")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"Extraction result cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help="Always re-extract, ignoring and not updating the cache")
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR,
+                        help="Where extracted pages are kept until each document is written, "
+                             f"so interrupted jobs resume (default: {DEFAULT_CHECKPOINT_DIR})")
+    parser.add_argument('--no-checkpoint', dest='use_checkpoint', action='store_false',
+                        help="Do not checkpoint pages; interrupted jobs start over")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: not a directory: {args.input_dir}", file=sys.stderr)
+        return 2
+    input_dir = os.path.abspath(args.input_dir)
+    output_dir = os.path.abspath(args.output_dir or os.path.join(input_dir, 'converted'))
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        print("Stopping after the documents being converted...", flush=True)
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    cache = ResultCache(args.cache_dir, DEFAULT_MAX_BYTES) if args.use_cache else None
+    checkpoint = Checkpoint(args.checkpoint_dir) if args.use_checkpoint else None
+    run_service(input_dir, output_dir, db_path=args.db, workers=max(1, args.workers),
+                poll=args.poll, interval=args.interval, max_attempts=args.max_attempts,
+                retry_failed=args.retry_failed, stop=stop,
+                log=lambda message: print(message, flush=True),
+                engine=args.engine, lattice=args.lattice, stream=args.stream,
+                detect_areas=args.detect_areas, fmt=args.fmt, password=args.password,
+                ocr_dpi=args.ocr_dpi, cache=cache, checkpoint=checkpoint)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())